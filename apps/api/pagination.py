@@ -0,0 +1,53 @@
+"""
+API pagination classes.
+"""
+from django.conf import settings
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from apps.core.pagination import KeysetPaginator
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination seeking on (created_at, id).
+    
+    Views có thể đổi thứ tự bằng thuộc tính ``keyset_ordering``; cột cuối
+    phải unique và nên có index khớp thứ tự. Thứ tự do paginator quyết định
+    (không dùng OrderingFilter/``?ordering=``), và response không có ``count``:
+    đếm chính xác trên queryset đã lọc là thứ keyset muốn tránh.
+    """
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        paginator = KeysetPaginator(queryset, self.page_size, ordering=ordering)
+        self.page = paginator.get_page(request.query_params.get(self.cursor_query_param))
+        return list(self.page)
+    
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+            'results': data,
+        })
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
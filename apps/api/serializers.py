@@ -2,6 +2,7 @@
 API serializers.
 """
 from rest_framework import serializers
+from apps.core.models import Prompt
 from apps.users.models import User
 
 
@@ -42,3 +43,18 @@ class UserCreateSerializer(serializers.ModelSerializer):
         validated_data.pop('password_confirm')
         user = User.objects.create_user(**validated_data)
         return user
+
+
+class PromptSerializer(serializers.ModelSerializer):
+    """Serializer for marketplace prompts."""
+    category = serializers.StringRelatedField()
+    author = serializers.StringRelatedField()
+    tags = serializers.ListField(source='get_tags_list', read_only=True)
+    
+    class Meta:
+        model = Prompt
+        fields = [
+            'id', 'title', 'slug', 'description', 'category', 'tags',
+            'price', 'original_price', 'thumbnail', 'author',
+            'views', 'downloads', 'rating', 'rating_count', 'bayesian_rating', 'created_at'
+        ]
@@ -2,15 +2,12 @@
 Celery tasks for API app.
 """
 from celery import shared_task
-from django.core.mail import send_mail
-from django.conf import settings
-import time
 
 
 @shared_task
 def send_welcome_email(user_id):
     """
-    Send welcome email to new user.
+    Queue the welcome email of a new user (sent by the outbox worker, see apps.core.mail).
     
     Args:
         user_id: ID of the user
@@ -18,22 +15,19 @@ def send_welcome_email(user_id):
     Returns:
         str: Status message
     """
+    from apps.core.mail import enqueue
     from apps.users.models import User
     
-    try:
-        user = User.objects.get(id=user_id)
-        send_mail(
-            subject='Chào mừng đến với Django Project!',
-            message=f'Xin chào {user.get_full_name()},\n\nCảm ơn bạn đã đăng ký!',
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False,
-        )
-        return f'Welcome email sent to {user.email}'
-    except User.DoesNotExist:
+    user = User.objects.filter(id=user_id).first()
+    if user is None:
         return f'User with id {user_id} not found'
-    except Exception as e:
-        return f'Error sending email: {str(e)}'
+    queued = enqueue(
+        f'welcome:{user.pk}',
+        subject='Chào mừng đến với Django Project!',
+        body=f'Xin chào {user.get_full_name()},\n\nCảm ơn bạn đã đăng ký!',
+        recipients=[user.email],
+    )
+    return f"Welcome email {'queued' if queued else 'already queued'} for {user.email}"
 
 
 @shared_task
@@ -50,20 +44,24 @@ def cleanup_old_data():
 
 
 @shared_task
-def generate_report(report_type):
+def generate_report(report_type, file_format='csv', since=None, until=None):
     """
-    Generate report asynchronously.
+    Generate an export file asynchronously (see apps.core.exports).
     
     Args:
-        report_type: Type of report to generate
+        report_type: Dataset to export: purchases, prompts or interactions
+        file_format: csv or jsonl (gzip compressed)
+        since: First day included (YYYY-MM-DD), optional
+        until: Last day included (YYYY-MM-DD), optional
     
     Returns:
         str: Path to generated report
     """
-    # Simulate long-running task
-    time.sleep(5)
+    from datetime import date
+    from apps.core.exports import write_export
     
-    return f'Report {report_type} generated successfully'
+    since, until = (date.fromisoformat(day) if day else None for day in (since, until))
+    return write_export(report_type, file_format, since, until)
 
 
 @shared_task(bind=True, max_retries=3)
@@ -1,10 +1,14 @@
 """
 Test suite for API endpoints.
 """
+from django.conf import settings
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
+from apps.core import sysconfig
+from apps.core.models import Category, Prompt
+from apps.prompthub.models import SystemConfig
 
 User = get_user_model()
 
@@ -61,3 +65,38 @@ class APITests(TestCase):
         # Check user was updated
         self.user.refresh_from_db()
         self.assertEqual(self.user.first_name, 'Updated')
+
+    def test_list_users_keyset(self):
+        """Test user list pages by date_joined; ?ordering= does not change the order."""
+        User.objects.create_user(username='second', email='second@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'PAGE_SIZE': 1}):
+            response = self.client.get('/api/users/', {'ordering': 'username'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            self.assertEqual([user['username'] for user in response.data['results']], ['second'])
+            response = self.client.get(response.data['next'])
+        self.assertEqual([user['username'] for user in response.data['results']], ['testuser'])
+
+    def test_search_prompts(self):
+        """Test ranked prompt search endpoint."""
+        Prompt.objects.create(
+            title='Professional Email Writer', description='Write emails', content='Content',
+            category=Category.objects.create(name='Writing'), price=10, status='published',
+            thumbnail='prompts/thumbnails/test.png', author=self.user
+        )
+        response = self.client.get('/api/prompts/search/', {'q': 'email'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['title'], 'Professional Email Writer')
+
+    def test_public_config(self):
+        """Test only public config is exposed, with an ETag."""
+        SystemConfig.objects.create(config_key='site_name', config_value='PromptHub', is_public=True)
+        SystemConfig.objects.create(config_key='smtp_password', config_value='secret')
+        sysconfig.invalidate()
+        response = self.client.get('/api/config/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'site_name': 'PromptHub'})
+        response = self.client.get('/api/config/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
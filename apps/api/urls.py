@@ -8,11 +8,13 @@ from . import views
 
 router = DefaultRouter()
 router.register(r'users', views.UserViewSet, basename='user')
+router.register(r'prompts', views.PromptViewSet, basename='prompt')
 
 app_name = 'api'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('config/', views.public_config, name='public_config'),
     path('auth/login/', obtain_auth_token, name='api_token_auth'),
     path('auth/', include('rest_framework.urls')),
 ]
@@ -1,12 +1,22 @@
 """
 API views.
 """
+from django.http import HttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag, require_GET
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from apps.core import sysconfig
+from apps.core.counters import increment
+from apps.core.models import Prompt
+from apps.core.search import search_prompts
+from apps.core.tags import filter_by_tag, tag_cloud
+from apps.core.trending import record_event
 from apps.users.models import User
-from .serializers import UserSerializer, UserCreateSerializer
+from .serializers import UserSerializer, UserCreateSerializer, PromptSerializer
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -15,6 +25,8 @@ class UserViewSet(viewsets.ModelViewSet):
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    # Khớp index (-date_joined, -id) của users
+    keyset_ordering = ('-date_joined', '-id')
     
     def get_permissions(self):
         """Set permissions based on action."""
@@ -45,3 +57,53 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data)
+
+
+class PromptViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for published marketplace prompts.
+    """
+    queryset = Prompt.objects.filter(status='published').select_related(
+        'category', 'author'
+    ).prefetch_related('tag_items')
+    serializer_class = PromptSerializer
+    permission_classes = [AllowAny]
+    
+    def get_queryset(self):
+        """Filter by tag slug: /api/prompts/?tag=..."""
+        queryset = super().get_queryset()
+        tag = self.request.query_params.get('tag')
+        if tag:
+            queryset = filter_by_tag(queryset, tag)
+        return queryset
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Prompt detail; the view is counted in Redis (counters and trending)."""
+        response = super().retrieve(request, *args, **kwargs)
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        increment(Prompt, pk, 'views')
+        record_event(pk, 'view')
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search: /api/prompts/search/?q=..."""
+        prompts = search_prompts(request.query_params.get('q', ''), self.get_queryset())
+        # Kết quả sắp theo độ liên quan nên không seek được theo created_at
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(prompts, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def tags(self, request):
+        """Most used tags (tag cloud)."""
+        return Response(tag_cloud())
+
+
+@require_GET
+@cache_control(public=True, max_age=60)
+@etag(lambda request: sysconfig.public_config().etag)
+def public_config(request):
+    """Public SystemConfig values as JSON, pre-serialized in the process cache."""
+    return HttpResponse(sysconfig.public_config().public_json, content_type='application/json')
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Category, Prompt, Review, Purchase
+from django.utils import timezone
+
+from .models import Category, DuplicateCandidate, OutboxEmail, Prompt, Review, Purchase, MarketplaceStats, UserActivity
 
 
 @admin.register(Category)
@@ -15,7 +17,8 @@ class PromptAdmin(admin.ModelAdmin):
     list_filter = ['status', 'featured', 'is_trending', 'category', 'created_at']
     search_fields = ['title', 'description', 'tags']
     prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ['views', 'downloads', 'rating', 'rating_count', 'created_at', 'updated_at']
+    # is_trending do task refresh_trending tính (apps.core.trending)
+    readonly_fields = ['views', 'downloads', 'rating', 'rating_count', 'is_trending', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Thông tin cơ bản', {
@@ -51,3 +54,55 @@ class PurchaseAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['user__username', 'prompt__title', 'transaction_id']
     readonly_fields = ['created_at']
+
+
+@admin.register(MarketplaceStats)
+class MarketplaceStatsAdmin(admin.ModelAdmin):
+    list_display = ['total_products', 'total_sales', 'total_earnings', 'total_downloads', 'updated_at']
+    readonly_fields = ['total_products', 'total_downloads', 'total_categories', 'total_sales',
+                       'total_earnings', 'updated_at']
+
+
+@admin.register(UserActivity)
+class UserActivityAdmin(admin.ModelAdmin):
+    list_display = ['user', 'prompts_count', 'purchases_count', 'revenue', 'reviews_count', 'updated_at']
+    search_fields = ['user__username', 'user__email']
+    readonly_fields = ['prompts_count', 'purchases_count', 'revenue', 'reviews_count', 'updated_at']
+
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    """Hàng đợi kiểm duyệt prompt gần trùng (apps.core.duplicates)."""
+    list_display = ['__str__', 'similarity', 'status', 'reviewed_by', 'created_at']
+    list_filter = ['status', 'source', 'created_at']
+    search_fields = ['object_id', 'match_object_id']
+    readonly_fields = ['source', 'object_id', 'match_source', 'match_object_id', 'similarity',
+                       'reviewed_by', 'reviewed_at', 'created_at']
+    actions = ['mark_confirmed', 'mark_dismissed']
+
+    def _review(self, request, queryset, status):
+        updated = queryset.update(status=status, reviewed_by=request.user, reviewed_at=timezone.now())
+        self.message_user(request, f'{updated} entries marked as {status}.')
+
+    @admin.action(description='Xác nhận trùng lặp')
+    def mark_confirmed(self, request, queryset):
+        self._review(request, queryset, 'confirmed')
+
+    @admin.action(description='Không trùng lặp')
+    def mark_dismissed(self, request, queryset):
+        self._review(request, queryset, 'dismissed')
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Hàng đợi email (apps.core.mail)."""
+    list_display = ['idempotency_key', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['idempotency_key', 'subject']
+    readonly_fields = ['idempotency_key', 'attempts', 'last_error', 'created_at', 'sent_at']
+    actions = ['retry_now']
+
+    @admin.action(description='Gửi lại ngay')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', next_attempt_at=timezone.now())
+        self.message_user(request, f'{updated} emails queued for sending.')
@@ -0,0 +1,419 @@
+"""
+Bulk import of PromptHub prompts (COPY into staging tables + INSERT ... ON CONFLICT).
+
+File nguồn là JSONL (mỗi dòng một object) hoặc CSV có dòng tiêu đề, mỗi
+record là một prompt::
+
+    {"id_prompt": "PR0000000001", "title": "...", "prompt_text": "...",
+     "categories": ["CA001", "CA003"], "tags": ["seo", "blog"],
+     "ai_models": ["GPT4O", {"id_model": "CL35S", "is_recommended": true}], ...}
+
+Các khóa khác: slug, short_description, status, is_premium, ticket_cost,
+is_featured, is_verified, thumbnail_url, published_at, id_level,
+id_primary_category, created_by (id user), active và các cột của
+PromptContent (prompt_text_en, usage_guide, example_input, example_output,
+tips, variables). Trong CSV, categories/tags/ai_models là danh sách phân
+cách dấu phẩy và variables là chuỗi JSON.
+
+File được đọc tuần tự theo batch ``BATCH_SIZE`` record (bộ nhớ không phụ
+thuộc kích thước file). Mỗi batch, trong một transaction: COPY vào các bảng
+tạm, upsert vào prompts/prompt_content theo khóa chính,
+tạo tag còn thiếu, đồng bộ prompt_categories/prompt_tags/prompt_ai_models
+của các prompt trong batch rồi ghi một dòng ImportBatch. Chạy lại cùng file
+sẽ bỏ qua các batch đã có ImportBatch; upsert idempotent nên nạp lại một
+batch cũng không sinh dữ liệu trùng.
+
+Quy ước cập nhật:
+- Cột thống kê (view_count, rating...), created_by/created_at của prompt đã
+  có không bị ghi đè; published_at chỉ được đặt nếu đang trống.
+- Field không có trong record lấy default của model.
+- Danh sách liên kết có trong record thay thế toàn bộ liên kết cũ của prompt;
+  khóa vắng mặt (cột không có trong CSV) thì giữ nguyên liên kết cũ.
+
+COPY bỏ qua signals: sau khi import nên chạy ``fingerprint_prompts`` và
+``build_content_index``. ``Tag.usage_count`` chỉ đếm prompt marketplace
+(apps.core.tags) nên không đổi; bộ đếm prompt của danh mục được đếm lại một
+lần sau batch cuối (apps.core.category_tree).
+"""
+import csv
+import hashlib
+import io
+import json
+from itertools import count, islice
+
+from django.contrib.auth import get_user_model
+from django.db import DataError, IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from apps.prompthub.models import AIModel, Category, Prompt as HubPrompt, PromptLevel
+
+from . import category_tree
+from .models import ImportBatch
+from .tags import parse_tags
+
+BATCH_SIZE = 5000
+
+# Cột của prompts lấy từ record; các cột còn lại nhận default của model
+PROMPT_COLUMNS = [
+    'id_prompt', 'title', 'slug', 'short_description', 'id_level', 'id_primary_category',
+    'thumbnail_url', 'is_premium', 'ticket_cost', 'is_featured', 'is_verified', 'status',
+    'published_at', 'created_by', 'active', 'updated_at',
+]
+# Không ghi đè khi prompt đã tồn tại
+PROMPT_INSERT_ONLY = {'id_prompt', 'created_by', 'published_at'}
+CONTENT_COLUMNS = [
+    'id_prompt', 'prompt_text', 'prompt_text_en', 'usage_guide', 'example_input', 'example_output',
+    'tips', 'variables',
+]
+LINKS = ('categories', 'tags', 'ai_models')
+
+STAGING_TABLES = [
+    'import_prompts', 'import_prompt_content', 'import_prompt_categories', 'import_prompt_tags',
+    'import_prompt_ai_models',
+]
+STAGING_SQL = [
+    f"""CREATE TEMP TABLE import_prompts AS
+        SELECT {', '.join(PROMPT_COLUMNS)}, true AS sync_categories, true AS sync_tags, true AS sync_ai_models
+        FROM prompts WITH NO DATA""",
+    f"""CREATE TEMP TABLE import_prompt_content AS
+        SELECT {', '.join(CONTENT_COLUMNS)} FROM prompt_content WITH NO DATA""",
+    """CREATE TEMP TABLE import_prompt_categories AS
+        SELECT id_prompt, id_category, is_primary FROM prompt_categories WITH NO DATA""",
+    """CREATE TEMP TABLE import_prompt_tags AS
+        SELECT pt.id_prompt, t.tag_slug, t.tag_name FROM prompt_tags pt, tags t WITH NO DATA""",
+    """CREATE TEMP TABLE import_prompt_ai_models AS
+        SELECT id_prompt, id_model, is_recommended, compatibility_score, notes FROM prompt_ai_models WITH NO DATA""",
+]
+
+LINK_SQL = [
+    # Categories
+    """DELETE FROM prompt_categories pc USING import_prompts s
+        WHERE s.sync_categories AND pc.id_prompt = s.id_prompt AND NOT EXISTS (
+            SELECT 1 FROM import_prompt_categories sc
+            WHERE sc.id_prompt = pc.id_prompt AND sc.id_category = pc.id_category)""",
+    """INSERT INTO prompt_categories (id_prompt, id_category, is_primary, active)
+        SELECT id_prompt, id_category, is_primary, true FROM import_prompt_categories
+        ON CONFLICT (id_prompt, id_category) DO UPDATE SET is_primary = EXCLUDED.is_primary, active = true""",
+    # Tags: tạo tag mới trước, rồi liên kết theo slug
+    """INSERT INTO tags (tag_name, tag_slug, usage_count, active)
+        SELECT DISTINCT ON (tag_slug) tag_name, tag_slug, 0, true FROM import_prompt_tags
+        ORDER BY tag_slug
+        ON CONFLICT (tag_slug) DO NOTHING""",
+    """DELETE FROM prompt_tags pt USING import_prompts s
+        WHERE s.sync_tags AND pt.id_prompt = s.id_prompt AND NOT EXISTS (
+            SELECT 1 FROM import_prompt_tags st JOIN tags t ON t.tag_slug = st.tag_slug
+            WHERE st.id_prompt = pt.id_prompt AND t.id_tag = pt.id_tag)""",
+    """INSERT INTO prompt_tags (id_prompt, id_tag)
+        SELECT st.id_prompt, t.id_tag FROM import_prompt_tags st JOIN tags t ON t.tag_slug = st.tag_slug
+        ON CONFLICT (id_prompt, id_tag) DO NOTHING""",
+    # AI models
+    """DELETE FROM prompt_ai_models pm USING import_prompts s
+        WHERE s.sync_ai_models AND pm.id_prompt = s.id_prompt AND NOT EXISTS (
+            SELECT 1 FROM import_prompt_ai_models sm
+            WHERE sm.id_prompt = pm.id_prompt AND sm.id_model = pm.id_model)""",
+    """INSERT INTO prompt_ai_models (id_prompt, id_model, is_recommended, compatibility_score, notes)
+        SELECT id_prompt, id_model, is_recommended, compatibility_score, notes FROM import_prompt_ai_models
+        ON CONFLICT (id_prompt, id_model) DO UPDATE SET is_recommended = EXCLUDED.is_recommended,
+            compatibility_score = EXCLUDED.compatibility_score, notes = EXCLUDED.notes""",
+]
+
+
+def _copy_text(value):
+    """Encode one value for COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _copy(cursor, table, columns, rows):
+    if not rows:
+        return
+    data = io.StringIO(''.join('\t'.join(_copy_text(value) for value in row) + '\n' for row in rows))
+    cursor.copy_expert(f'COPY {table} ({", ".join(columns)}) FROM STDIN', data)
+
+
+def _prompt_upsert_sql():
+    """INSERT ... ON CONFLICT for prompts, filling unlisted columns with model defaults."""
+    columns, values, params = list(PROMPT_COLUMNS), list(PROMPT_COLUMNS), []
+    now = timezone.now()
+    for field in HubPrompt._meta.concrete_fields:
+        if field.column in PROMPT_COLUMNS:
+            continue
+        columns.append(field.column)
+        values.append('%s')
+        params.append(now if getattr(field, 'auto_now_add', False) else field.get_default())
+    updates = [
+        f'{column} = EXCLUDED.{column}' for column in PROMPT_COLUMNS if column not in PROMPT_INSERT_ONLY
+    ]
+    updates.append('published_at = COALESCE(prompts.published_at, EXCLUDED.published_at)')
+    sql = (
+        f'INSERT INTO prompts ({", ".join(columns)}) SELECT {", ".join(values)} FROM import_prompts '
+        f'ON CONFLICT (id_prompt) DO UPDATE SET {", ".join(updates)}'
+    )
+    return sql, params
+
+
+def _content_upsert_sql():
+    updates = ', '.join(f'{column} = EXCLUDED.{column}' for column in CONTENT_COLUMNS[1:])
+    columns = ', '.join(CONTENT_COLUMNS)
+    return (
+        f'INSERT INTO prompt_content ({columns}) SELECT {columns} FROM import_prompt_content '
+        f'ON CONFLICT (id_prompt) DO UPDATE SET {updates}'
+    )
+
+
+# Chuyển đổi giá trị: JSONL cho kiểu gốc, CSV cho chuỗi (chuỗi rỗng = không có)
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value)
+    return value if value.strip() else None
+
+
+def _bool(value, default):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 't', 'yes', 'y')
+
+
+def _int(value, default):
+    if value is None or value == '':
+        return default
+    return int(value)
+
+
+def _list(value):
+    """List of items, or None when the key is absent (links are then left alone)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    return list(value)
+
+
+class References:
+    """Ids of the lookup tables a record may point to (small, loaded once)."""
+
+    def __init__(self):
+        self.levels = set(PromptLevel.objects.values_list('id_level', flat=True))
+        self.categories = set(Category.objects.values_list('id_category', flat=True))
+        self.ai_models = set(AIModel.objects.values_list('id_model', flat=True))
+
+    def check(self, kind, value, known):
+        if value is not None and value not in known:
+            raise ValueError(f'unknown {kind} {value!r}')
+        return value
+
+
+def parse_record(data, refs, created_by=None, now=None):
+    """
+    Validate one input record.
+
+    Returns:
+        dict: 'prompt' and 'content' rows (column order of PROMPT_COLUMNS /
+        CONTENT_COLUMNS) and 'categories', 'tags', 'ai_models' link rows
+        (None when the record does not set that list)
+    """
+    now = now or timezone.now()
+    id_prompt = _text(data.get('id_prompt'))
+    title = _text(data.get('title'))
+    prompt_text = _text(data.get('prompt_text'))
+    for name, value in (('id_prompt', id_prompt), ('title', title), ('prompt_text', prompt_text)):
+        if value is None:
+            raise ValueError(f'{name} is required')
+    id_prompt = id_prompt.strip()
+    if len(id_prompt) > 12:
+        raise ValueError(f'id_prompt {id_prompt!r} is longer than 12 characters')
+
+    status = _int(data.get('status'), 3)
+    if status not in dict(HubPrompt.STATUS_CHOICES):
+        raise ValueError(f'invalid status {status!r}')
+    published_at = _text(data.get('published_at'))
+    if published_at is not None:
+        published_at = parse_datetime(published_at.strip())
+        if published_at is None:
+            raise ValueError(f'invalid published_at {data["published_at"]!r}')
+    elif status == 3:
+        published_at = now
+    user = _int(data.get('created_by'), created_by)
+    if user is None:
+        raise ValueError('created_by is required (or pass a default user)')
+
+    categories = _list(data.get('categories'))
+    primary = refs.check('category', _text(data.get('id_primary_category')), refs.categories)
+    if categories is not None:
+        categories = list(dict.fromkeys(refs.check('category', c, refs.categories) for c in categories))
+        if primary is None and categories:
+            primary = categories[0]
+        elif primary is not None and primary not in categories:
+            categories.insert(0, primary)
+
+    tags = data.get('tags')
+    if tags is not None:
+        tags = parse_tags(tags if isinstance(tags, str) else ','.join(tags))
+
+    ai_models = _list(data.get('ai_models'))
+    if ai_models is not None:
+        rows = {}
+        for item in ai_models:
+            item = item if isinstance(item, dict) else {'id_model': item}
+            model_id = refs.check('AI model', _text(item.get('id_model')), refs.ai_models)
+            rows[model_id] = [
+                id_prompt, model_id, _bool(item.get('is_recommended'), False),
+                _int(item.get('compatibility_score'), None), _text(item.get('notes')),
+            ]
+        ai_models = list(rows.values())
+
+    variables = data.get('variables')
+    if isinstance(variables, str):
+        variables = json.loads(variables) if variables.strip() else None
+
+    return {
+        'prompt': [
+            id_prompt, title[:200], _text(data.get('slug')) or f'{slugify(title)[:230]}-{id_prompt.lower()}',
+            _text(data.get('short_description')),
+            refs.check('level', _int(data.get('id_level'), None), refs.levels), primary,
+            _text(data.get('thumbnail_url')), _bool(data.get('is_premium'), False),
+            _int(data.get('ticket_cost'), 0), _bool(data.get('is_featured'), False),
+            _bool(data.get('is_verified'), False), status, published_at, user,
+            _bool(data.get('active'), True), now,
+        ],
+        'content': [
+            id_prompt, prompt_text, _text(data.get('prompt_text_en')), _text(data.get('usage_guide')),
+            _text(data.get('example_input')), _text(data.get('example_output')), _text(data.get('tips')),
+            variables,
+        ],
+        'categories': None if categories is None else [
+            [id_prompt, category, category == primary] for category in categories
+        ],
+        'tags': None if tags is None else [[id_prompt, slug, name] for slug, name in tags.items()],
+        'ai_models': ai_models,
+    }
+
+
+def read_records(path, file_format=None):
+    """
+    Yield (line number, raw record) from a JSONL or CSV file.
+
+    JSONL chỉ trả về chuỗi dòng (parse khi batch thật sự được nạp, nên bỏ
+    qua batch đã import rất nhanh); CSV trả về dict.
+    """
+    file_format = file_format or ('csv' if str(path).lower().endswith('.csv') else 'jsonl')
+    with open(path, encoding='utf-8', newline='') as source:
+        if file_format == 'csv':
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for number, line in enumerate(source, 1):
+                if line.strip():
+                    yield number, line
+
+
+def file_key(path, batch_size):
+    """Identify an import run: SHA-256 of the file content and the batch size."""
+    digest = hashlib.sha256(str(batch_size).encode())
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _import_batch(records, refs, created_by):
+    """Parse, stage and upsert one batch inside the current transaction."""
+    now = timezone.now()
+    parsed = {}
+    for number, raw in records:
+        try:
+            data = json.loads(raw) if isinstance(raw, str) else raw
+            if not isinstance(data, dict):
+                raise ValueError('record is not an object')
+            record = parse_record(data, refs, created_by, now)
+        except ValueError as exc:
+            raise ValueError(f'line {number}: {exc}') from exc
+        # Một prompt lặp lại trong batch: giữ bản cuối (ON CONFLICT không cho sửa một dòng hai lần)
+        parsed[record['prompt'][0]] = record
+    records = list(parsed.values())
+
+    users = {record['prompt'][PROMPT_COLUMNS.index('created_by')] for record in records}
+    missing = users - set(get_user_model().objects.filter(pk__in=users).values_list('pk', flat=True))
+    if missing:
+        raise ValueError(f'unknown created_by user ids: {sorted(missing)[:10]}')
+
+    prompt_sql, prompt_params = _prompt_upsert_sql()
+    with connection.cursor() as cursor:
+        for sql in STAGING_SQL:
+            cursor.execute(sql)
+        _copy(cursor, 'import_prompts', PROMPT_COLUMNS + [f'sync_{link}' for link in LINKS], [
+            record['prompt'] + [record[link] is not None for link in LINKS] for record in records
+        ])
+        _copy(cursor, 'import_prompt_content', CONTENT_COLUMNS, [record['content'] for record in records])
+        _copy(cursor, 'import_prompt_categories', ['id_prompt', 'id_category', 'is_primary'],
+              [row for record in records for row in record['categories'] or ()])
+        _copy(cursor, 'import_prompt_tags', ['id_prompt', 'tag_slug', 'tag_name'],
+              [row for record in records for row in record['tags'] or ()])
+        _copy(cursor, 'import_prompt_ai_models',
+              ['id_prompt', 'id_model', 'is_recommended', 'compatibility_score', 'notes'],
+              [row for record in records for row in record['ai_models'] or ()])
+        cursor.execute(prompt_sql, prompt_params)
+        cursor.execute(_content_upsert_sql())
+        for sql in LINK_SQL:
+            cursor.execute(sql)
+        # Xóa ngay thay vì ON COMMIT DROP: batch có thể chạy trong một transaction bên ngoài
+        cursor.execute(f'DROP TABLE {", ".join(STAGING_TABLES)}')
+    return len(records)
+
+
+def import_prompts(path, created_by=None, batch_size=BATCH_SIZE, file_format=None, restart=False, progress=None):
+    """
+    Import a JSONL/CSV file of prompthub prompts, resuming after the last committed batch.
+
+    Args:
+        created_by: Default user id for records without ``created_by``
+        restart: Forget the batches already imported from this file
+        progress: Called with (batch number, records read so far, skipped) after each batch
+
+    Returns:
+        dict: key, batches (imported now), skipped (already imported), records
+    """
+    key = file_key(path, batch_size)
+    if restart:
+        ImportBatch.objects.filter(import_key=key).delete()
+    done = set(ImportBatch.objects.filter(import_key=key).values_list('batch_number', flat=True))
+    refs = References()
+
+    stats = {'key': key, 'batches': 0, 'skipped': 0, 'records': 0}
+    records = read_records(path, file_format)
+    read = 0
+    for batch_number in count():
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        read += len(batch)
+        if batch_number in done:
+            stats['skipped'] += 1
+        else:
+            try:
+                with transaction.atomic():
+                    imported = _import_batch(batch, refs, created_by)
+                    ImportBatch.objects.create(
+                        import_key=key, batch_number=batch_number, first_line=batch[0][0], records=imported
+                    )
+            except (IntegrityError, DataError) as exc:
+                raise ValueError(f'batch starting at line {batch[0][0]}: {exc}') from exc
+            stats['batches'] += 1
+            stats['records'] += imported
+        if progress:
+            progress(batch_number, read, batch_number in done)
+    if stats['batches']:
+        category_tree.rebuild_counts()
+    return stats
@@ -0,0 +1,125 @@
+"""
+Per-section cache for the marketplace home page.
+
+Mỗi section của trang chủ được cache riêng trong CACHES['default'] với key
+dạng ``home:v<version>:<section>``. Trang chủ warm chỉ tốn một lần
+``get_many`` (một MGET trên Redis) và không có truy vấn SQL nào; khi dữ
+liệu thay đổi, signals trong ``apps.core.signals`` xoá các section liên quan.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from redis.exceptions import RedisError
+
+from .models import Category, MarketplaceStats, Prompt, Purchase
+from .trending import top_prompt_ids
+
+
+def _published_prompts():
+    """Base queryset for prompt cards shown on the home page."""
+    return Prompt.objects.filter(status='published').select_related(
+        'category', 'author'
+    ).prefetch_related('tag_items')
+
+
+def build_featured_prompts():
+    """Featured prompts (banner/popular section)."""
+    return list(_published_prompts().filter(featured=True).order_by('-created_at')[:8])
+
+
+def build_trending_prompts():
+    """Trending prompts, in the order of the trending snapshot (apps.core.trending)."""
+    try:
+        ids = top_prompt_ids()
+    except RedisError:
+        ids = []
+    if not ids:
+        # Chưa có dữ liệu trending (mới deploy): dùng lượt xem toàn thời gian
+        return list(_published_prompts().order_by('-views')[:6])
+    prompts = _published_prompts().in_bulk(ids)
+    return [prompts[pk] for pk in ids if pk in prompts][:6]
+
+
+def build_categories():
+    """Top categories with their published product count."""
+    return list(
+        Category.objects.annotate(
+            product_count=Count('prompts', filter=Q(prompts__status='published'))
+        ).order_by('-product_count')[:8]
+    )
+
+
+def build_new_arrivals():
+    """Newest published prompts."""
+    return list(_published_prompts().order_by('-created_at')[:12])
+
+
+def build_best_sellers():
+    """Best sellers by downloads."""
+    return list(_published_prompts().order_by('-downloads')[:6])
+
+
+def build_stats():
+    """Marketplace totals shown on the home page."""
+    stats = MarketplaceStats.load()
+    return {
+        'total_products': stats.total_products,
+        'total_downloads': stats.total_downloads,
+        'total_categories': stats.total_categories,
+    }
+
+
+# Section name -> builder function
+HOME_SECTIONS = {
+    'featured_prompts': build_featured_prompts,
+    'trending_prompts': build_trending_prompts,
+    'categories': build_categories,
+    'new_arrivals': build_new_arrivals,
+    'best_sellers': build_best_sellers,
+    'stats': build_stats,
+}
+
+# Model -> sections that must be invalidated when a row of that model changes
+SECTION_DEPENDENCIES = {
+    Prompt: tuple(HOME_SECTIONS),
+    Category: tuple(HOME_SECTIONS),
+    Purchase: ('best_sellers', 'stats'),
+}
+
+
+def section_key(section):
+    """Return the cache key of a home page section."""
+    return f'home:v{settings.HOME_CACHE_VERSION}:{section}'
+
+
+def get_home_sections():
+    """
+    Return a dict of all home page sections.
+
+    Warm sections are read with a single ``get_many``; missing ones are
+    rebuilt from the database and written back with ``set_many``.
+    """
+    keys = {section_key(section): section for section in HOME_SECTIONS}
+    cached = cache.get_many(keys)
+    sections = {keys[key]: value for key, value in cached.items()}
+
+    missing = {}
+    for section, builder in HOME_SECTIONS.items():
+        if section not in sections:
+            sections[section] = missing[section_key(section)] = builder()
+
+    if missing:
+        cache.set_many(missing, timeout=settings.HOME_CACHE_TIMEOUT)
+    return sections
+
+
+def invalidate_sections(sections):
+    """Drop the given home page sections from the cache."""
+    cache.delete_many([section_key(section) for section in sections])
+
+
+def invalidate_for_model(model):
+    """Drop every home page section that depends on ``model``."""
+    sections = SECTION_DEPENDENCIES.get(model)
+    if sections:
+        invalidate_sections(sections)
@@ -0,0 +1,233 @@
+"""
+Category tree of PromptHub as a materialized path.
+
+``Category.path`` lưu chuỗi id từ gốc tới chính nó (``'CA001/CA004/'``), có
+index ``varchar_pattern_ops``: cả cây con của một danh mục là một điều kiện
+``path LIKE 'CA001/%'`` nên duyệt danh mục ở mọi độ sâu chỉ tốn một truy vấn
+dùng index, không cần CTE đệ quy. Signals đặt path khi tạo/chuyển danh mục
+và cộng/trừ ``prompt_count``/``subtree_prompt_count`` của danh mục và các tổ
+tiên theo từng liên kết PromptCategory thay đổi. ``subtree_prompt_count`` đếm
+prompt phân biệt: một tổ tiên chỉ được cộng/trừ khi prompt không còn liên kết
+active nào khác trong cây con của nó.
+
+Cấu trúc cây (các danh mục active) được nạp bằng một truy vấn và giữ trong
+process qua ``apps.core.versioned``; bộ đếm không nằm trong bản cache vì đổi
+theo từng liên kết - đọc bằng ``subtree_counts()``.
+
+Ghi hàng loạt không qua signals (COPY của bulk_import, ``bulk_create``,
+``QuerySet.update``) cần gọi ``rebuild()`` (hoặc ``rebuild_counts()``) sau đó.
+"""
+from django.db import connection
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Concat, Substr
+
+from apps.prompthub.models import Category, Prompt as HubPrompt, PromptCategory
+
+from .versioned import VersionedCache
+
+PATHS_SQL = """
+    WITH RECURSIVE tree (id_category, path, depth) AS (
+        SELECT id_category, id_category || '/', 0 FROM categories WHERE parent_category_id IS NULL
+        UNION ALL
+        SELECT c.id_category, t.path || c.id_category || '/', t.depth + 1
+        FROM categories c JOIN tree t ON c.parent_category_id = t.id_category
+    )
+    UPDATE categories c SET path = t.path, depth = t.depth FROM tree t
+    WHERE t.id_category = c.id_category AND (c.path, c.depth) IS DISTINCT FROM (t.path, t.depth)
+"""
+COUNTS_SQL = """
+    WITH direct AS (
+        SELECT id_category, count(*) AS n FROM prompt_categories WHERE active GROUP BY id_category
+    ), totals AS (
+        SELECT a.id_category, count(DISTINCT pc.id_prompt) AS n
+        FROM categories a
+        JOIN categories d ON a.path <> '' AND left(d.path, length(a.path)) = a.path
+        JOIN prompt_categories pc ON pc.id_category = d.id_category AND pc.active
+        GROUP BY a.id_category
+    )
+    UPDATE categories c
+    SET prompt_count = COALESCE(direct.n, 0), subtree_prompt_count = COALESCE(totals.n, 0)
+    FROM categories x
+    LEFT JOIN direct ON direct.id_category = x.id_category
+    LEFT JOIN totals ON totals.id_category = x.id_category
+    WHERE x.id_category = c.id_category
+"""
+# subtree_prompt_count của vài danh mục (các tổ tiên mà một cây con vừa rời đi hoặc nhập vào)
+RECOUNT_SQL = """
+    UPDATE categories a SET subtree_prompt_count = (
+        SELECT count(DISTINCT pc.id_prompt)
+        FROM categories d JOIN prompt_categories pc ON pc.id_category = d.id_category AND pc.active
+        WHERE left(d.path, length(a.path)) = a.path
+    )
+    WHERE a.id_category = ANY(%s) AND a.path <> ''
+"""
+
+
+class CategoryNode:
+    """One active category of the cached tree."""
+
+    __slots__ = ('id', 'parent_id', 'name', 'code', 'path', 'depth', 'icon_url', 'color_hex', 'children')
+
+    def __init__(self, id, parent_id, name, code, path, depth, icon_url, color_hex):
+        self.id = id
+        self.parent_id = parent_id
+        self.name = name
+        self.code = code
+        self.path = path
+        self.depth = depth
+        self.icon_url = icon_url
+        self.color_hex = color_hex
+        self.children = []
+
+    def __repr__(self):
+        return f'<CategoryNode {self.path}>'
+
+
+class CategoryTree:
+    """Active categories by id and code, children in display order."""
+
+    def __init__(self, nodes):
+        self.nodes = {node.id: node for node in nodes}
+        self.by_code = {node.code: node for node in nodes}
+        self.roots = []
+        for node in nodes:
+            parent = self.nodes.get(node.parent_id)
+            if node.parent_id is None:
+                self.roots.append(node)
+            elif parent is not None:
+                parent.children.append(node)
+            # Cha bị tắt: cả nhánh bị ẩn khỏi điều hướng
+
+    def get(self, category_id):
+        return self.nodes.get(category_id)
+
+    def ancestors(self, category_id):
+        """Breadcrumb from the root down to the category itself."""
+        node = self.nodes.get(category_id)
+        if node is None:
+            return []
+        return [self.nodes[pk] for pk in node.path.split('/')[:-1] if pk in self.nodes]
+
+    def descendants(self, category_id):
+        """The category and its whole subtree, depth first."""
+        stack = [self.nodes[category_id]] if category_id in self.nodes else []
+        result = []
+        while stack:
+            node = stack.pop()
+            result.append(node)
+            stack.extend(reversed(node.children))
+        return result
+
+
+def load_tree():
+    """Build the CategoryTree with one query."""
+    rows = Category.objects.filter(active=True).order_by('depth', 'sort_order', 'category_name').values_list(
+        'id_category', 'parent_category_id', 'category_name', 'category_code', 'path', 'depth',
+        'icon_url', 'color_hex',
+    )
+    return CategoryTree([CategoryNode(*row) for row in rows])
+
+
+trees = VersionedCache('categories:tree', load_tree)
+get_tree = trees.get
+invalidate = trees.invalidate
+
+
+def subtree_prompts(category_id, queryset=None):
+    """
+    Prompts linked to the category or any of its descendants (one query).
+
+    ``queryset`` mặc định là mọi Prompt của PromptHub; danh mục không active
+    (không có trong cây) trả về queryset rỗng.
+    """
+    queryset = HubPrompt.objects.all() if queryset is None else queryset
+    node = get_tree().get(category_id)
+    if node is None:
+        return queryset.none()
+    return queryset.filter(pk__in=PromptCategory.objects.filter(
+        active=True, category__path__startswith=node.path
+    ).values('prompt_id'))
+
+
+def subtree_counts():
+    """Category id -> subtree_prompt_count for every active category (one query)."""
+    return dict(Category.objects.filter(active=True).values_list('pk', 'subtree_prompt_count'))
+
+
+# =============================================
+# Maintenance (gọi từ apps.core.signals)
+# =============================================
+
+def _ids(path):
+    return path.split('/')[:-1]
+
+
+def place(category):
+    """Set ``path``/``depth`` of a category about to be saved from its parent."""
+    if category.parent_category_id is None:
+        parent_path, depth = '', 0
+    else:
+        parent_path, parent_depth = Category.objects.filter(
+            pk=category.parent_category_id
+        ).values_list('path', 'depth').get()
+        if category.pk in _ids(parent_path):
+            raise ValueError(f'Category {category.pk} cannot be moved under its own descendant')
+        depth = parent_depth + 1
+    category.path = f'{parent_path}{category.pk}/'
+    category.depth = depth
+
+
+def move_subtree(category, old_path, old_depth):
+    """Rewrite descendant paths and recount the ancestors the subtree left or joined."""
+    Category.objects.filter(path__startswith=old_path).exclude(pk=category.pk).update(
+        path=Concat(Value(category.path), Substr('path', len(old_path) + 1)),
+        depth=F('depth') + (category.depth - old_depth),
+    )
+    old_ancestors, new_ancestors = set(_ids(old_path)[:-1]), set(_ids(category.path)[:-1])
+    # Prompt trong cây con có thể đã được đếm ở tổ tiên qua liên kết khác: đếm lại thay vì cộng/trừ
+    changed = sorted(old_ancestors ^ new_ancestors)
+    if changed:
+        with connection.cursor() as cursor:
+            cursor.execute(RECOUNT_SQL, [changed])
+
+
+def add_prompt(category_id, prompt_id, delta, link_id, counted=None):
+    """
+    Apply one PromptCategory link of a prompt (``delta`` 1: added, -1: removed).
+
+    ``prompt_count`` của danh mục luôn đổi; ``subtree_prompt_count`` của danh
+    mục và từng tổ tiên chỉ đổi khi prompt không có liên kết active nào khác
+    (ngoài ``link_id``) trong cây con đó. ``counted`` (set, theo prompt) gom các
+    danh mục đã trừ khi nhiều liên kết của cùng prompt bị xóa một lượt
+    (cascade): các liên kết đó đã rời DB trước khi signal đầu tiên chạy.
+    """
+    path = Category.objects.filter(pk=category_id).values_list('path', flat=True).first()
+    if path is None:
+        return
+    covered = set(counted or ())
+    for other_path in PromptCategory.objects.filter(prompt_id=prompt_id, active=True).exclude(
+        pk=link_id
+    ).values_list('category__path', flat=True):
+        covered.update(_ids(other_path))
+    ancestors = [pk for pk in _ids(path) or [category_id] if pk not in covered]
+    Category.objects.filter(pk__in=[*ancestors, category_id]).update(
+        subtree_prompt_count=F('subtree_prompt_count') + Case(
+            When(pk__in=ancestors, then=Value(delta)), default=Value(0)
+        ),
+        prompt_count=F('prompt_count') + Case(When(pk=category_id, then=Value(delta)), default=Value(0)),
+    )
+    if counted is not None:
+        counted.update(ancestors)
+
+
+def rebuild_counts():
+    """Recount prompt_count/subtree_prompt_count of every category from prompt_categories."""
+    with connection.cursor() as cursor:
+        cursor.execute(COUNTS_SQL)
+
+
+def rebuild():
+    """Recompute every path from parent_category, then every count."""
+    with connection.cursor() as cursor:
+        cursor.execute(PATHS_SQL)
+        cursor.execute(COUNTS_SQL)
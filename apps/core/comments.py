@@ -0,0 +1,179 @@
+"""
+Threaded PromptHub comments.
+
+Mỗi trả lời lưu ``thread_root`` (bình luận gốc) và ``depth``, đặt một lần khi
+tạo (signals), nên cả thread là một index range scan trên
+``(thread_root, created_at, id_comment)`` thay vì một truy vấn cho mỗi tầng.
+
+- ``comment_page``: một trang bình luận gốc (keyset, mới nhất trước) kèm tối
+  đa REPLIES_PER_THREAD trả lời đầu tiên (depth <= MAX_DEPTH) của mỗi thread,
+  trong MỘT truy vấn (CTE + LATERAL), ráp thành cây trong O(n).
+- ``thread_page``: các trang tiếp theo của một thread dài (keyset theo thời
+  gian), cũng một truy vấn.
+
+``reply_count`` (trả lời trực tiếp đang hiển thị) được cộng/trừ theo từng
+bình luận; ``like_count`` đi qua bộ đếm đệm Redis (apps.core.counters).
+Không hỗ trợ chuyển một trả lời sang bình luận cha khác.
+"""
+from django.db.models import F
+
+from apps.prompthub.models import Comment, CommentLike
+from apps.users.models import User
+
+from . import counters
+from .pagination import KeysetPaginator, decode_cursor, encode_cursor
+
+PAGE_SIZE = 20
+REPLIES_PER_THREAD = 3
+MAX_DEPTH = 4
+VISIBLE = 1
+
+PAGE_SQL = """
+    WITH roots AS (
+        SELECT * FROM comments
+        WHERE id_prompt = %(prompt)s AND parent_comment_id IS NULL AND status = {visible} {seek}
+        ORDER BY created_at DESC, id_comment DESC
+        LIMIT %(limit)s
+    ), page AS (
+        SELECT * FROM roots
+        UNION ALL
+        SELECT reply.* FROM roots CROSS JOIN LATERAL (
+            SELECT * FROM comments c
+            WHERE c.thread_root_id = roots.id_comment AND c.status = {visible} AND c.depth <= %(depth)s
+            ORDER BY c.created_at, c.id_comment
+            LIMIT %(replies)s
+        ) reply
+    )
+    SELECT page.*, u.username FROM page JOIN {users} u ON u.id = page.id_user
+    ORDER BY page.created_at, page.id_comment
+"""
+# (created_at, id) < (...) dùng được index comments_roots_idx
+SEEK_SQL = 'AND (created_at, id_comment) < (%(created_at)s::timestamptz, %(id)s)'
+
+
+class CommentPage:
+    """Root comments of one page, each with ``children``, ``has_more_replies`` and ``more_replies_cursor``."""
+
+    def __init__(self, comments, next_cursor=None):
+        self.comments = comments
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.comments)
+
+    def __len__(self):
+        return len(self.comments)
+
+
+def _cursor(comment):
+    return encode_cursor([comment.created_at.isoformat(), comment.pk])
+
+
+def assemble(comments):
+    """
+    Link comments in chronological order into trees.
+
+    Returns:
+        list: comments whose parent is not in ``comments`` (tops of the forest)
+    """
+    nodes = {}
+    tops = []
+    for comment in comments:
+        comment.children = []
+        nodes[comment.pk] = comment
+        parent = nodes.get(comment.parent_comment_id)
+        if parent is None:
+            tops.append(comment)
+        else:
+            parent.children.append(comment)
+    return tops
+
+
+def comment_page(prompt_id, cursor=None, page_size=PAGE_SIZE, replies=REPLIES_PER_THREAD, max_depth=MAX_DEPTH):
+    """Newest root comments of a prompt with the first replies of each thread, in one query."""
+    values, _ = decode_cursor(cursor)
+    params = {
+        'prompt': prompt_id, 'limit': page_size + 1, 'depth': max_depth, 'replies': replies + 1,
+    }
+    seek = ''
+    if values is not None and len(values) == 2:
+        params['created_at'], params['id'] = values
+        seek = SEEK_SQL
+    sql = PAGE_SQL.format(visible=VISIBLE, seek=seek, users=User._meta.db_table)
+    rows = list(Comment.objects.raw(sql, params))
+
+    roots = [comment for comment in rows if comment.parent_comment_id is None][::-1]
+    has_next = len(roots) > page_size
+    roots = roots[:page_size]
+    threads = {}
+    for comment in rows:
+        if comment.parent_comment_id is not None:
+            threads.setdefault(comment.thread_root_id, []).append(comment)
+
+    page = list(roots)
+    for root in roots:
+        # Lấy dư một trả lời mỗi thread để biết còn nữa hay không
+        thread = threads.get(root.pk, [])
+        shown = thread[:replies]
+        page.extend(shown)
+        root.has_more_replies = len(thread) > replies
+        root.more_replies_cursor = _cursor(shown[-1]) if shown and root.has_more_replies else None
+    assemble(page)
+    return CommentPage(roots, _cursor(roots[-1]) if has_next else None)
+
+
+def thread_page(root_id, cursor=None, page_size=50, max_depth=MAX_DEPTH):
+    """
+    Replies of one thread after ``cursor`` (``more_replies_cursor`` of the root), in one query.
+
+    Trả lời có cha nằm ở trang trước đứng ở đầu danh sách (``parent_comment_id``
+    cho biết gắn vào đâu).
+    """
+    queryset = Comment.objects.filter(
+        thread_root_id=root_id, status=VISIBLE, depth__lte=max_depth
+    ).select_related('user')
+    page = KeysetPaginator(queryset, page_size, ordering=('created_at', 'id_comment')).get_page(cursor)
+    return CommentPage(assemble(page.object_list), page.next_cursor)
+
+
+# =============================================
+# Maintenance (gọi từ apps.core.signals) và lượt thích
+# =============================================
+
+def place_reply(comment):
+    """Set ``thread_root``/``depth`` of a new reply from its parent."""
+    if comment.parent_comment_id is None:
+        comment.thread_root_id, comment.depth = None, 0
+        return
+    prompt_id, root_id, depth = Comment.objects.filter(pk=comment.parent_comment_id).values_list(
+        'prompt_id', 'thread_root_id', 'depth'
+    ).get()
+    if prompt_id != comment.prompt_id:
+        raise ValueError('A reply must belong to the same prompt as its parent')
+    comment.thread_root_id = root_id or comment.parent_comment_id
+    comment.depth = depth + 1
+
+
+def add_replies(comment_id, delta):
+    Comment.objects.filter(pk=comment_id).update(reply_count=F('reply_count') + delta)
+
+
+def like_comment(user, comment_id):
+    """
+    Like a comment once per user.
+
+    Returns:
+        bool: True if this call added the like
+    """
+    _, created = CommentLike.objects.get_or_create(comment_id=comment_id, user=user)
+    if created:
+        counters.increment(Comment, comment_id, 'like_count')
+    return created
+
+
+def unlike_comment(user, comment_id):
+    """Remove a like. Returns True if there was one."""
+    deleted, _ = CommentLike.objects.filter(comment_id=comment_id, user=user).delete()
+    if deleted:
+        counters.increment(Comment, comment_id, 'like_count', -1)
+    return bool(deleted)
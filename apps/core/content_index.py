@@ -0,0 +1,239 @@
+"""
+Content-similarity index over prompthub prompt text ("similar prompts").
+
+Offline: lệnh ``build_content_index`` đọc title, short_description và
+PromptContent (prompt_text, usage_guide, example_input) của các prompt đã
+xuất bản, tính vector TF-IDF (tf dạng log, bỏ từ quá hiếm/quá phổ biến),
+giữ ``TERMS_PER_PROMPT`` từ nặng nhất của mỗi prompt rồi chuẩn hóa L2.
+
+Chỉ mục ngược chỉ giữ ``POSTINGS_PER_TERM`` prompt có trọng số cao nhất cho
+mỗi từ (champion list), nên một truy vấn cộng tối đa
+TERMS_PER_PROMPT x POSTINGS_PER_TERM phần tử bất kể kích thước corpus.
+
+Mọi mảng nằm trong một file nhị phân (SIMILARITY_INDEX_PATH) được đọc bằng
+``np.memmap``: các worker gunicorn dùng chung page cache của hệ điều hành,
+không ai copy dữ liệu. File được ghi ra file tạm rồi ``os.replace``, worker
+tự mở lại khi file đổi. Index là file cục bộ - chạy lệnh trên từng máy web.
+"""
+import json
+import math
+import os
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+MAGIC = b'PHCIDX01'
+ALIGNMENT = 64
+
+# Tiêu đề được đếm hai lần
+TITLE_WEIGHT = 2
+TERMS_PER_PROMPT = 32
+POSTINGS_PER_TERM = 2000
+# Bỏ từ xuất hiện trong hơn tỉ lệ này của corpus (gần như stop word)
+MAX_DOCUMENT_FREQUENCY = 0.2
+
+_TOKEN_RE = re.compile(r'\w{2,}')
+
+_loaded = {}
+
+
+def tokenize(text):
+    """Lowercase word tokens of at least two characters (Unicode aware)."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def prompt_documents():
+    """Yield (id_prompt, text) for every published prompt."""
+    from apps.prompthub.models import Prompt
+
+    rows = Prompt.objects.filter(status=3, active=True).order_by('pk').values_list(
+        'pk', 'title', 'short_description',
+        'content__prompt_text', 'content__usage_guide', 'content__example_input',
+    )
+    for pk, title, *texts in rows.iterator(chunk_size=5000):
+        yield pk, ' '.join(filter(None, [title] * TITLE_WEIGHT + texts))
+
+
+def _top_per_group(groups, weights, limit):
+    """Boolean mask keeping the ``limit`` heaviest entries of each group."""
+    order = np.lexsort((-weights, groups))
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    lengths = np.diff(np.r_[starts, len(order)])
+    rank = np.arange(len(order)) - np.repeat(starts, lengths)
+    keep = np.zeros(len(order), dtype=bool)
+    keep[order[rank < limit]] = True
+    return keep
+
+
+def build_index(documents, path=None):
+    """
+    Build the index from (id_prompt, text) pairs and write it to ``path``.
+
+    Returns:
+        dict: Index statistics (prompts, terms, postings)
+    """
+    path = path or settings.SIMILARITY_INDEX_PATH
+    vocabulary = {}
+    ids = []
+    rows, cols, counts = array('i'), array('i'), array('f')
+    for prompt_id, text in documents:
+        row = len(ids)
+        ids.append(prompt_id.encode())
+        for term, count in Counter(tokenize(text)).items():
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+
+    n = len(ids)
+    ids = np.array(ids, dtype=f'S{max((len(pk) for pk in ids), default=1)}')
+    # Sắp id theo byte (không theo collation của DB) để tra bằng searchsorted
+    order = np.argsort(ids, kind='stable')
+    ids = ids[order]
+    position = np.empty(n, dtype=np.int32)
+    position[order] = np.arange(n, dtype=np.int32)
+    rows = position[np.frombuffer(rows, dtype=np.int32)]
+    cols = np.frombuffer(cols, dtype=np.int32)
+    counts = np.frombuffer(counts, dtype=np.float32)
+
+    # Từ chỉ ở một prompt không nối được hai prompt nào
+    df = np.bincount(cols, minlength=len(vocabulary))
+    useful = (df >= 2) & (df <= max(2, MAX_DOCUMENT_FREQUENCY * n))
+    keep = useful[cols]
+    rows, cols, counts = rows[keep], cols[keep], counts[keep]
+    idf = np.log((1 + n) / (1 + df)).astype(np.float32) + 1
+    weights = (1 + np.log(counts)) * idf[cols]
+
+    keep = _top_per_group(rows, weights, TERMS_PER_PROMPT)
+    rows, cols, weights = rows[keep], cols[keep], weights[keep]
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n))
+    weights = (weights / norms[rows]).astype(np.float32)
+
+    # Đánh số lại các từ còn dùng cho gọn
+    used, cols = np.unique(cols, return_inverse=True)
+    prompts = sparse.csr_matrix((weights, (rows, cols)), shape=(n, len(used)))
+    prompts.sort_indices()
+
+    keep = _top_per_group(cols, weights, POSTINGS_PER_TERM)
+    postings = sparse.csc_matrix((weights[keep], (rows[keep], cols[keep])), shape=(n, len(used)))
+    postings.sort_indices()
+
+    _write(path, {
+        'ids': ids,
+        'prompt_indptr': prompts.indptr.astype(np.int64),
+        'prompt_terms': prompts.indices.astype(np.int32),
+        'prompt_weights': prompts.data.astype(np.float32),
+        'term_indptr': postings.indptr.astype(np.int64),
+        'term_prompts': postings.indices.astype(np.int32),
+        'term_weights': postings.data.astype(np.float32),
+    })
+    return {'prompts': n, 'terms': len(used), 'postings': int(postings.nnz)}
+
+
+def _write(path, arrays):
+    """Write ``arrays`` as one aligned, memory-mappable file (atomic replace)."""
+    layout, offset = {}, 0
+    for name, data in arrays.items():
+        layout[name] = {'dtype': data.dtype.str, 'shape': data.shape, 'offset': offset}
+        offset += math.ceil(data.nbytes / ALIGNMENT) * ALIGNMENT
+    header = json.dumps(layout).encode()
+    data_start = math.ceil((len(MAGIC) + 8 + len(header)) / ALIGNMENT) * ALIGNMENT
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + len(header).to_bytes(8, 'little') + header)
+        for name, data in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(data).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+class ContentIndex:
+    """Read-only view over an index file; arrays are slices of one memmap."""
+
+    def __init__(self, path):
+        raw = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(raw[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f'{path} is not a content index file')
+        header_length = int.from_bytes(bytes(raw[len(MAGIC):len(MAGIC) + 8]), 'little')
+        header_end = len(MAGIC) + 8 + header_length
+        layout = json.loads(bytes(raw[len(MAGIC) + 8:header_end]))
+        data_start = math.ceil(header_end / ALIGNMENT) * ALIGNMENT
+        for name, spec in layout.items():
+            setattr(self, name, np.ndarray(
+                tuple(spec['shape']), dtype=np.dtype(spec['dtype']),
+                buffer=raw, offset=data_start + spec['offset'],
+            ))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, prompt_id):
+        """Row number of ``prompt_id`` (ids are sorted), or None."""
+        key = np.array(prompt_id.encode(), dtype=self.ids.dtype)
+        row = int(np.searchsorted(self.ids, key))
+        if row < len(self.ids) and self.ids[row] == key:
+            return row
+        return None
+
+    def similar(self, prompt_id, k=10):
+        """Top ``k`` (id_prompt, cosine score) most similar to ``prompt_id``."""
+        row = self.row(prompt_id)
+        if row is None:
+            return []
+        begin, end = self.prompt_indptr[row], self.prompt_indptr[row + 1]
+        terms = self.prompt_terms[begin:end]
+        if not len(terms):
+            return []
+
+        starts, ends = self.term_indptr[terms], self.term_indptr[terms + 1]
+        lengths = ends - starts
+        # Chỉ số của mọi posting thuộc các từ của prompt, không vòng lặp Python
+        positions = np.repeat(ends - lengths.cumsum(), lengths) + np.arange(lengths.sum())
+        candidates = self.term_prompts[positions]
+        contributions = self.term_weights[positions] * np.repeat(self.prompt_weights[begin:end], lengths)
+
+        candidates, inverse = np.unique(candidates, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions)
+        scores[candidates == row] = 0
+        if len(scores) > k:
+            best = np.argpartition(-scores, k)[:k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.lexsort((candidates[best], -scores[best]))]
+        return [
+            (self.ids[candidates[i]].decode(), round(float(scores[i]), 6))
+            for i in best if scores[i] > 0
+        ]
+
+
+def get_index(path=None):
+    """
+    The index at ``path`` (default SIMILARITY_INDEX_PATH), or None if not built.
+
+    Mở lại khi file bị thay bởi một lần build mới.
+    """
+    path = path or settings.SIMILARITY_INDEX_PATH
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    version = (stat.st_ino, stat.st_mtime_ns)
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != version:
+        cached = _loaded[path] = (version, ContentIndex(path))
+    return cached[1]
+
+
+def similar_prompts(prompt_id, k=10):
+    """Ids of the ``k`` prompts whose text is most similar to ``prompt_id``."""
+    index = get_index()
+    if index is None:
+        return []
+    return [pk for pk, _ in index.similar(prompt_id, k)]
@@ -0,0 +1,219 @@
+"""
+Buffered counters (views, downloads, likes, marketplace sales...).
+
+Request path chỉ gọi HINCRBY vào một hash Redis cho mỗi model, không chạm
+tới dòng Prompt nên không có row lock trên prompt "hot". Task
+flush_counters (chạy mỗi COUNTER_FLUSH_INTERVAL giây) gom hash thành một
+câu ``UPDATE ... FROM (VALUES ...)`` cho mỗi bảng.
+
+Drain an toàn khi worker chết giữa chừng:
+1. RENAME hash đang ghi sang key ``:draining`` (nguyên tử; increment mới
+   rơi vào hash mới) và gắn một batch id vào hash đó.
+2. UPDATE và ghi CounterFlush(batch_id) trong cùng một transaction.
+3. DEL key ``:draining``.
+Nếu chết trước bước 2, lần chạy sau xử lý lại hash cũ; nếu chết giữa bước 2
+và 3, batch id đã có trong CounterFlush nên chỉ cần xóa hash.
+"""
+import logging
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .models import CounterFlush
+
+logger = logging.getLogger(__name__)
+
+# model label -> các cột được đệm qua Redis
+COUNTER_FIELDS = {
+    'core.prompt': ('views', 'downloads'),
+    'prompthub.prompt': ('view_count', 'like_count', 'share_count'),
+    'prompthub.comment': ('like_count',),
+    'core.marketplacestats': ('total_sales', 'total_earnings'),
+}
+# Cột tiền được đệm dưới dạng số nguyên đơn vị nhỏ nhất (HINCRBY chỉ cộng số nguyên)
+COUNTER_SCALES = {
+    'core.marketplacestats': {'total_earnings': 100},
+}
+
+KEY_PREFIX = 'counters'
+BATCH_FIELD = '__batch__'
+
+# Gửi sau mỗi batch đã commit: sender=model, totals={field: tổng delta}
+counters_flushed = Signal()
+
+
+def _key(label):
+    return f'{KEY_PREFIX}:{label}'
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def _scale(label, field):
+    return COUNTER_SCALES.get(label, {}).get(field, 1)
+
+
+def increment(model, pk, field, amount=1):
+    """
+    Buffer ``amount`` for ``model.field`` of row ``pk``.
+
+    Falls back to a direct F() update when Redis is unavailable.
+    """
+    label = model._meta.label_lower
+    if field not in COUNTER_FIELDS.get(label, ()):
+        raise ValueError(f'{label}.{field} is not a buffered counter')
+    units = amount * _scale(label, field)
+    if units != int(units):
+        raise ValueError(f'{amount} is finer than {label}.{field} can buffer')
+    try:
+        _redis().hincrby(_key(label), f'{pk}:{field}', int(units))
+    except RedisError:
+        logger.warning('Redis unavailable, writing %s.%s directly', label, field, exc_info=True)
+        model._default_manager.filter(pk=pk).update(**{field: F(field) + amount})
+
+
+def pending(model, pk, field):
+    """Increments buffered in Redis but not yet flushed (0 if none)."""
+    label = model._meta.label_lower
+    value = _redis().hget(_key(label), f'{pk}:{field}')
+    return _unscale(label, field, int(value)) if value else 0
+
+
+def _unscale(label, field, units):
+    scale = _scale(label, field)
+    return units if scale == 1 else Decimal(units) / scale
+
+
+def _apply(model, deltas):
+    """
+    Apply {pk: {field: delta}} with one UPDATE ... FROM (VALUES ...) per chunk.
+
+    Dòng được sắp theo pk để các worker khóa theo cùng thứ tự (tránh deadlock).
+    """
+    label = model._meta.label_lower
+    fields = COUNTER_FIELDS[label]
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk_column = connection.ops.quote_name(model._meta.pk.column)
+    columns = [connection.ops.quote_name(model._meta.get_field(field).column) for field in fields]
+    scales = [_scale(label, field) for field in fields]
+    assignments = ', '.join(
+        f'{column} = t.{column} + v.d{i}' if scale == 1 else f'{column} = t.{column} + v.d{i}::numeric / {scale}'
+        for i, (column, scale) in enumerate(zip(columns, scales))
+    )
+    aliases = ', '.join(f'd{i}' for i in range(len(columns)))
+    batch_size = settings.COUNTER_FLUSH_BATCH_SIZE
+
+    rows = sorted(deltas.items())
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        placeholders = ', '.join(
+            '(' + ', '.join(['%s'] * (len(fields) + 1)) + ')' for _ in chunk
+        )
+        params = []
+        for pk, values in chunk:
+            params.append(pk)
+            params.extend(values.get(field, 0) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} AS t SET {assignments} '
+                f'FROM (VALUES {placeholders}) AS v(id, {aliases}) '
+                f'WHERE t.{pk_column} = v.id',
+                params
+            )
+
+
+def _drain(label):
+    """Flush one model's hash. Returns the number of rows updated."""
+    model = apps.get_model(label)
+    redis = _redis()
+    live, draining = _key(label), f'{_key(label)}:draining'
+
+    # Hash :draining còn lại nghĩa là lần trước chưa xong - xử lý nó trước
+    if not redis.exists(draining):
+        if not redis.exists(live):
+            return 0
+        redis.rename(live, draining)
+    redis.hsetnx(draining, BATCH_FIELD, uuid.uuid4().hex)
+    data = redis.hgetall(draining)
+    batch_id = data.pop(BATCH_FIELD.encode()).decode()
+
+    deltas = defaultdict(dict)
+    totals = defaultdict(int)
+    for key, value in data.items():
+        pk, field = key.decode().rsplit(':', 1)
+        amount = int(value)
+        if amount:
+            deltas[model._meta.pk.to_python(pk)][field] = amount
+            totals[field] += amount
+
+    try:
+        with transaction.atomic():
+            CounterFlush.objects.create(batch_id=batch_id, model_label=label, rows=len(deltas))
+            _apply(model, deltas)
+            counters_flushed.send(
+                sender=model, totals={field: _unscale(label, field, total) for field, total in totals.items()}
+            )
+    except IntegrityError:
+        logger.info('Counter batch %s already applied, discarding', batch_id)
+        redis.delete(draining)
+        return 0
+
+    redis.delete(draining)
+    return len(deltas)
+
+
+def _lock():
+    return _redis().lock(f'{KEY_PREFIX}:lock', timeout=settings.COUNTER_FLUSH_LOCK_TIMEOUT)
+
+
+@contextmanager
+def flushed(model):
+    """
+    Flush ``model``'s counters, then hold the flush lock for the block.
+
+    Dùng khi ghi lại giá trị tuyệt đối tính từ bảng gốc (reconcile): trong
+    block không có flush nào chạy, increment đến sau lần flush này nằm trong
+    ``pending()`` và sẽ được cộng ở lần flush kế tiếp.
+
+    Yields:
+        bool: False if Redis is unavailable (increments then went straight to the database)
+    """
+    try:
+        lock = _lock()
+        if not lock.acquire(blocking_timeout=settings.COUNTER_FLUSH_LOCK_TIMEOUT):
+            raise RuntimeError('Timed out waiting for the counter flush lock')
+    except RedisError:
+        logger.warning('Redis unavailable, not flushing %s', model._meta.label_lower, exc_info=True)
+        yield False
+        return
+    try:
+        _drain(model._meta.label_lower)
+        yield True
+    finally:
+        lock.release()
+
+
+def flush_counters():
+    """
+    Flush every buffered model to the database.
+
+    Returns:
+        dict: {model label: rows updated}
+    """
+    lock = _lock()
+    if not lock.acquire(blocking=False):
+        return {}
+    try:
+        return {label: _drain(label) for label in COUNTER_FIELDS}
+    finally:
+        lock.release()
@@ -0,0 +1,130 @@
+"""
+Streaming exports of purchases, marketplace prompts and PromptHub interactions.
+
+Dòng được đọc bằng ``values_list(...).iterator(chunk_size=CHUNK_SIZE)``
+(server-side cursor trên PostgreSQL), mã hóa thành CSV hoặc JSONL và nén
+gzip theo từng khối ~``FLUSH_BYTES``, nên bộ nhớ dùng không phụ thuộc số
+dòng. Cùng một generator phục vụ tải trực tiếp (StreamingHttpResponse ở
+dashboard) và file do task ``generate_report`` ghi vào EXPORT_ROOT - nên
+dùng task cho các export rất lớn để không giữ worker web quá timeout.
+"""
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from apps.prompthub.models import UserPromptInteraction
+
+from .models import Prompt, Purchase
+
+CHUNK_SIZE = 5000
+FLUSH_BYTES = 1 << 16
+
+# name -> (model, field lọc theo ngày, cột)
+DATASETS = {
+    'purchases': (Purchase, 'created_at', [
+        'id', 'created_at', 'transaction_id', 'user_id', 'user__username', 'prompt_id', 'prompt__title',
+        'prompt__category__name', 'prompt__author_id', 'price_paid', 'country',
+    ]),
+    'prompts': (Prompt, 'created_at', [
+        'id', 'title', 'slug', 'category__name', 'author_id', 'author__username', 'price', 'status', 'tags',
+        'views', 'downloads', 'rating', 'rating_count', 'featured', 'created_at', 'updated_at',
+    ]),
+    'interactions': (UserPromptInteraction, 'last_viewed_at', [
+        'id', 'user_id', 'prompt_id', 'is_liked', 'is_saved', 'rating', 'view_count', 'last_viewed_at',
+        'liked_at', 'saved_at', 'rated_at',
+    ]),
+}
+# format -> (phần mở rộng, content type)
+FORMATS = {
+    'csv': ('csv.gz', 'application/gzip'),
+    'jsonl': ('jsonl.gz', 'application/gzip'),
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_rows(dataset, since=None, until=None):
+    """
+    Columns and row iterator of a dataset, optionally limited to [since, until] (dates).
+
+    Returns:
+        tuple: (column names, iterator of tuples ordered by primary key)
+    """
+    model, date_field, fields = DATASETS[dataset]
+    queryset = model.objects.order_by('pk')
+    # Khoảng theo mốc thời gian (không ép kiểu ::date) để dùng được index
+    if since:
+        queryset = queryset.filter(**{f'{date_field}__gte': _day_start(since)})
+    if until:
+        queryset = queryset.filter(**{f'{date_field}__lt': _day_start(until + timedelta(days=1))})
+    columns = [field.replace('__', '_') for field in fields]
+    return columns, queryset.values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _encode(columns, rows, file_format):
+    """Yield encoded text in blocks of about FLUSH_BYTES."""
+    buffer = io.StringIO()
+    if file_format == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        write = writer.writerow
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+        def write(row):
+            buffer.write(encoder.encode(dict(zip(columns, row))))
+            buffer.write('\n')
+
+    for row in rows:
+        write(row)
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_chunks(dataset, file_format='csv', since=None, until=None):
+    """Yield the gzip-compressed export as byte chunks."""
+    if dataset not in DATASETS:
+        raise ValueError(f'Unknown dataset: {dataset}')
+    if file_format not in FORMATS:
+        raise ValueError(f'Unknown format: {file_format}')
+    columns, rows = export_rows(dataset, since, until)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # định dạng gzip
+    for text in _encode(columns, rows, file_format):
+        data = compressor.compress(text.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_filename(dataset, file_format, since=None, until=None):
+    period = '-'.join(day.isoformat() for day in (since, until) if day)
+    return f"{dataset}{'-' + period if period else ''}.{FORMATS[file_format][0]}"
+
+
+def write_export(dataset, file_format='csv', since=None, until=None):
+    """
+    Write an export file under EXPORT_ROOT (temporary file + rename).
+
+    Returns:
+        str: Path of the written file
+    """
+    os.makedirs(settings.EXPORT_ROOT, exist_ok=True)
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    path = os.path.join(settings.EXPORT_ROOT, f'{stamp}-{export_filename(dataset, file_format, since, until)}')
+    with open(f'{path}.tmp', 'wb') as output:
+        for chunk in export_chunks(dataset, file_format, since, until):
+            output.write(chunk)
+    os.replace(f'{path}.tmp', path)
+    return path
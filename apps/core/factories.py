@@ -0,0 +1,90 @@
+"""
+Test data factories for the marketplace models.
+
+Các hàm tạo dữ liệu tối thiểu hợp lệ qua ORM (signals vẫn chạy, nên
+UserActivity, SalesRollup, tag... giống dữ liệu thật). Mọi field có thể
+ghi đè bằng keyword argument; giá trị unique lấy từ một bộ đếm chung.
+"""
+from itertools import count
+
+from django.contrib.auth import get_user_model
+
+from .models import Category, Prompt, Purchase, Review
+
+User = get_user_model()
+
+_sequence = count(1)
+
+
+def create_user(**kwargs):
+    """Create a user with a unique username and email."""
+    n = next(_sequence)
+    kwargs.setdefault('username', f'user{n}')
+    kwargs.setdefault('email', f"{kwargs['username']}@example.com")
+    kwargs.setdefault('password', 'testpass123')
+    return User.objects.create_user(**kwargs)
+
+
+def create_category(**kwargs):
+    """Create a category with a unique name."""
+    kwargs.setdefault('name', f'Category {next(_sequence)}')
+    return Category.objects.create(**kwargs)
+
+
+def create_prompt(**kwargs):
+    """Create a published prompt (new author/category unless given)."""
+    n = next(_sequence)
+    defaults = {
+        'title': f'Prompt {n}',
+        'description': f'Description of prompt {n}',
+        'content': f'Write something useful about topic {n}',
+        'tags': f'tag{n % 5}, writing',
+        'price': 10,
+        'status': 'published',
+        'thumbnail': 'prompts/thumbnails/test.png',
+    }
+    defaults.update(kwargs)
+    if 'category' not in defaults:
+        defaults['category'] = create_category()
+    if 'author' not in defaults:
+        defaults['author'] = create_user()
+    return Prompt.objects.create(**defaults)
+
+
+def create_purchase(**kwargs):
+    """Create a purchase (new buyer/prompt unless given)."""
+    if 'prompt' not in kwargs:
+        kwargs['prompt'] = create_prompt()
+    if 'user' not in kwargs:
+        kwargs['user'] = create_user()
+    kwargs.setdefault('price_paid', kwargs['prompt'].price)
+    kwargs.setdefault('transaction_id', f'TX{next(_sequence):08d}')
+    kwargs.setdefault('country', 'VN')
+    return Purchase.objects.create(**kwargs)
+
+
+def create_review(**kwargs):
+    """Create a review (new reviewer/prompt unless given)."""
+    if 'prompt' not in kwargs:
+        kwargs['prompt'] = create_prompt()
+    if 'user' not in kwargs:
+        kwargs['user'] = create_user()
+    kwargs.setdefault('rating', 4)
+    kwargs.setdefault('comment', 'Useful prompt')
+    return Review.objects.create(**kwargs)
+
+
+def seed_marketplace(n):
+    """
+    Add ``n`` prompts, each with its own author, category, purchase and review.
+
+    Mỗi dòng có đủ các quan hệ mà template duyệt qua (category, author,
+    tag, người mua, người review) để phát hiện truy vấn N+1.
+    """
+    prompts = []
+    for i in range(n):
+        prompt = create_prompt(featured=i % 2 == 0)
+        create_purchase(prompt=prompt)
+        create_review(prompt=prompt)
+        prompts.append(prompt)
+    return prompts
@@ -0,0 +1,166 @@
+"""
+Offline IP -> country lookup.
+
+Bảng dải IP được đọc một lần từ file CSV (GEOIP_COUNTRY_CSV) vào hai list
+song song: ``_starts`` (IP đầu dải, tăng dần) và ``_codes`` (mã quốc gia).
+Các khoảng trống giữa các dải được lấp bằng mã rỗng, nên một lần
+``bisect_right`` là đủ - không cần so sánh IP cuối dải. Tra cứu chỉ đọc
+các object có sẵn trong list (mã quốc gia được intern), không cấp phát
+và không gọi dịch vụ mạng nào.
+
+Định dạng CSV (tương thích các bản "IP to country lite" miễn phí), mỗi dòng:
+    ip_start,ip_end,country_code
+trong đó ip có thể viết dạng chấm (1.0.0.0) hoặc số nguyên. Chỉ hỗ trợ IPv4.
+File không đi kèm repo; GEOIP_COUNTRY_CSV để trống thì mọi quốc gia là ''.
+
+Hiện chưa có luồng tạo Purchase nào nhận request (đơn đến từ admin/import),
+nên ``country_for_request`` là điểm vào cho luồng checkout khi có.
+"""
+import csv
+import logging
+import socket
+import sys
+from bisect import bisect_right
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Tên hiển thị cho các thị trường chính, các nước khác hiển thị mã ISO
+COUNTRY_NAMES = {
+    'AU': 'Australia', 'BR': 'Brazil', 'CA': 'Canada', 'CN': 'China', 'DE': 'Germany',
+    'ES': 'Spain', 'FR': 'France', 'GB': 'United Kingdom', 'ID': 'Indonesia', 'IE': 'Ireland',
+    'IN': 'India', 'IT': 'Italy', 'JP': 'Japan', 'KR': 'South Korea', 'MX': 'Mexico',
+    'MY': 'Malaysia', 'NL': 'Netherlands', 'PH': 'Philippines', 'SG': 'Singapore',
+    'TH': 'Thailand', 'US': 'United States', 'VN': 'Vietnam',
+}
+
+_table = None
+
+
+def ip_to_int(ip):
+    """Convert a dotted IPv4 address to an int (None if not IPv4)."""
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def _parse_ip(value):
+    value = value.strip()
+    return int(value) if value.isdigit() else ip_to_int(value)
+
+
+class CountryTable:
+    """Sorted IPv4 ranges with a single-bisect lookup."""
+
+    def __init__(self, ranges):
+        """
+        Args:
+            ranges: Iterable of (start_int, end_int, country_code)
+        """
+        # _starts[-1] luôn là điểm bắt đầu của khoảng trống sau dải cuối cùng
+        self._starts = [0]
+        self._codes = ['']
+        for start, end, code in sorted(ranges):
+            if start < self._starts[-1]:
+                continue  # dải chồng lấn: giữ dải đầu tiên
+            code = sys.intern(code.upper())
+            if start == self._starts[-1]:
+                self._codes[-1] = code  # dải liền kề, không có khoảng trống
+            else:
+                self._starts.append(start)
+                self._codes.append(code)
+            self._starts.append(end + 1)
+            self._codes.append('')
+
+    def __len__(self):
+        return len(self._starts)
+
+    def lookup(self, ip_int):
+        """Country code of an IPv4 address as int ('' if unknown)."""
+        return self._codes[bisect_right(self._starts, ip_int) - 1]
+
+    @classmethod
+    def from_csv(cls, path):
+        """Load ranges from a ``ip_start,ip_end,country_code`` CSV file."""
+        ranges = []
+        with open(path, newline='', encoding='utf-8') as handle:
+            for row in csv.reader(handle):
+                if len(row) < 3:
+                    continue
+                start, end = _parse_ip(row[0]), _parse_ip(row[1])
+                code = row[2].strip()
+                if start is None or end is None or len(code) != 2:
+                    continue  # header, IPv6 hoặc dòng lỗi
+                ranges.append((start, end, code))
+        return cls(ranges)
+
+
+def get_table():
+    """Lazily load the country table (empty if GEOIP_COUNTRY_CSV is unset or unreadable)."""
+    global _table
+    if _table is None:
+        path = getattr(settings, 'GEOIP_COUNTRY_CSV', '')
+        if not path:
+            logger.info('GEOIP_COUNTRY_CSV is not set, purchase countries will be empty')
+            _table = CountryTable([])
+            return _table
+        try:
+            _table = CountryTable.from_csv(path)
+        except OSError as exc:
+            logger.error('GEOIP_COUNTRY_CSV=%s cannot be read (%s), purchase countries will be empty', path, exc)
+            _table = CountryTable([])
+    return _table
+
+
+def lookup_country(ip):
+    """Country code for a dotted IPv4 address ('' if unknown)."""
+    ip_int = ip_to_int(ip)
+    return '' if ip_int is None else get_table().lookup(ip_int)
+
+
+def client_ip(request):
+    """
+    Client address as seen by the first trusted proxy.
+
+    Các hop bên trái X-Forwarded-For do client tự gửi nên không tin được; với
+    GEOIP_TRUSTED_PROXIES = n, địa chỉ client là hop thứ n tính từ bên phải
+    (do proxy ngoài cùng thêm vào). n = 0 dùng REMOTE_ADDR.
+    """
+    proxies = getattr(settings, 'GEOIP_TRUSTED_PROXIES', 0)
+    if proxies > 0:
+        hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def country_for_request(request):
+    """Country code of the client making ``request``, for ``Purchase.country`` at checkout."""
+    return lookup_country(client_ip(request))
+
+
+def country_scope_id(code):
+    """Pack a country code into a SalesRollup scope_id (0 = unknown)."""
+    if len(code or '') != 2:
+        return 0
+    return (ord(code[0]) << 8) | ord(code[1])
+
+
+def scope_id_country(scope_id):
+    """Inverse of country_scope_id."""
+    if not scope_id:
+        return ''
+    return chr(scope_id >> 8) + chr(scope_id & 0xFF)
+
+
+def country_name(code):
+    return COUNTRY_NAMES.get(code, code or 'Unknown')
+
+
+def country_flag(code):
+    """Flag emoji from the regional indicator symbols of a country code."""
+    if len(code or '') != 2:
+        return ''
+    return ''.join(chr(0x1F1E6 + ord(char) - ord('A')) for char in code.upper())
@@ -0,0 +1,215 @@
+"""
+Transactional email outbox.
+
+``enqueue`` chỉ ghi một dòng OutboxEmail (khóa idempotency duy nhất) và,
+sau khi transaction commit, gọi task ``send_outbox``. Worker nhận các email
+đến hạn theo batch bằng một transaction ngắn (``SELECT ... FOR UPDATE SKIP
+LOCKED`` rồi đặt lease qua ``next_attempt_at``, nên nhiều worker chạy song
+song không gửi trùng), sau đó mới mở một kết nối backend cho cả batch và gửi
+từng email qua ``send_messages``; kết quả mỗi email được ghi bằng một UPDATE
+riêng.
+
+Email lỗi được thử lại sau EMAIL_OUTBOX_RETRY_DELAY x 2^(lần thử - 1) giây
+(tối đa EMAIL_OUTBOX_RETRY_MAX_DELAY), quá EMAIL_OUTBOX_MAX_ATTEMPTS lần thì
+chuyển sang 'failed'. Tốc độ gửi bị giới hạn EMAIL_OUTBOX_RATE email/giây
+cho mọi worker bằng một bộ đếm Redis theo giây. Số email đã gửi/thử lại/lỗi
+được cộng vào một hash Redis và xuất ở ``/metrics``.
+"""
+import logging
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = 'mail:outbox:stats'
+RATE_KEY_PREFIX = 'mail:outbox:rate'
+
+
+def enqueue(key, subject, body, recipients, from_email=None, html_body=''):
+    """
+    Queue an email unless one was already queued with ``key``.
+
+    Returns:
+        bool: True if the email was queued by this call
+    """
+    _, created = OutboxEmail.objects.get_or_create(
+        idempotency_key=key,
+        defaults={
+            'subject': subject,
+            'body': body,
+            'html_body': html_body,
+            'recipients': list(recipients),
+            'from_email': from_email or settings.DEFAULT_FROM_EMAIL,
+        },
+    )
+    if created:
+        from .tasks import send_outbox
+        transaction.on_commit(send_outbox.delay)
+    return created
+
+
+def _message(outbox, connection):
+    message = EmailMultiAlternatives(
+        outbox.subject, outbox.body, outbox.from_email, outbox.recipients, connection=connection,
+        headers={'X-Idempotency-Key': outbox.idempotency_key},
+    )
+    if outbox.html_body:
+        message.attach_alternative(outbox.html_body, 'text/html')
+    return message
+
+
+def _throttle(rate):
+    """Block until sending one more email keeps every worker under ``rate`` per second."""
+    if not rate:
+        return
+    try:
+        redis = get_redis_connection('default')
+        while True:
+            now = time.time()
+            key = f'{RATE_KEY_PREFIX}:{int(now)}'
+            pipe = redis.pipeline()
+            pipe.incr(key)
+            pipe.expire(key, 2)
+            if pipe.execute()[0] <= rate:
+                return
+            time.sleep(int(now) + 1 - now)
+    except RedisError:
+        # Không có Redis: chỉ giới hạn trong process này
+        time.sleep(1 / rate)
+
+
+def _failed(outbox, error, now):
+    attempts = outbox.attempts + 1
+    fields = {'attempts': attempts, 'last_error': f'{type(error).__name__}: {error}'[:2000]}
+    if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        fields['status'] = 'failed'
+        result = 'failed'
+    else:
+        delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+        fields['next_attempt_at'] = now + timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_RETRY_MAX_DELAY))
+        result = 'retried'
+    OutboxEmail.objects.filter(pk=outbox.pk).update(**fields)
+    return result
+
+
+def _sent(outbox):
+    OutboxEmail.objects.filter(pk=outbox.pk).update(
+        status='sent', attempts=outbox.attempts + 1, sent_at=timezone.now(), last_error=''
+    )
+
+
+def _claim(batch_size):
+    """
+    Lease up to ``batch_size`` due emails to this worker.
+
+    Transaction chỉ bao lần SELECT ... FOR UPDATE SKIP LOCKED và việc đẩy
+    ``next_attempt_at`` ra sau EMAIL_OUTBOX_LEASE giây; worker khác bỏ qua các
+    dòng này cho tới khi lease hết hạn (worker chết giữa chừng thì email được
+    gửi lại, người nhận khử trùng bằng X-Idempotency-Key).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if batch:
+            OutboxEmail.objects.filter(pk__in=[outbox.pk for outbox in batch]).update(
+                next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+            )
+    return batch
+
+
+def _send_batch(batch, stats):
+    """Send one claimed batch over a single backend connection, saving each result as it happens."""
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning('Cannot open email connection: %s', exc)
+        now = timezone.now()
+        for outbox in batch:
+            stats[_failed(outbox, exc, now)] += 1
+        return
+    try:
+        for outbox in batch:
+            _throttle(settings.EMAIL_OUTBOX_RATE)
+            try:
+                connection.send_messages([_message(outbox, connection)])
+            except Exception as exc:
+                logger.warning('Email %s failed: %s', outbox.idempotency_key, exc)
+                stats[_failed(outbox, exc, timezone.now())] += 1
+            else:
+                _sent(outbox)
+                stats['sent'] += 1
+    finally:
+        connection.close()
+
+
+def drain(batch_size=None):
+    """
+    Send every due outbox email, claiming ``batch_size`` at a time.
+
+    SMTP và throttle chạy ngoài transaction: không giữ khóa dòng hay kết nối
+    DB trong transaction trong lúc chờ mạng.
+
+    Returns:
+        dict: sent, retried, failed, seconds
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    stats = Counter()
+    started = time.monotonic()
+    while True:
+        batch = _claim(batch_size)
+        if not batch:
+            break
+        _send_batch(batch, stats)
+    result = {key: stats[key] for key in ('sent', 'retried', 'failed')}
+    result['seconds'] = round(time.monotonic() - started, 3)
+    _record(result)
+    return result
+
+
+def _record(result):
+    try:
+        pipe = get_redis_connection('default').pipeline()
+        for key in ('sent', 'retried', 'failed'):
+            if result[key]:
+                pipe.hincrby(STATS_KEY, key, result[key])
+        pipe.hincrbyfloat(STATS_KEY, 'seconds', result['seconds'])
+        pipe.execute()
+    except RedisError:
+        logger.warning('Could not record outbox stats', exc_info=True)
+
+
+def render_metrics():
+    """Prometheus text for the outbox: delivery counters of all workers and the pending backlog."""
+    try:
+        totals = {
+            key.decode(): value.decode() for key, value in get_redis_connection('default').hgetall(STATS_KEY).items()
+        }
+    except RedisError:
+        totals = {}
+    lines = ['# HELP email_outbox_total Outbox emails processed by result', '# TYPE email_outbox_total counter']
+    for key in ('sent', 'retried', 'failed'):
+        lines.append(f'email_outbox_total{{result="{key}"}} {totals.get(key, 0)}')
+    lines += [
+        '# HELP email_outbox_send_seconds_total Time workers spent draining the outbox',
+        '# TYPE email_outbox_send_seconds_total counter',
+        f"email_outbox_send_seconds_total {float(totals.get('seconds', 0)):.3f}",
+        '# HELP email_outbox_pending Emails waiting to be sent',
+        '# TYPE email_outbox_pending gauge',
+        f"email_outbox_pending {OutboxEmail.objects.filter(status='pending').count()}",
+    ]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,58 @@
+"""
+Django management command to rebuild sales rollups from purchase history.
+Usage: python manage.py backfill_sales_rollups [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.core.models import Purchase
+from apps.core.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    """Django command to backfill SalesRollup month by month."""
+
+    help = 'Rebuild daily/monthly sales rollups from the Purchase table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Ngày bắt đầu (YYYY-MM-DD), mặc định là ngày của đơn hàng đầu tiên',
+        )
+        parser.add_argument(
+            '--until',
+            help='Ngày kết thúc (YYYY-MM-DD), mặc định là hôm nay',
+        )
+
+    def parse_date(self, value):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'Invalid date: {value}')
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        until = self.parse_date(options['until']) if options['until'] else timezone.localdate()
+        if options['since']:
+            since = self.parse_date(options['since'])
+        else:
+            first = Purchase.objects.order_by('created_at').values_list('created_at', flat=True).first()
+            if first is None:
+                self.stdout.write('No purchases to roll up.')
+                return
+            since = timezone.localdate(first)
+
+        # Mỗi tháng một transaction để không giữ lock quá lâu
+        total = 0
+        start = since
+        while start <= until:
+            next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+            end = min(next_month - timedelta(days=1), until)
+            rows = rebuild_rollups(start, end)
+            total += rows
+            self.stdout.write(f'{start:%Y-%m}: {rows} rows')
+            start = next_month
+
+        self.stdout.write(self.style.SUCCESS(f'Sales rollups rebuilt: {total} rows'))
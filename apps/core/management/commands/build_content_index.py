@@ -0,0 +1,33 @@
+"""
+Django management command to build the content-similarity index.
+Usage: python manage.py build_content_index [--output PATH]
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.content_index import build_index, prompt_documents
+
+
+class Command(BaseCommand):
+    """Django command to rebuild the memory-mapped "similar prompts" index."""
+
+    help = 'Build the TF-IDF index used for "similar prompts" from prompt text'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='File đích, mặc định là SIMILARITY_INDEX_PATH',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        path = options['output'] or settings.SIMILARITY_INDEX_PATH
+        started = time.monotonic()
+        stats = build_index(prompt_documents(), path)
+        self.stdout.write(
+            f"{stats['prompts']} prompts, {stats['terms']} terms, {stats['postings']} postings "
+            f'in {time.monotonic() - started:.1f}s'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Content index written to {path}'))
@@ -0,0 +1,31 @@
+"""
+Django management command to fingerprint existing prompts for duplicate detection.
+Usage: python manage.py fingerprint_prompts
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.duplicates import check_prompt
+from apps.core.models import Prompt
+from apps.prompthub.models import PromptContent
+
+
+class Command(BaseCommand):
+    """Django command to build PromptFingerprint rows for prompts saved before detection existed."""
+
+    help = 'Fingerprint every prompt and queue the near-duplicates found'
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        sources = {
+            'core.prompt': Prompt.objects.order_by('pk').values_list('pk', flat=True),
+            'prompthub.prompt': PromptContent.objects.order_by('pk').values_list('pk', flat=True),
+        }
+        flagged = 0
+        for source, ids in sources.items():
+            count = 0
+            # Prompt đã có fingerprint với nội dung không đổi được bỏ qua ngay
+            for object_id in ids.iterator(chunk_size=2000):
+                flagged += len(check_prompt(source, object_id))
+                count += 1
+            self.stdout.write(f'{source}: {count} prompts')
+        self.stdout.write(self.style.SUCCESS(f'Prompts fingerprinted, {flagged} possible duplicates queued'))
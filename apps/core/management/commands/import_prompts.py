@@ -0,0 +1,70 @@
+"""
+Django management command to bulk import PromptHub prompts from JSONL/CSV.
+Usage: python manage.py import_prompts FILE [--created-by USERNAME] [--batch-size N] [--restart]
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.bulk_import import BATCH_SIZE, import_prompts
+
+
+class Command(BaseCommand):
+    """Django command to load prompts, content, categories, tags and AI models with COPY."""
+
+    help = 'Bulk import PromptHub prompts through COPY + INSERT ... ON CONFLICT (resumable)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File .jsonl hoặc .csv')
+        parser.add_argument(
+            '--format',
+            choices=['jsonl', 'csv'],
+            help='Định dạng file, mặc định đoán theo phần mở rộng',
+        )
+        parser.add_argument(
+            '--created-by',
+            help='Username dùng cho các record không có created_by',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Số record mỗi batch (mỗi batch một transaction)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Nạp lại từ đầu, bỏ qua các batch đã ghi nhận',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        created_by = None
+        if options['created_by']:
+            created_by = get_user_model().objects.filter(
+                username=options['created_by']
+            ).values_list('pk', flat=True).first()
+            if created_by is None:
+                raise CommandError(f"Unknown user: {options['created_by']}")
+
+        started = time.monotonic()
+
+        def progress(batch_number, read, skipped):
+            elapsed = time.monotonic() - started
+            state = 'skipped (already imported)' if skipped else f'{read / elapsed:,.0f} records/s'
+            self.stdout.write(f'batch {batch_number}: {read:,} records read, {state}')
+
+        try:
+            stats = import_prompts(
+                options['path'], created_by=created_by, batch_size=options['batch_size'],
+                file_format=options['format'], restart=options['restart'], progress=progress,
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Import stopped, committed batches are kept (rerun to resume): {exc}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['records']:,} prompts imported in {stats['batches']} batches "
+            f"({stats['skipped']} already imported) in {time.monotonic() - started:.1f}s"
+        ))
+        self.stdout.write('Run fingerprint_prompts and build_content_index to refresh derived data.')
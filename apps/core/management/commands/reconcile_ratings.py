@@ -0,0 +1,19 @@
+"""
+Django management command to recompute prompt rating aggregates.
+Usage: python manage.py reconcile_ratings
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    """Django command to rebuild rating_sum/rating_count and Bayesian scores."""
+
+    help = 'Recompute prompt ratings and Bayesian scores from reviews and interactions'
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        for label, rows in reconcile_ratings().items():
+            self.stdout.write(f'{label}: {rows} prompts')
+        self.stdout.write(self.style.SUCCESS('Ratings reconciled!'))
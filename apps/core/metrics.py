@@ -0,0 +1,248 @@
+"""
+Per-view request metrics: SQL, template, cache and latency histograms.
+
+RequestMetricsMiddleware đo từng request (số câu SQL và thời gian SQL qua
+``connection.execute_wrapper``, thời gian render template, cache hit/miss,
+tổng thời gian) rồi cộng vào các histogram trong bộ nhớ của process, gom
+theo ``resolver_match.view_name``. Mỗi observation chỉ là một bisect và vài
+phép cộng dưới một lock.
+
+Template và cache được đo bằng các backend bọc lại backend gốc
+(InstrumentedTemplates, InstrumentedRedisCache - khai báo trong TEMPLATES và
+CACHES), nên không cần bật debug hay patch Django.
+
+``/metrics`` xuất các số liệu theo định dạng text của Prometheus. Mỗi
+worker gunicorn có histogram riêng - Prometheus cộng dồn theo instance.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+from django_redis.cache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+# Biên trên của các bucket (giây / số câu SQL)
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+_current = ContextVar('request_metrics', default=None)
+_MISSING = object()
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative counts are computed on export)."""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # phần tử cuối là +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+# metric name -> (help, bucket bounds)
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Total request latency', DURATION_BUCKETS),
+    'db_queries_per_request': ('SQL queries executed per request', QUERY_BUCKETS),
+    'db_query_duration_seconds': ('Time spent in SQL per request', DURATION_BUCKETS),
+    'template_render_duration_seconds': ('Time spent rendering templates per request', DURATION_BUCKETS),
+}
+COUNTERS = {
+    'cache_hits_total': 'Cache keys found',
+    'cache_misses_total': 'Cache keys not found',
+    'query_budget_violations_total': 'Requests that exceeded their query budget',
+}
+
+
+class Registry:
+    """Process-wide metrics, keyed by (metric name, view name)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = Counter()
+
+    def observe(self, view, stats, duration):
+        values = {
+            'http_request_duration_seconds': duration,
+            'db_queries_per_request': stats.queries,
+            'db_query_duration_seconds': stats.sql_time,
+            'template_render_duration_seconds': stats.template_time,
+        }
+        with self.lock:
+            for name, value in values.items():
+                histogram = self.histograms.get((name, view))
+                if histogram is None:
+                    histogram = self.histograms[name, view] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+            if stats.cache_hits:
+                self.counters['cache_hits_total', view] += stats.cache_hits
+            if stats.cache_misses:
+                self.counters['cache_misses_total', view] += stats.cache_misses
+
+    def count(self, name, view, amount=1):
+        with self.lock:
+            self.counters[name, view] += amount
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def render(self):
+        """Prometheus text exposition of every metric."""
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        lines = []
+        for name, (help_text, _) in HISTOGRAMS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (metric, view), histogram in histograms:
+                if metric != name:
+                    continue
+                label = _escape(view)
+                cumulative = 0
+                for bound, count in zip((*histogram.bounds, '+Inf'), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{view="{label}"}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{view="{label}"}} {histogram.count}')
+        for name, help_text in COUNTERS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for (metric, view), value in counters:
+                if metric == name:
+                    lines.append(f'{name}{{view="{_escape(view)}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+
+class RequestStats:
+    """Counters of the request being served (reachable through a ContextVar)."""
+
+    __slots__ = ('queries', 'sql_time', 'template_time', 'cache_hits', 'cache_misses', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+
+def query_budget(view):
+    """Maximum queries allowed for ``view`` (QUERY_BUDGETS, else QUERY_BUDGET_DEFAULT)."""
+    return settings.QUERY_BUDGETS.get(view, settings.QUERY_BUDGET_DEFAULT)
+
+
+class RequestMetricsMiddleware:
+    """Record per-view query count, SQL/template/total time and cache hits."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED_VIEW
+        registry.observe(view, stats, duration)
+
+        budget = query_budget(view)
+        if budget is not None and stats.queries > budget:
+            registry.count('query_budget_violations_total', view)
+            sql, repeats = stats.statements.most_common(1)[0]
+            logger.warning(
+                'Query budget exceeded for %s (%s): %d queries > %d, %.1f ms SQL; most repeated (%dx): %s',
+                view, request.path, stats.queries, budget, stats.sql_time * 1000, repeats, sql,
+            )
+        return response
+
+
+def _record_cache(hits, misses):
+    stats = _current.get()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+class InstrumentedRedisCache(RedisCache):
+    """django-redis cache that reports hits/misses to the current request."""
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, _MISSING, version=version, client=client)
+        if value is _MISSING:
+            _record_cache(0, 1)
+            return default
+        _record_cache(1, 0)
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version, client=client)
+        _record_cache(len(values), len(keys) - len(values))
+        return values
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats = _current.get()
+            if stats is not None:
+                stats.template_time += time.perf_counter() - started
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """Django template backend that times top-level renders for the current request."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:48
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_stats(apps, schema_editor):
+    Category = apps.get_model('core', 'Category')
+    Prompt = apps.get_model('core', 'Prompt')
+    Purchase = apps.get_model('core', 'Purchase')
+    MarketplaceStats = apps.get_model('core', 'MarketplaceStats')
+    
+    purchases = Purchase.objects.aggregate(count=Count('id'), earnings=Sum('price_paid'))
+    MarketplaceStats.objects.update_or_create(pk=1, defaults={
+        'total_products': Prompt.objects.filter(status='published').count(),
+        'total_downloads': Prompt.objects.aggregate(total=Sum('downloads'))['total'] or 0,
+        'total_categories': Category.objects.count(),
+        'total_sales': purchases['count'],
+        'total_earnings': purchases['earnings'] or 0,
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketplaceStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_products', models.IntegerField(default=0, verbose_name='Số prompt đã xuất bản')),
+                ('total_downloads', models.BigIntegerField(default=0, verbose_name='Tổng lượt tải')),
+                ('total_categories', models.IntegerField(default=0, verbose_name='Số danh mục')),
+                ('total_sales', models.BigIntegerField(default=0, verbose_name='Tổng đơn hàng')),
+                ('total_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Tổng doanh thu')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Ngày cập nhật')),
+            ],
+            options={
+                'verbose_name': 'Thống kê marketplace',
+                'verbose_name_plural': 'Thống kê marketplace',
+            },
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
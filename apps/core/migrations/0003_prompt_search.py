@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:51
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Trọng số: title (A) > tags, description (B) > content (C)
+SEARCH_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION core_prompt_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.tags, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.content, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_prompt_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, tags, description, content, search_vector
+    ON core_prompt
+    FOR EACH ROW EXECUTE FUNCTION core_prompt_search_vector_update();
+
+UPDATE core_prompt SET search_vector = NULL;
+"""
+
+DROP_SEARCH_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS core_prompt_search_vector_trigger ON core_prompt;
+DROP FUNCTION IF EXISTS core_prompt_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_marketplace_stats'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='prompt',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='prompt',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_prompt_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prompt',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='core_prompt_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(SEARCH_TRIGGER_SQL, DROP_SEARCH_TRIGGER_SQL),
+    ]
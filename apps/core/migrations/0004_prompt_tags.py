@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:55
+
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.utils.text import slugify
+import django.db.models.deletion
+
+
+def migrate_tags(apps, schema_editor):
+    """Tách field tags (chuỗi phân cách dấu phẩy) sang bảng tags + core_prompttag."""
+    Prompt = apps.get_model('core', 'Prompt')
+    PromptTag = apps.get_model('core', 'PromptTag')
+    Tag = apps.get_model('prompthub', 'Tag')
+    
+    tag_ids = dict(Tag.objects.values_list('tag_slug', 'id_tag'))
+    links = []
+    for prompt_id, tags in Prompt.objects.exclude(tags='').values_list('id', 'tags').iterator():
+        seen = set()
+        for name in tags.split(','):
+            name = name.strip()[:30]
+            slug = slugify(name)[:50]
+            if not slug or slug in seen:
+                continue
+            seen.add(slug)
+            if slug not in tag_ids:
+                tag_ids[slug] = Tag.objects.create(tag_name=name, tag_slug=slug).id_tag
+            links.append(PromptTag(prompt_id=prompt_id, tag_id=tag_ids[slug]))
+    PromptTag.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+    
+    counts = PromptTag.objects.values('tag_id').annotate(total=Count('id'))
+    for row in counts.iterator():
+        Tag.objects.filter(id_tag=row['tag_id']).update(usage_count=F('usage_count') + row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prompthub', '0002_tag_usage_count_index'),
+        ('core', '0003_prompt_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromptTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prompt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='core.prompt')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='marketplace_prompt_links', to='prompthub.tag')),
+            ],
+            options={
+                'verbose_name': 'Tag của prompt',
+                'verbose_name_plural': 'Tags của prompt',
+            },
+        ),
+        migrations.AddField(
+            model_name='prompt',
+            name='tag_items',
+            field=models.ManyToManyField(blank=True, related_name='marketplace_prompts', through='core.PromptTag', to='prompthub.tag', verbose_name='Tags'),
+        ),
+        migrations.AddIndex(
+            model_name='prompttag',
+            index=models.Index(fields=['tag', 'prompt'], name='core_prompt_tag_id_6c8414_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='prompttag',
+            unique_together={('prompt', 'tag')},
+        ),
+        migrations.RunPython(migrate_tags, migrations.RunPython.noop),
+    ]
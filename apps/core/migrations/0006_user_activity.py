@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:59
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def populate_activity(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Prompt = apps.get_model('core', 'Prompt')
+    Purchase = apps.get_model('core', 'Purchase')
+    Review = apps.get_model('core', 'Review')
+    UserActivity = apps.get_model('core', 'UserActivity')
+
+    UserActivity.objects.bulk_create(
+        [UserActivity(user_id=pk) for pk in User.objects.values_list('pk', flat=True).iterator()],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+    def total(queryset, user_field, aggregate, output_field):
+        return Coalesce(
+            Subquery(
+                queryset.filter(**{user_field: OuterRef('user_id')}).order_by()
+                .values(user_field).annotate(total=aggregate).values('total')[:1]
+            ),
+            0,
+            output_field=output_field,
+        )
+
+    UserActivity.objects.update(
+        prompts_count=total(Prompt.objects.all(), 'author', Count('pk'), models.IntegerField()),
+        purchases_count=total(Purchase.objects.all(), 'user', Count('pk'), models.IntegerField()),
+        revenue=total(
+            Purchase.objects.all(), 'prompt__author', Sum('price_paid'),
+            models.DecimalField(max_digits=14, decimal_places=2)
+        ),
+        reviews_count=total(Review.objects.all(), 'user', Count('pk'), models.IntegerField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_keyset_index'),
+        ('core', '0005_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivity',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Người dùng')),
+                ('prompts_count', models.IntegerField(default=0, verbose_name='Số prompt đã đăng')),
+                ('purchases_count', models.IntegerField(default=0, verbose_name='Số đơn đã mua')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Doanh thu bán được')),
+                ('reviews_count', models.IntegerField(default=0, verbose_name='Số đánh giá đã viết')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Ngày cập nhật')),
+            ],
+            options={
+                'verbose_name': 'Hoạt động người dùng',
+                'verbose_name_plural': 'Hoạt động người dùng',
+                'indexes': [models.Index(fields=['-prompts_count', '-user'], name='core_userac_prompts_02d0a8_idx'), models.Index(fields=['-purchases_count', '-user'], name='core_userac_purchas_bb2db3_idx'), models.Index(fields=['-revenue', '-user'], name='core_userac_revenue_00e633_idx'), models.Index(fields=['-reviews_count', '-user'], name='core_userac_reviews_18509b_idx')],
+            },
+        ),
+        migrations.RunPython(populate_activity, migrations.RunPython.noop),
+    ]
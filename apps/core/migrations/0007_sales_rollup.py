@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_user_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Ngày'), ('month', 'Tháng')], max_length=5, verbose_name='Kỳ')),
+                ('period_start', models.DateField(verbose_name='Ngày bắt đầu kỳ')),
+                ('scope', models.CharField(choices=[('total', 'Toàn sàn'), ('prompt', 'Prompt'), ('category', 'Danh mục'), ('seller', 'Người bán')], max_length=10, verbose_name='Phạm vi')),
+                ('scope_id', models.IntegerField(default=0, verbose_name='ID đối tượng')),
+                ('items_count', models.IntegerField(default=0, verbose_name='Số đơn')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Doanh thu')),
+            ],
+            options={
+                'verbose_name': 'Doanh số tổng hợp',
+                'verbose_name_plural': 'Doanh số tổng hợp',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='salesrollup',
+            constraint=models.UniqueConstraint(fields=('scope', 'scope_id', 'period', 'period_start'), name='core_salesrollup_unique_bucket'),
+        ),
+    ]
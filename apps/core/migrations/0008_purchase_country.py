@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchase',
+            name='country',
+            field=models.CharField(blank=True, default='', max_length=2, verbose_name='Quốc gia'),
+        ),
+        migrations.AlterField(
+            model_name='salesrollup',
+            name='scope',
+            field=models.CharField(choices=[('total', 'Toàn sàn'), ('prompt', 'Prompt'), ('category', 'Danh mục'), ('seller', 'Người bán'), ('country', 'Quốc gia')], max_length=10, verbose_name='Phạm vi'),
+        ),
+    ]
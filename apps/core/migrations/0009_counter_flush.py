@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_purchase_country'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterFlush',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_id', models.CharField(max_length=32, unique=True, verbose_name='Mã batch')),
+                ('model_label', models.CharField(max_length=100, verbose_name='Model')),
+                ('rows', models.IntegerField(default=0, verbose_name='Số dòng cập nhật')),
+                ('flushed_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Thời điểm flush')),
+            ],
+            options={
+                'verbose_name': 'Lần flush bộ đếm',
+                'verbose_name_plural': 'Lần flush bộ đếm',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_counter_flush'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prompt',
+            name='bayesian_rating',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=3, verbose_name='Điểm xếp hạng (Bayes)'),
+        ),
+        migrations.AddField(
+            model_name='prompt',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Tổng số sao'),
+        ),
+        migrations.AddIndex(
+            model_name='prompt',
+            index=models.Index(fields=['-bayesian_rating', '-id'], name='core_prompt_bayesia_954ca8_idx'),
+        ),
+    ]
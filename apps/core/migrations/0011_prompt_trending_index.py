@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_prompt_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='prompt',
+            index=models.Index(condition=models.Q(('is_trending', True)), fields=['is_trending'], name='core_prompt_trending_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:18
+
+from django.conf import settings
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0011_prompt_trending_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('core.prompt', 'Marketplace'), ('prompthub.prompt', 'PromptHub')], max_length=20, verbose_name='Nguồn')),
+                ('object_id', models.CharField(max_length=12, verbose_name='ID prompt')),
+                ('match_source', models.CharField(choices=[('core.prompt', 'Marketplace'), ('prompthub.prompt', 'PromptHub')], max_length=20, verbose_name='Nguồn prompt trùng')),
+                ('match_object_id', models.CharField(max_length=12, verbose_name='ID prompt trùng')),
+                ('similarity', models.FloatField(verbose_name='Độ tương đồng (Jaccard)')),
+                ('status', models.CharField(choices=[('pending', 'Chờ duyệt'), ('confirmed', 'Trùng lặp'), ('dismissed', 'Không trùng')], db_index=True, default='pending', max_length=10, verbose_name='Trạng thái')),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True, verbose_name='Ngày duyệt')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Ngày phát hiện')),
+            ],
+            options={
+                'verbose_name': 'Nghi vấn trùng lặp',
+                'verbose_name_plural': 'Nghi vấn trùng lặp',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PromptFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('core.prompt', 'Marketplace'), ('prompthub.prompt', 'PromptHub')], max_length=20, verbose_name='Nguồn')),
+                ('object_id', models.CharField(max_length=12, verbose_name='ID prompt')),
+                ('text_hash', models.CharField(max_length=32, verbose_name='Hash nội dung')),
+                ('signature', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), size=None, verbose_name='MinHash')),
+                ('bands', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), size=None, verbose_name='Band LSH')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Ngày cập nhật')),
+            ],
+            options={
+                'verbose_name': 'Dấu vân tay prompt',
+                'verbose_name_plural': 'Dấu vân tay prompt',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['bands'], name='core_fingerprint_bands_gin')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='promptfingerprint',
+            constraint=models.UniqueConstraint(fields=('source', 'object_id'), name='core_promptfingerprint_unique_object'),
+        ),
+        migrations.AddField(
+            model_name='duplicatecandidate',
+            name='reviewed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviewed_duplicates', to=settings.AUTH_USER_MODEL, verbose_name='Người duyệt'),
+        ),
+        migrations.AddConstraint(
+            model_name='duplicatecandidate',
+            constraint=models.UniqueConstraint(fields=('source', 'object_id', 'match_source', 'match_object_id'), name='core_duplicatecandidate_unique_pair'),
+        ),
+    ]
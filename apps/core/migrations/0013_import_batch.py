@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('import_key', models.CharField(max_length=64, verbose_name='Mã file import')),
+                ('batch_number', models.IntegerField(verbose_name='Số thứ tự batch')),
+                ('first_line', models.IntegerField(verbose_name='Dòng đầu tiên')),
+                ('records', models.IntegerField(default=0, verbose_name='Số prompt')),
+                ('imported_at', models.DateTimeField(auto_now_add=True, verbose_name='Thời điểm nạp')),
+            ],
+            options={
+                'verbose_name': 'Batch import',
+                'verbose_name_plural': 'Batch import',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importbatch',
+            constraint=models.UniqueConstraint(fields=('import_key', 'batch_number'), name='core_importbatch_unique_batch'),
+        ),
+    ]
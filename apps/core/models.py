@@ -1,6 +1,11 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.text import slugify
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -50,6 +55,14 @@ class Prompt(models.Model):
         verbose_name="Danh mục"
     )
     tags = models.CharField(max_length=255, blank=True, verbose_name="Tags (phân cách bằng dấu phẩy)")
+    # Tags chuẩn hoá, đồng bộ từ field `tags` khi lưu (xem apps.core.tags)
+    tag_items = models.ManyToManyField(
+        'prompthub.Tag',
+        through='PromptTag',
+        related_name='marketplace_prompts',
+        blank=True,
+        verbose_name="Tags"
+    )
     
     # Giá và trạng thái
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Giá")
@@ -96,6 +109,14 @@ class Prompt(models.Model):
         verbose_name="Đánh giá trung bình"
     )
     rating_count = models.PositiveIntegerField(default=0, verbose_name="Số đánh giá")
+    # Duy trì tăng dần bởi apps.core.ratings (không cần AVG trên bảng Review)
+    rating_sum = models.PositiveIntegerField(default=0, verbose_name="Tổng số sao")
+    bayesian_rating = models.DecimalField(
+        max_digits=3,
+        decimal_places=2,
+        default=0,
+        verbose_name="Điểm xếp hạng (Bayes)"
+    )
     
     # Flags
     featured = models.BooleanField(default=False, verbose_name="Nổi bật")
@@ -105,6 +126,11 @@ class Prompt(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Ngày cập nhật")
     
+    # Full-text search (được trigger PostgreSQL cập nhật, xem apps.core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    COUNT_FIELDS = ('views', 'downloads', 'rating', 'rating_count', 'rating_sum', 'bayesian_rating')
+    
     class Meta:
         verbose_name = "Prompt"
         verbose_name_plural = "Prompts"
@@ -113,14 +139,37 @@ class Prompt(models.Model):
             models.Index(fields=['-created_at']),
             models.Index(fields=['status', '-created_at']),
             models.Index(fields=['featured', '-created_at']),
+            models.Index(fields=['-bayesian_rating', '-id']),
+            # Chỉ vài chục prompt có cờ này (refresh_trending cập nhật)
+            models.Index(
+                fields=['is_trending'], condition=models.Q(is_trending=True), name='core_prompt_trending_idx'
+            ),
+            GinIndex(fields=['search_vector'], name='core_prompt_search_idx'),
+            GinIndex(fields=['title'], name='core_prompt_title_trgm_idx', opclasses=['gin_trgm_ops']),
         ]
     
     def __str__(self):
         return self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Giữ giá trị lúc load để signals tính delta cho MarketplaceStats
+        instance._loaded_values = {
+            field: value for field, value in zip(field_names, values)
+            if field in ('status', 'downloads', 'tags', 'author_id')
+        }
+        return instance
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        # Bộ đếm chỉ được cập nhật bằng F()/apps.core.counters; không ghi đè giá trị cũ
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNT_FIELDS
+            ]
         super().save(*args, **kwargs)
     
     @property
@@ -136,12 +185,34 @@ class Prompt(models.Model):
         return self.discount_percentage > 0
     
     def get_tags_list(self):
-        """Chuyển tags string thành list"""
+        """
+        Danh sách tên tag.
+        Dùng prefetch_related('tag_items') khi render nhiều prompt để tránh N+1.
+        """
+        if 'tag_items' in getattr(self, '_prefetched_objects_cache', {}):
+            return [tag.tag_name for tag in self.tag_items.all()]
         if self.tags:
-            return [tag.strip() for tag in self.tags.split(',')]
+            return [tag.strip() for tag in self.tags.split(',') if tag.strip()]
         return []
 
 
+class PromptTag(models.Model):
+    """Liên kết Prompt - Tag (dùng bảng tags của prompthub)"""
+    prompt = models.ForeignKey(Prompt, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey('prompthub.Tag', on_delete=models.CASCADE, related_name='marketplace_prompt_links')
+    
+    class Meta:
+        verbose_name = "Tag của prompt"
+        verbose_name_plural = "Tags của prompt"
+        unique_together = ['prompt', 'tag']
+        indexes = [
+            models.Index(fields=['tag', 'prompt']),
+        ]
+    
+    def __str__(self):
+        return f"{self.prompt_id} - {self.tag_id}"
+
+
 class Review(models.Model):
     """Đánh giá sản phẩm"""
     prompt = models.ForeignKey(
@@ -168,9 +239,22 @@ class Review(models.Model):
         verbose_name_plural = "Đánh giá"
         ordering = ['-created_at']
         unique_together = ['prompt', 'user']  # Mỗi user chỉ review 1 lần
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.prompt.title} ({self.rating}★)"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Giá trị cũ để signals tính delta cho điểm đánh giá của prompt
+        instance._loaded_values = {
+            field: value for field, value in zip(field_names, values)
+            if field in ('rating', 'prompt_id')
+        }
+        return instance
 
 
 class Purchase(models.Model):
@@ -197,12 +281,397 @@ class Purchase(models.Model):
         unique=True,
         verbose_name="Mã giao dịch"
     )
+    # ISO 3166-1 alpha-2, lấy từ IP người mua (apps.core.geoip.country_for_request)
+    country = models.CharField(max_length=2, blank=True, default='', verbose_name="Quốc gia")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày mua")
     
     class Meta:
         verbose_name = "Đơn hàng"
         verbose_name_plural = "Đơn hàng"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.prompt.title}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Giá cũ để signals tính delta doanh thu khi sửa giá
+        instance._loaded_values = {
+            field: value for field, value in zip(field_names, values)
+            if field == 'price_paid'
+        }
+        return instance
+
+
+class MarketplaceStats(models.Model):
+    """
+    Bộ đếm tổng hợp của marketplace (chỉ có một dòng, pk=1).
+    
+    Được cập nhật bằng F() trong cùng transaction với thay đổi dữ liệu
+    (xem apps.core.signals); total_sales/total_earnings đi qua bộ đếm đệm
+    Redis (apps.core.counters) sau commit để các đơn hàng không xếp hàng chờ
+    row lock của dòng này. Đối soát định kỳ bởi task
+    reconcile_marketplace_stats.
+    """
+    total_products = models.IntegerField(default=0, verbose_name="Số prompt đã xuất bản")
+    total_downloads = models.BigIntegerField(default=0, verbose_name="Tổng lượt tải")
+    total_categories = models.IntegerField(default=0, verbose_name="Số danh mục")
+    total_sales = models.BigIntegerField(default=0, verbose_name="Tổng đơn hàng")
+    total_earnings = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        verbose_name="Tổng doanh thu"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Ngày cập nhật")
+    
+    class Meta:
+        verbose_name = "Thống kê marketplace"
+        verbose_name_plural = "Thống kê marketplace"
+    
+    def __str__(self):
+        return f"Marketplace stats ({self.updated_at:%d/%m/%Y %H:%M})"
+    
+    @classmethod
+    def load(cls):
+        """Lấy dòng thống kê duy nhất (tạo nếu chưa có)"""
+        stats, _ = cls.objects.get_or_create(pk=1)
+        return stats
+    
+    @classmethod
+    def increment(cls, **deltas):
+        """Cộng dồn nguyên tử các bộ đếm, ví dụ increment(total_sales=1)"""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        updates = {field: models.F(field) + delta for field, delta in deltas.items()}
+        if not cls.objects.filter(pk=1).update(**updates):
+            cls.load()
+            cls.objects.filter(pk=1).update(**updates)
+    
+    @classmethod
+    def reconcile(cls):
+        """
+        Tính lại toàn bộ bộ đếm từ các bảng gốc.
+        
+        total_sales/total_earnings được đệm qua Redis: chạy trong khóa flush
+        sau khi đã flush, và trừ phần đơn hàng đã commit nhưng còn chờ trong
+        Redis để lần flush sau không cộng chúng lần thứ hai.
+        """
+        from . import counters
+        
+        with counters.flushed(cls) as buffered:
+            purchases = Purchase.objects.aggregate(
+                count=models.Count('id'),
+                earnings=models.Sum('price_paid'),
+            )
+            values = {
+                'total_products': Prompt.objects.filter(status='published').count(),
+                'total_downloads': Prompt.objects.aggregate(models.Sum('downloads'))['downloads__sum'] or 0,
+                'total_categories': Category.objects.count(),
+                'total_sales': purchases['count'],
+                'total_earnings': purchases['earnings'] or 0,
+            }
+            if buffered:
+                for field in ('total_sales', 'total_earnings'):
+                    values[field] -= counters.pending(cls, 1, field)
+            stats, _ = cls.objects.update_or_create(pk=1, defaults=values)
+        return stats
+
+
+def _total_by_user(queryset, user_field, aggregate, output_field):
+    """Subquery tổng hợp theo user (mỗi quan hệ một subquery, tránh fan-out join)"""
+    return Coalesce(
+        models.Subquery(
+            queryset.filter(**{user_field: models.OuterRef('user_id')})
+            .order_by()
+            .values(user_field)
+            .annotate(total=aggregate)
+            .values('total')[:1]
+        ),
+        0,
+        output_field=output_field,
+    )
+
+
+class UserActivity(models.Model):
+    """
+    Tóm tắt hoạt động của từng user cho trang quản lý users.
+    
+    Được cập nhật tăng/giảm bằng F() qua signals của Prompt, Purchase,
+    Review (xem apps.core.signals); reconcile() tính lại từ bảng gốc.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='activity',
+        verbose_name="Người dùng"
+    )
+    prompts_count = models.IntegerField(default=0, verbose_name="Số prompt đã đăng")
+    purchases_count = models.IntegerField(default=0, verbose_name="Số đơn đã mua")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Doanh thu bán được")
+    reviews_count = models.IntegerField(default=0, verbose_name="Số đánh giá đã viết")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Ngày cập nhật")
+    
+    class Meta:
+        verbose_name = "Hoạt động người dùng"
+        verbose_name_plural = "Hoạt động người dùng"
+        indexes = [
+            models.Index(fields=['-prompts_count', '-user']),
+            models.Index(fields=['-purchases_count', '-user']),
+            models.Index(fields=['-revenue', '-user']),
+            models.Index(fields=['-reviews_count', '-user']),
+        ]
+    
+    def __str__(self):
+        return f"Activity of {self.user_id}"
+    
+    @classmethod
+    def increment(cls, user_id, **deltas):
+        """Cộng dồn nguyên tử các bộ đếm của một user"""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas or user_id is None:
+            return
+        updates = {field: models.F(field) + delta for field, delta in deltas.items()}
+        if not cls.objects.filter(user_id=user_id).update(**updates):
+            cls.objects.get_or_create(user_id=user_id)
+            cls.objects.filter(user_id=user_id).update(**updates)
+    
+    @classmethod
+    def reconcile(cls):
+        """Tạo dòng còn thiếu và tính lại mọi bộ đếm từ bảng gốc"""
+        missing = User.objects.filter(activity__isnull=True).values_list('pk', flat=True)
+        cls.objects.bulk_create(
+            [cls(user_id=user_id) for user_id in missing.iterator()],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        money = models.DecimalField(max_digits=14, decimal_places=2)
+        return cls.objects.update(
+            prompts_count=_total_by_user(
+                Prompt.objects.all(), 'author', models.Count('pk'), models.IntegerField()
+            ),
+            purchases_count=_total_by_user(
+                Purchase.objects.all(), 'user', models.Count('pk'), models.IntegerField()
+            ),
+            revenue=_total_by_user(
+                Purchase.objects.all(), 'prompt__author', models.Sum('price_paid'), money
+            ),
+            reviews_count=_total_by_user(
+                Review.objects.all(), 'user', models.Count('pk'), models.IntegerField()
+            ),
+        )
+
+
+class SalesRollup(models.Model):
+    """
+    Doanh số tổng hợp theo ngày/tháng cho các biểu đồ dashboard.
+    
+    Mỗi dòng là (kỳ, ngày bắt đầu kỳ, phạm vi, id đối tượng): phạm vi
+    'total' dùng scope_id = 0, các phạm vi khác dùng id của prompt, danh
+    mục, người bán hoặc mã quốc gia đã mã hóa (geoip.country_scope_id). Cập nhật tăng dần theo từng Purchase và được
+    tính lại định kỳ (xem apps.core.rollups).
+    """
+    PERIOD_CHOICES = [
+        ('day', 'Ngày'),
+        ('month', 'Tháng'),
+    ]
+    
+    SCOPE_CHOICES = [
+        ('total', 'Toàn sàn'),
+        ('prompt', 'Prompt'),
+        ('category', 'Danh mục'),
+        ('seller', 'Người bán'),
+        ('country', 'Quốc gia'),
+    ]
+    
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES, verbose_name="Kỳ")
+    period_start = models.DateField(verbose_name="Ngày bắt đầu kỳ")
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES, verbose_name="Phạm vi")
+    scope_id = models.IntegerField(default=0, verbose_name="ID đối tượng")
+    items_count = models.IntegerField(default=0, verbose_name="Số đơn")
+    amount = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Doanh thu")
+    
+    class Meta:
+        verbose_name = "Doanh số tổng hợp"
+        verbose_name_plural = "Doanh số tổng hợp"
+        # Thứ tự cột phục vụ truy vấn biểu đồ: một scope, một kỳ, khoảng ngày
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'scope_id', 'period', 'period_start'],
+                name='core_salesrollup_unique_bucket',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope}:{self.scope_id} {self.period} {self.period_start}"
+
+
+class CounterFlush(models.Model):
+    """
+    Nhật ký các lần flush bộ đếm từ Redis (xem apps.core.counters).
+    
+    Được ghi trong cùng transaction với UPDATE nên một batch đã áp dụng
+    sẽ không bị cộng lần hai nếu worker chết trước khi xóa hash trên Redis.
+    """
+    batch_id = models.CharField(max_length=32, unique=True, verbose_name="Mã batch")
+    model_label = models.CharField(max_length=100, verbose_name="Model")
+    rows = models.IntegerField(default=0, verbose_name="Số dòng cập nhật")
+    flushed_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Thời điểm flush")
+    
+    class Meta:
+        verbose_name = "Lần flush bộ đếm"
+        verbose_name_plural = "Lần flush bộ đếm"
+    
+    def __str__(self):
+        return f"{self.model_label} {self.batch_id}"
+
+
+class PromptFingerprint(models.Model):
+    """
+    MinHash của nội dung một prompt để phát hiện đăng lại (xem apps.core.duplicates).
+    
+    ``bands`` là hash của từng band LSH; GIN index trên cột này cho phép tìm
+    ứng viên trùng bằng một truy vấn ``&&`` thay vì quét toàn bộ corpus.
+    """
+    SOURCE_CHOICES = [
+        ('core.prompt', 'Marketplace'),
+        ('prompthub.prompt', 'PromptHub'),
+    ]
+    
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, verbose_name="Nguồn")
+    object_id = models.CharField(max_length=12, verbose_name="ID prompt")
+    text_hash = models.CharField(max_length=32, verbose_name="Hash nội dung")
+    signature = ArrayField(models.BigIntegerField(), verbose_name="MinHash")
+    bands = ArrayField(models.BigIntegerField(), verbose_name="Band LSH")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Ngày cập nhật")
+    
+    class Meta:
+        verbose_name = "Dấu vân tay prompt"
+        verbose_name_plural = "Dấu vân tay prompt"
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'object_id'], name='core_promptfingerprint_unique_object'),
+        ]
+        indexes = [
+            GinIndex(fields=['bands'], name='core_fingerprint_bands_gin'),
+        ]
+    
+    def __str__(self):
+        return f"{self.source}:{self.object_id}"
+
+
+class DuplicateCandidate(models.Model):
+    """Hàng đợi kiểm duyệt: một prompt gần trùng với prompt đã có."""
+    STATUS_CHOICES = [
+        ('pending', 'Chờ duyệt'),
+        ('confirmed', 'Trùng lặp'),
+        ('dismissed', 'Không trùng'),
+    ]
+    
+    source = models.CharField(
+        max_length=20, choices=PromptFingerprint.SOURCE_CHOICES, verbose_name="Nguồn"
+    )
+    object_id = models.CharField(max_length=12, verbose_name="ID prompt")
+    match_source = models.CharField(
+        max_length=20, choices=PromptFingerprint.SOURCE_CHOICES, verbose_name="Nguồn prompt trùng"
+    )
+    match_object_id = models.CharField(max_length=12, verbose_name="ID prompt trùng")
+    similarity = models.FloatField(verbose_name="Độ tương đồng (Jaccard)")
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default='pending', db_index=True, verbose_name="Trạng thái"
+    )
+    reviewed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reviewed_duplicates',
+        verbose_name="Người duyệt"
+    )
+    reviewed_at = models.DateTimeField(null=True, blank=True, verbose_name="Ngày duyệt")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày phát hiện")
+    
+    class Meta:
+        verbose_name = "Nghi vấn trùng lặp"
+        verbose_name_plural = "Nghi vấn trùng lặp"
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'object_id', 'match_source', 'match_object_id'],
+                name='core_duplicatecandidate_unique_pair',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.source}:{self.object_id} ~ {self.match_source}:{self.match_object_id}"
+
+
+class ImportBatch(models.Model):
+    """
+    Nhật ký các batch đã nạp bởi apps.core.bulk_import.
+    
+    Được ghi trong cùng transaction với các câu upsert của batch, nên chạy
+    lại lệnh import cùng một file sẽ bỏ qua các batch đã commit và tiếp tục
+    từ batch bị dừng.
+    """
+    import_key = models.CharField(max_length=64, verbose_name="Mã file import")
+    batch_number = models.IntegerField(verbose_name="Số thứ tự batch")
+    first_line = models.IntegerField(verbose_name="Dòng đầu tiên")
+    records = models.IntegerField(default=0, verbose_name="Số prompt")
+    imported_at = models.DateTimeField(auto_now_add=True, verbose_name="Thời điểm nạp")
+    
+    class Meta:
+        verbose_name = "Batch import"
+        verbose_name_plural = "Batch import"
+        constraints = [
+            models.UniqueConstraint(fields=['import_key', 'batch_number'], name='core_importbatch_unique_batch'),
+        ]
+    
+    def __str__(self):
+        return f"{self.import_key[:12]} #{self.batch_number}"
+
+
+class OutboxEmail(models.Model):
+    """
+    Email chờ gửi (xem apps.core.mail).
+    
+    ``idempotency_key`` là duy nhất: cùng một sự kiện (vd. ``welcome:<user id>``)
+    chỉ tạo một email dù task bị chạy lại. Dòng đã gửi được giữ lại để khóa
+    này còn hiệu lực.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Chờ gửi'),
+        ('sent', 'Đã gửi'),
+        ('failed', 'Thất bại'),
+    ]
+    
+    idempotency_key = models.CharField(max_length=100, unique=True, verbose_name="Khóa idempotency")
+    from_email = models.CharField(max_length=254, verbose_name="Người gửi")
+    recipients = ArrayField(models.EmailField(), verbose_name="Người nhận")
+    subject = models.CharField(max_length=255, verbose_name="Tiêu đề")
+    body = models.TextField(verbose_name="Nội dung")
+    html_body = models.TextField(blank=True, verbose_name="Nội dung HTML")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Trạng thái")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Số lần gửi")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Gửi lần tới")
+    last_error = models.TextField(blank=True, verbose_name="Lỗi gần nhất")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Ngày gửi")
+    
+    class Meta:
+        verbose_name = "Email chờ gửi"
+        verbose_name_plural = "Email chờ gửi"
+        indexes = [
+            # Worker chỉ đọc các email đang chờ, theo thứ tự đến hạn
+            models.Index(
+                fields=['next_attempt_at'], condition=models.Q(status='pending'), name='core_outbox_due_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.idempotency_key} ({self.status})"
@@ -0,0 +1,204 @@
+"""
+Keyset (cursor) pagination.
+
+Thay cho ``django.core.paginator.Paginator``: không dùng COUNT(*) và
+OFFSET mà "seek" theo bộ giá trị (created_at, id) của dòng cuối trang
+trước, nên trang thứ 10.000 tốn chi phí như trang đầu tiên (index range
+scan trên created_at). Tổng số dòng lấy xấp xỉ từ ``pg_class.reltuples``.
+
+Dùng chung cho dashboard (KeysetPaginator) và DRF
+(apps.api.pagination.KeysetPagination).
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Q
+from django.http import QueryDict
+
+# Bảng nhỏ hơn ngưỡng này thì đếm chính xác (rẻ và chính xác hơn ước lượng)
+EXACT_COUNT_THRESHOLD = 1000
+
+
+def approximate_count(model):
+    """
+    Estimated row count of a model's table from the planner statistics.
+
+    Falls back to an exact COUNT(*) for small or never-analyzed tables.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    estimate = row[0] if row else -1
+    if estimate < EXACT_COUNT_THRESHOLD:
+        return model._default_manager.count()
+    return estimate
+
+
+def encode_cursor(values, reverse=False):
+    """Encode boundary values into an opaque URL-safe cursor."""
+    payload = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        tuple: (values, reverse) or (None, False) for a missing/invalid cursor
+    """
+    if not cursor:
+        return None, False
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return list(payload['v']), bool(payload['r'])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        return None, False
+
+
+class CursorPage:
+    """
+    One page of keyset-paginated results.
+    Exposes the parts of django Page that the dashboard templates use.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None,
+                 count=None, query_params=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.query_params = query_params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _url(self, cursor=None):
+        params = self.query_params.copy() if self.query_params is not None else QueryDict(mutable=True)
+        params.pop('cursor', None)
+        params.pop('page', None)
+        if cursor is not None:
+            params['cursor'] = cursor
+        return f'?{params.urlencode()}'
+
+    @property
+    def first_url(self):
+        """Query string of the first page."""
+        return self._url()
+
+    @property
+    def next_url(self):
+        """Query string of the next page (keeps the other GET params)."""
+        return self._url(self.next_cursor) if self.has_next() else None
+
+    @property
+    def previous_url(self):
+        """Query string of the previous page (keeps the other GET params)."""
+        return self._url(self.previous_cursor) if self.has_previous() else None
+
+
+class KeysetPaginator:
+    """
+    Keyset paginator over a unique, indexed ordering.
+
+    Usage:
+        paginator = KeysetPaginator(purchases, 20)
+        page = paginator.get_page(request.GET.get('cursor'), request.GET)
+
+    ``ordering`` phải kết thúc bằng một cột unique (mặc định id) để thứ tự
+    là toàn phần; mọi cột cùng chiều (cùng tăng hoặc cùng giảm).
+    """
+
+    def __init__(self, queryset, per_page=20, ordering=('-created_at', '-id'), count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.descending = self.ordering[0].startswith('-')
+        self.count = count
+
+    def _seek(self, values, forward):
+        """
+        Filter for rows strictly after ``values`` in the given direction.
+
+        Sinh điều kiện dạng ``a <= x AND (a < x OR (a = x AND b < y))`` để
+        PostgreSQL dùng được index range scan trên cột đầu tiên.
+        """
+        lookup = 'lt' if self.descending == forward else 'gt'
+        condition = None
+        for field, value in reversed(list(zip(self.fields, values))):
+            strict = Q(**{f'{field}__{lookup}': value})
+            condition = strict if condition is None else strict | (Q(**{field: value}) & condition)
+        leading = Q(**{f'{self.fields[0]}__{lookup}e': values[0]})
+        return leading & condition
+
+    def _values(self, obj):
+        values = []
+        for field in self.fields:
+            value = getattr(obj, field)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            values.append(value)
+        return values
+
+    def get_page(self, cursor=None, query_params=None):
+        """Return the CursorPage identified by ``cursor`` (first page if empty)."""
+        values, reverse = decode_cursor(cursor)
+        if values is not None and len(values) != len(self.fields):
+            values, reverse = None, False
+
+        queryset = self.queryset
+        if reverse:
+            reversed_ordering = [
+                field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering
+            ]
+            rows = list(
+                queryset.filter(self._seek(values, forward=False))
+                .order_by(*reversed_ordering)[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            if values is not None:
+                queryset = queryset.filter(self._seek(values, forward=True))
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = values is not None
+
+        if not rows:
+            # Trang rỗng (vd. cursor trỏ qua cuối danh sách): chỉ cho quay về đầu
+            return CursorPage([], count=self.count, query_params=query_params)
+
+        return CursorPage(
+            rows,
+            next_cursor=encode_cursor(self._values(rows[-1])) if has_next else None,
+            previous_cursor=encode_cursor(self._values(rows[0]), reverse=True) if has_previous else None,
+            count=self.count,
+            query_params=query_params,
+        )
@@ -0,0 +1,108 @@
+"""
+Incremental rating aggregates.
+
+Mỗi prompt lưu rating_sum và rating_count; mỗi thay đổi Review (core) hoặc
+UserPromptInteraction.rating (prompthub) là một câu UPDATE với F() cộng
+delta và tính lại luôn điểm trung bình và điểm Bayes trong cùng câu lệnh -
+O(1), không AVG trên bảng đánh giá, an toàn khi nhiều request đồng thời.
+
+Điểm Bayes dùng để xếp hạng:
+    (C * m + rating_sum) / (C + rating_count)
+với m = RATING_PRIOR_MEAN, C = RATING_PRIOR_WEIGHT; prompt chưa có đánh giá
+có điểm 0.
+"""
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.lookups import GreaterThan
+
+# model label -> (cột trung bình, cột số lượt, cột tổng, cột điểm Bayes)
+RATING_FIELDS = {
+    'core.prompt': ('rating', 'rating_count', 'rating_sum', 'bayesian_rating'),
+    'prompthub.prompt': ('average_rating', 'rating_count', 'rating_sum', 'bayesian_rating'),
+}
+
+_NUMERIC = DecimalField(max_digits=12, decimal_places=4)
+
+
+def _derived(label, total, count):
+    """Average and Bayesian score expressions from sum/count expressions."""
+    average, _, _, score = RATING_FIELDS[label]
+    prior_weight = settings.RATING_PRIOR_WEIGHT
+    prior = Value(Decimal(str(settings.RATING_PRIOR_MEAN)) * prior_weight, output_field=_NUMERIC)
+    rated = GreaterThan(count, 0)
+    return {
+        average: Case(
+            When(rated, then=Cast(total, _NUMERIC) / count),
+            default=Value(0, output_field=_NUMERIC),
+            output_field=_NUMERIC,
+        ),
+        score: Case(
+            When(rated, then=(prior + total) / (count + prior_weight)),
+            default=Value(0, output_field=_NUMERIC),
+            output_field=_NUMERIC,
+        ),
+    }
+
+
+def apply_rating_delta(model, pk, sum_delta, count_delta):
+    """
+    Add ``sum_delta`` stars and ``count_delta`` ratings to one prompt.
+
+    Ví dụ: tạo đánh giá 4 sao -> (4, 1); sửa 4 -> 2 sao -> (-2, 0);
+    xóa đánh giá 2 sao -> (-2, -1).
+    """
+    if not sum_delta and not count_delta:
+        return
+    label = model._meta.label_lower
+    _, count_field, sum_field, _ = RATING_FIELDS[label]
+    total = F(sum_field) + sum_delta
+    count = F(count_field) + count_delta
+    model._default_manager.filter(pk=pk).update(
+        **{sum_field: total, count_field: count},
+        **_derived(label, total, count),
+    )
+
+
+def rating_change(old, new):
+    """(sum_delta, count_delta) for a rating going from ``old`` to ``new`` (None = no rating)."""
+    return (new or 0) - (old or 0), (new is not None) - (old is not None)
+
+
+def _sources():
+    """Model label -> (prompt model, rating rows queryset)."""
+    Review = apps.get_model('core', 'Review')
+    Interaction = apps.get_model('prompthub', 'UserPromptInteraction')
+    return {
+        'core.prompt': (apps.get_model('core', 'Prompt'), Review.objects.all()),
+        'prompthub.prompt': (
+            apps.get_model('prompthub', 'Prompt'), Interaction.objects.filter(rating__isnull=False)
+        ),
+    }
+
+
+def reconcile_ratings():
+    """
+    Recompute every prompt's aggregates from the rating rows.
+
+    Hai câu UPDATE cho mỗi bảng: tổng/số lượt bằng subquery, sau đó trung
+    bình và điểm Bayes từ các cột vừa ghi.
+
+    Returns:
+        dict: {model label: rows updated}
+    """
+    updated = {}
+    for label, (model, ratings) in _sources().items():
+        _, count_field, sum_field, _ = RATING_FIELDS[label]
+        per_prompt = ratings.filter(prompt=OuterRef('pk')).order_by().values('prompt')
+        model._default_manager.update(**{
+            sum_field: Coalesce(Subquery(per_prompt.annotate(total=Sum('rating')).values('total')), 0),
+            count_field: Coalesce(Subquery(per_prompt.annotate(total=Count('pk')).values('total')), 0),
+        })
+        updated[label] = model._default_manager.update(
+            **_derived(label, F(sum_field), F(count_field))
+        )
+    return updated
@@ -0,0 +1,128 @@
+"""
+Role-based permission checks over the prompthub RBAC tables.
+
+Quyền cha bao hàm quyền con: cấp ``prompt`` với can_update cho một vai trò
+nghĩa là vai trò đó được update mọi quyền nằm dưới ``prompt`` trong cây
+``Permission.parent_permission``.
+
+``compile_table`` đọc Permission và RolePermission (hai truy vấn), tính mảng
+tổ tiên của từng quyền rồi biên dịch mỗi Role thành bốn bitset (create,
+read, update, delete) - bit i ứng với quyền thứ i. ``has_perm`` chỉ còn vài
+phép tra dict và một phép dịch bit, không có truy vấn nào.
+
+Bảng đã biên dịch được giữ trong process và trong cache (Redis) qua
+``apps.core.versioned``. Signals tăng phiên bản sau khi Role, Permission hoặc
+RolePermission thay đổi; process khác nhận ra phiên bản mới sau tối đa
+LOCAL_CACHE_CHECK_INTERVAL giây.
+"""
+from django.conf import settings
+
+from apps.prompthub.models import Permission, Role, RolePermission
+
+from .versioned import VersionedCache
+
+ACTIONS = ('create', 'read', 'update', 'delete')
+
+
+class PermissionTable:
+    """Compiled permissions: bit index per permission code, bitsets per role."""
+
+    __slots__ = ('bits', 'roles', 'role_ids')
+
+    def __init__(self, bits, roles, role_ids):
+        self.bits = bits  # permission code -> bit
+        self.roles = roles  # role id -> tuple of bitsets, thứ tự ACTIONS
+        self.role_ids = role_ids  # role code -> role id
+
+    def allows(self, role_id, code, action):
+        masks = self.roles.get(role_id)
+        bit = self.bits.get(code)
+        if masks is None or bit is None:
+            return False
+        return bool(masks[ACTIONS.index(action)] >> bit & 1)
+
+
+def ancestors(parents):
+    """
+    Materialized ancestor arrays of a parent map.
+
+    Returns:
+        dict: permission id -> [itself, parent, grandparent, ...]
+    """
+    paths = {}
+    for start in parents:
+        path, node = [], start
+        # Dừng khi gặp nút đã tính (nối mảng của nó) hoặc vòng lặp do dữ liệu lỗi
+        while node is not None and node not in paths and node not in path:
+            path.append(node)
+            node = parents.get(node)
+        tail = paths.get(node, [])
+        for i, permission_id in enumerate(path):
+            paths[permission_id] = path[i:] + tail
+    return paths
+
+
+def compile_table():
+    """Build a PermissionTable from the database."""
+    rows = list(
+        Permission.objects.filter(active=True).order_by('pk')
+        .values_list('pk', 'parent_permission_id', 'permission_code')
+    )
+    bits = {pk: bit for bit, (pk, _, _) in enumerate(rows)}
+    # Quyền cha bị tắt thì cây dừng ở đó
+    paths = ancestors({pk: parent if parent in bits else None for pk, parent, _ in rows})
+
+    # Quyền đã cấp -> mọi quyền con cháu của nó
+    descendants = {}
+    for pk, path in paths.items():
+        for ancestor in path:
+            descendants[ancestor] = descendants.get(ancestor, 0) | 1 << bits[pk]
+
+    roles = {pk: [0] * len(ACTIONS) for pk in Role.objects.filter(active=True).values_list('pk', flat=True)}
+    grants = RolePermission.objects.filter(active=True, role__in=roles, permission__in=bits).values_list(
+        'role_id', 'permission_id', *(f'can_{action}' for action in ACTIONS)
+    )
+    for role_id, permission_id, *flags in grants:
+        for i, allowed in enumerate(flags):
+            if allowed:
+                roles[role_id][i] |= descendants[permission_id]
+
+    return PermissionTable(
+        {code: bits[pk] for pk, _, code in rows},
+        {pk: tuple(masks) for pk, masks in roles.items()},
+        dict(Role.objects.filter(active=True).values_list('role_code', 'pk')),
+    )
+
+
+tables = VersionedCache('rbac', compile_table)
+get_table = tables.get
+invalidate = tables.invalidate
+
+
+def role_has_perm(role_id, code, action='read'):
+    """Whether role ``role_id`` may ``action`` on permission ``code``."""
+    if action not in ACTIONS:
+        raise ValueError(f'Unknown action: {action}')
+    return get_table().allows(role_id, code, action)
+
+
+def has_perm(user, code, action='read'):
+    """
+    Whether ``user`` may ``action`` on permission ``code``, e.g.
+    ``has_perm(request.user, 'prompt.view_premium', 'update')``.
+
+    Superuser luôn được phép; user chưa gán vai trò dùng RBAC_DEFAULT_ROLE,
+    khách (chưa đăng nhập) dùng RBAC_ANONYMOUS_ROLE.
+    """
+    if action not in ACTIONS:
+        raise ValueError(f'Unknown action: {action}')
+    if not user.is_authenticated:
+        table = get_table()
+        return table.allows(table.role_ids.get(settings.RBAC_ANONYMOUS_ROLE), code, action)
+    if not user.is_active:
+        return False
+    if user.is_superuser:
+        return True
+    table = get_table()
+    role_id = user.role_id or table.role_ids.get(settings.RBAC_DEFAULT_ROLE)
+    return table.allows(role_id, code, action)
@@ -0,0 +1,208 @@
+"""
+Item-item collaborative filtering over prompthub.UserPromptInteraction.
+
+Mỗi (user, prompt) được quy thành một trọng số ngầm định (xem, thích, lưu,
+chấm điểm), tạo ma trận thưa users x prompts (SciPy CSR). Độ tương tự giữa
+hai prompt là cosine giữa hai cột; top-K láng giềng của mỗi prompt được ghi
+vào PromptSimilarity để trang prompt đọc một dòng theo khóa chính.
+
+- ``build_similarities``: tính lại toàn bộ, nhân ma trận theo từng khối
+  cột để giới hạn bộ nhớ.
+- ``refresh_similarities``: chỉ tính lại các prompt có tương tác mới từ
+  một mốc thời gian, dùng độ dài vector đã lưu của các prompt khác; danh
+  sách của các prompt láng giềng được trộn lại. Một prompt bị đẩy khỏi
+  top-K của láng giềng chỉ được lấp lại ở lần build toàn bộ kế tiếp.
+"""
+import math
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from scipy import sparse
+
+from apps.prompthub.models import PromptSimilarity, UserPromptInteraction
+
+# Số cột prompt nhân mỗi lần khi build toàn bộ
+BLOCK_SIZE = 2000
+
+
+def interaction_weight(is_liked, is_saved, rating, view_count):
+    """Implicit preference of one user for one prompt (never negative)."""
+    weights = settings.RECOMMENDATION_WEIGHTS
+    score = weights['view'] * math.log1p(view_count or 0)
+    score += weights['like'] * is_liked + weights['save'] * is_saved
+    if rating is not None:
+        score += weights['rating'] * (rating - 2.5)  # 1-2 sao kéo điểm xuống
+    return max(score, 0.0)
+
+
+def _load_matrix(interactions):
+    """
+    Build a users x prompts CSR matrix from an interaction queryset.
+
+    Returns:
+        tuple: (matrix, list of prompt ids by column)
+    """
+    users, prompts = {}, {}
+    rows, cols, data = [], [], []
+    for user_id, prompt_id, *signals in interactions.values_list(
+        'user_id', 'prompt_id', 'is_liked', 'is_saved', 'rating', 'view_count'
+    ).iterator(chunk_size=10000):
+        weight = interaction_weight(*signals)
+        if weight <= 0:
+            continue
+        rows.append(users.setdefault(user_id, len(users)))
+        cols.append(prompts.setdefault(prompt_id, len(prompts)))
+        data.append(weight)
+    matrix = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float64), (rows, cols)), shape=(len(users), len(prompts))
+    )
+    return matrix, list(prompts)
+
+
+def _column_norms(matrix):
+    return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+
+
+def _ranked(scores, k):
+    """Best ``k`` of {prompt_id: score} as (ids, scores); ties by prompt id."""
+    best = sorted(
+        ((round(float(score), 6), prompt_id) for prompt_id, score in scores.items()),
+        key=lambda item: (-item[0], item[1])
+    )[:k]
+    return [prompt_id for _, prompt_id in best], [score for score, _ in best]
+
+
+def _top_k(ids, row_ids, row_scores, exclude, k):
+    """Best ``k`` (ids, scores) of one similarity row, without column ``exclude``."""
+    keep = (row_ids != exclude) & (row_scores > 0)
+    row_ids, row_scores = row_ids[keep], row_scores[keep]
+    if len(row_scores) > k:
+        # Giữ cả các giá trị bằng ngưỡng để thứ tự hòa không phụ thuộc argpartition
+        threshold = np.partition(row_scores, len(row_scores) - k)[len(row_scores) - k]
+        best = row_scores >= threshold
+        row_ids, row_scores = row_ids[best], row_scores[best]
+    return _ranked(dict(zip(ids[row_ids], row_scores)), k)
+
+
+def _save(rows):
+    """Upsert {prompt_id: (similar_ids, scores, norm)}."""
+    now = timezone.now()
+    PromptSimilarity.objects.bulk_create(
+        [
+            PromptSimilarity(
+                prompt_id=prompt_id, similar_ids=list(similar_ids),
+                scores=list(scores), norm=float(norm), updated_at=now,
+            )
+            for prompt_id, (similar_ids, scores, norm) in rows.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['prompt'],
+        update_fields=['similar_ids', 'scores', 'norm', 'updated_at'],
+    )
+
+
+def build_similarities():
+    """
+    Recompute the top-K neighbours of every prompt.
+
+    Returns:
+        int: Number of prompts with a neighbour list
+    """
+    started = timezone.now()
+    k = settings.RECOMMENDATION_TOP_K
+    matrix, prompt_ids = _load_matrix(UserPromptInteraction.objects.all())
+    ids = np.asarray(prompt_ids, dtype=object)
+    norms = _column_norms(matrix)
+    normalized = (matrix @ sparse.diags(1 / np.where(norms > 0, norms, 1))).tocsc()
+    transposed = normalized.T.tocsr()
+
+    written = 0
+    for start in range(0, len(prompt_ids), BLOCK_SIZE):
+        block = (transposed[start:start + BLOCK_SIZE] @ normalized).tocsr()
+        rows = {}
+        for offset in range(block.shape[0]):
+            column = start + offset
+            begin, end = block.indptr[offset], block.indptr[offset + 1]
+            neighbours, scores = _top_k(ids, block.indices[begin:end], block.data[begin:end], column, k)
+            rows[prompt_ids[column]] = (neighbours, scores, norms[column])
+        _save(rows)
+        written += len(rows)
+
+    # Prompt không còn tương tác nào
+    PromptSimilarity.objects.filter(updated_at__lt=started).delete()
+    return written
+
+
+def _changed_prompts(since):
+    changed = Q(last_viewed_at__gte=since) | Q(liked_at__gte=since)
+    changed |= Q(saved_at__gte=since) | Q(rated_at__gte=since)
+    return set(
+        UserPromptInteraction.objects.filter(changed).values_list('prompt_id', flat=True).distinct()
+    )
+
+
+def refresh_similarities(since):
+    """
+    Recompute neighbours of prompts whose interactions changed since ``since``.
+
+    Returns:
+        int: Number of neighbour lists rewritten
+    """
+    changed = _changed_prompts(since)
+    if not changed:
+        return 0
+    k = settings.RECOMMENDATION_TOP_K
+
+    # Mọi tương tác của những user đã chạm vào prompt thay đổi: đủ để có trọn
+    # cột của prompt thay đổi và mọi tích vô hướng khác 0 của nó
+    users = UserPromptInteraction.objects.filter(prompt_id__in=changed).values('user_id')
+    matrix, prompt_ids = _load_matrix(UserPromptInteraction.objects.filter(user_id__in=users))
+    ids = np.asarray(prompt_ids, dtype=object)
+    index = {prompt_id: i for i, prompt_id in enumerate(prompt_ids)}
+
+    norms = _column_norms(matrix)  # đúng với cột thay đổi, thiếu với cột khác
+    stored = dict(PromptSimilarity.objects.filter(pk__in=prompt_ids).exclude(
+        prompt_id__in=changed
+    ).values_list('prompt_id', 'norm'))
+    for prompt_id, norm in stored.items():
+        if norm > 0:
+            norms[index[prompt_id]] = norm
+
+    changed_cols = [index[prompt_id] for prompt_id in changed if prompt_id in index]
+    inverse = 1 / np.where(norms > 0, norms, 1)
+    dots = matrix.tocsc()[:, changed_cols].T @ matrix
+    similarity = (sparse.diags(inverse[changed_cols]) @ dots @ sparse.diags(inverse)).tocsr()
+
+    rows = {}
+    reverse = defaultdict(dict)  # prompt láng giềng -> {prompt thay đổi: score}
+    for offset, column in enumerate(changed_cols):
+        begin, end = similarity.indptr[offset], similarity.indptr[offset + 1]
+        neighbours, scores = _top_k(
+            ids, similarity.indices[begin:end], similarity.data[begin:end], column, k
+        )
+        rows[prompt_ids[column]] = (neighbours, scores, norms[column])
+        for neighbour, score in zip(similarity.indices[begin:end], similarity.data[begin:end]):
+            if neighbour != column and score > 0:
+                reverse[prompt_ids[neighbour]][prompt_ids[column]] = float(score)
+    # Prompt thay đổi nhưng không còn trọng số dương nào
+    for prompt_id in changed - set(rows):
+        rows[prompt_id] = ([], [], 0.0)
+
+    # Trộn lại danh sách của các prompt đang trỏ tới hoặc nên trỏ tới prompt thay đổi
+    affected = PromptSimilarity.objects.filter(
+        Q(pk__in=list(reverse)) | Q(similar_ids__overlap=list(changed))
+    ).exclude(prompt_id__in=changed)
+    for entry in affected:
+        merged = {
+            similar_id: score for similar_id, score in zip(entry.similar_ids, entry.scores)
+            if similar_id not in changed
+        }
+        merged.update(reverse.get(entry.prompt_id, {}))
+        rows[entry.prompt_id] = (*_ranked(merged, k), entry.norm)
+
+    _save(rows)
+    return len(rows)
@@ -0,0 +1,193 @@
+"""
+In-memory registry of PromptHub reference tables.
+
+PromptLevel, AIPlatform, AIModel, PromptSource, Avatar, Role và
+SubscriptionPlan chỉ có vài chục dòng và hầu như không đổi. Registry nạp cả
+bảng (kể cả dòng không active, vì FK vẫn có thể trỏ tới) thành các record
+bất biến dùng ``__slots__``, tra theo khóa chính hoặc mã:
+
+    registry = get_registry()
+    registry.levels[3].level_name
+    registry.plans.code('PREMIUM_MONTH').price
+
+``with_references(queryset, 'level', 'source')`` gắn record vào cache quan hệ
+của từng instance sau khi đọc, nên ``prompt.level.level_name`` không cần
+``select_related`` (bớt JOIN và độ rộng dòng) cũng không sinh thêm truy vấn.
+
+Registry dùng chung qua ``apps.core.versioned``; signals tăng phiên bản sau
+khi một bảng tham chiếu thay đổi. ``preload()`` được gọi khi worker khởi
+động (config/wsgi.py, worker_process_init của Celery).
+"""
+import logging
+from functools import lru_cache
+
+from django.db import DatabaseError
+from django.db.models.query import ModelIterable
+
+from apps.prompthub.models import AIModel, AIPlatform, Avatar, PromptLevel, PromptSource, Role, SubscriptionPlan
+
+from .sysconfig import freeze
+from .versioned import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+# name -> (model, field mã hoặc None, field hiển thị)
+# AIModel.model_code không unique giữa các nền tảng: ``code()`` trả về model có pk nhỏ nhất
+TABLES = {
+    'avatars': (Avatar, None, 'avatar_name'),
+    'roles': (Role, 'role_code', 'role_name'),
+    'platforms': (AIPlatform, 'platform_code', 'platform_name'),
+    'ai_models': (AIModel, 'model_code', 'model_name'),
+    'sources': (PromptSource, None, 'source_name'),
+    'levels': (PromptLevel, 'level_code', 'level_name'),
+    'plans': (SubscriptionPlan, 'plan_code', 'plan_name'),
+}
+MODEL_TABLES = {model: name for name, (model, _, _) in TABLES.items()}
+
+
+class Record:
+    """Read-only row of a reference table; ``str()`` matches the model."""
+
+    __slots__ = ()
+    _pk = None
+    _label = None
+
+    def __init__(self, values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, freeze(value))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    @property
+    def pk(self):
+        return getattr(self, self._pk)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.pk == other.pk
+
+    def __hash__(self):
+        return hash((type(self), self.pk))
+
+    def __str__(self):
+        return str(getattr(self, self._label) or self.pk)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.pk}>'
+
+
+def _record_class(model, label):
+    fields = tuple(field.attname for field in model._meta.concrete_fields)
+    return type(f'{model.__name__}Record', (Record,), {
+        '__slots__': fields, '_pk': model._meta.pk.attname, '_label': label, '__module__': __name__,
+    })
+
+
+RECORDS = {name: _record_class(model, label) for name, (model, _, label) in TABLES.items()}
+
+
+class Table:
+    """Records of one table by primary key (``table[pk]``, ``table.get(pk)``) and by code."""
+
+    __slots__ = ('by_pk', 'by_code')
+
+    def __init__(self, records, code_field):
+        self.by_pk = {record.pk: record for record in records}
+        self.by_code = {}
+        if code_field:
+            for record in records:
+                self.by_code.setdefault(getattr(record, code_field), record)
+
+    def __getitem__(self, pk):
+        return self.by_pk[pk]
+
+    def __iter__(self):
+        return iter(self.by_pk.values())
+
+    def __len__(self):
+        return len(self.by_pk)
+
+    def get(self, pk, default=None):
+        return self.by_pk.get(pk, default)
+
+    def code(self, code, default=None):
+        return self.by_code.get(code, default)
+
+
+class Registry:
+    """
+    All reference tables, as attributes named after TABLES.
+
+    Pickle (khi lưu vào Redis) chỉ giữ các dòng gốc; record được dựng lại khi
+    load vì lớp record được tạo động.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        for name, (_, code_field, _) in TABLES.items():
+            cls = RECORDS[name]
+            setattr(self, name, Table([cls(row) for row in rows.get(name, ())], code_field))
+
+    def __reduce__(self):
+        return Registry, (self.rows,)
+
+
+def load():
+    """Read every reference table (one query per table)."""
+    rows = {}
+    for name, (model, _, _) in TABLES.items():
+        rows[name] = tuple(model.objects.order_by('pk').values_list(*RECORDS[name].__slots__))
+    return Registry(rows)
+
+
+registries = VersionedCache('references', load)
+get_registry = registries.get
+invalidate = registries.invalidate
+
+
+def preload():
+    """Load the registry at worker start; a database error only delays it to the first use."""
+    try:
+        get_registry()
+    except DatabaseError:
+        logger.warning('Could not preload reference data', exc_info=True)
+
+
+@lru_cache(maxsize=None)
+def _iterable_class(model, names):
+    references = []
+    for name in names:
+        field = model._meta.get_field(name)
+        table = MODEL_TABLES.get(field.related_model) if field.many_to_one else None
+        if table is None:
+            raise ValueError(f'{model.__name__}.{name} is not a foreign key to a reference table')
+        references.append((field, table))
+
+    class ReferenceIterable(ModelIterable):
+        def __iter__(self):
+            registry = get_registry()
+            tables = [(field, getattr(registry, table)) for field, table in references]
+            for obj in super().__iter__():
+                for field, table in tables:
+                    record = table.get(getattr(obj, field.attname))
+                    # Dòng mới chưa có trong registry: để Django tự truy vấn khi cần
+                    if record is not None:
+                        field.set_cached_value(obj, record)
+                yield obj
+
+    return ReferenceIterable
+
+
+def with_references(queryset, *fields):
+    """
+    Resolve foreign keys to reference tables from the registry instead of ``select_related``.
+
+    Usage:
+        with_references(Prompt.objects.filter(status=3), 'level', 'source')
+    """
+    queryset = queryset.all()
+    queryset._iterable_class = _iterable_class(queryset.model, tuple(fields))
+    return queryset
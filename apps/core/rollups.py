@@ -0,0 +1,190 @@
+"""
+Sales rollups cho dashboard.
+
+Mỗi Purchase cộng vào 10 bucket của SalesRollup (ngày/tháng x toàn sàn,
+prompt, danh mục, người bán, quốc gia) bằng một câu INSERT ... ON CONFLICT DO UPDATE,
+trong cùng transaction với Purchase. ``rebuild_rollups`` tính lại một khoảng
+ngày từ bảng Purchase; task refresh_sales_rollups chạy định kỳ để sửa sai
+lệch (bulk update, sửa giá thủ công...), lệnh ``backfill_sales_rollups``
+dùng cho dữ liệu lịch sử.
+
+Hai bên dùng chung advisory lock theo tháng: ``record_purchase`` giữ khóa
+shared của tháng mua (các purchase không chặn nhau), ``rebuild_rollups`` giữ
+khóa exclusive của mọi tháng nó tính lại, nên không có purchase nào được cộng
+vào giữa lúc đọc Purchase và lúc ghi đè rollup.
+
+Ngày được tính theo TIME_ZONE của dự án.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .geoip import country_flag, country_name, country_scope_id, scope_id_country
+from .models import Prompt, Purchase, SalesRollup
+
+# classid của pg_advisory_xact_lock(classid, objid); objid là năm * 12 + tháng
+LOCK_CLASS_ID = 0x524F4C4C
+
+# scope -> đường dẫn tới id của đối tượng, tính từ Purchase
+SCOPE_KEYS = {
+    'prompt': 'prompt_id',
+    'category': 'prompt__category_id',
+    'seller': 'prompt__author_id',
+    'country': 'country',
+}
+
+# scope có giá trị khóa không phải id số
+SCOPE_ID_CONVERTERS = {
+    'country': country_scope_id,
+}
+
+
+def _scope_ids(purchase):
+    """(scope, scope_id) of every bucket a purchase belongs to."""
+    if Purchase.prompt.is_cached(purchase):
+        prompt = purchase.prompt
+    else:
+        prompt = Prompt.objects.only('category_id', 'author_id').get(pk=purchase.prompt_id)
+    return [
+        ('total', 0),
+        ('prompt', prompt.pk),
+        ('category', prompt.category_id),
+        ('seller', prompt.author_id),
+        ('country', country_scope_id(purchase.country)),
+    ]
+
+
+def _month_lock_id(day):
+    return day.year * 12 + day.month - 1
+
+
+def record_purchase(purchase, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one purchase from its rollup buckets.
+    """
+    day = timezone.localdate(purchase.created_at)
+    amount = sign * Decimal(str(purchase.price_paid))
+    rows = []
+    for scope, scope_id in _scope_ids(purchase):
+        rows.append(('day', day, scope, scope_id, sign, amount))
+        rows.append(('month', day.replace(day=1), scope, scope_id, sign, amount))
+
+    table = SalesRollup._meta.db_table
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(rows))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock_shared(%s, %s)', [LOCK_CLASS_ID, _month_lock_id(day)])
+        cursor.execute(
+            f'''
+            INSERT INTO {table} (period, period_start, scope, scope_id, items_count, amount)
+            VALUES {placeholders}
+            ON CONFLICT (scope, scope_id, period, period_start) DO UPDATE SET
+                items_count = {table}.items_count + EXCLUDED.items_count,
+                amount = {table}.amount + EXCLUDED.amount
+            ''',
+            [value for row in rows for value in row]
+        )
+
+
+def _local_bounds(start, end):
+    """Aware datetimes covering local dates start..end inclusive."""
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+    )
+
+
+def rebuild_rollups(start, end):
+    """
+    Recompute the rollups of local dates ``start``..``end`` from Purchase.
+
+    Dòng ngày được tính lại từ Purchase, dòng tháng của các tháng liên quan
+    được cộng lại từ dòng ngày (nhỏ hơn rất nhiều so với bảng Purchase).
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    since, until = _local_bounds(start, end)
+    month_start = start.replace(day=1)
+    next_month = (end.replace(day=1) + timedelta(days=32)).replace(day=1)
+    with transaction.atomic():
+        # Khóa các tháng theo thứ tự tăng dần (không deadlock giữa hai lần rebuild)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_xact_lock(%s, month) FROM generate_series(%s, %s) AS month ORDER BY month',
+                [LOCK_CLASS_ID, _month_lock_id(month_start), _month_lock_id(end)],
+            )
+        purchases = Purchase.objects.filter(created_at__gte=since, created_at__lt=until).order_by()
+
+        daily = []
+        for scope in ('total', *SCOPE_KEYS):
+            key = SCOPE_KEYS.get(scope)
+            convert = SCOPE_ID_CONVERTERS.get(scope, int)
+            grouped = purchases.annotate(day=TruncDate('created_at'))
+            grouped = grouped.values('day', key) if key else grouped.values('day')
+            for row in grouped.annotate(items=Count('id'), total=Sum('price_paid')):
+                daily.append(SalesRollup(
+                    period='day', period_start=row['day'], scope=scope,
+                    scope_id=convert(row[key]) if key else 0, items_count=row['items'], amount=row['total'],
+                ))
+
+        SalesRollup.objects.filter(
+            period='day', period_start__gte=start, period_start__lte=end
+        ).delete()
+        SalesRollup.objects.bulk_create(daily, batch_size=1000)
+
+        monthly = [
+            SalesRollup(
+                period='month', period_start=row['month'], scope=row['scope'],
+                scope_id=row['scope_id'], items_count=row['items'], amount=row['total'],
+            )
+            for row in SalesRollup.objects.filter(
+                period='day', period_start__gte=month_start, period_start__lt=next_month
+            ).annotate(month=TruncMonth('period_start')).values(
+                'month', 'scope', 'scope_id'
+            ).annotate(items=Sum('items_count'), total=Sum('amount')).order_by()
+        ]
+        SalesRollup.objects.filter(
+            period='month', period_start__gte=month_start, period_start__lte=end
+        ).delete()
+        SalesRollup.objects.bulk_create(monthly, batch_size=1000)
+
+    return len(daily) + len(monthly)
+
+
+def sales_series(period='day', since=None, scope='total', scope_id=0):
+    """
+    Rollup rows of one scope, oldest first.
+
+    Returns:
+        QuerySet: dicts with ``date``, ``items_count`` and ``amount``
+    """
+    rows = SalesRollup.objects.filter(period=period, scope=scope, scope_id=scope_id)
+    if since is not None:
+        rows = rows.filter(period_start__gte=since)
+    return rows.values('items_count', 'amount', date=F('period_start')).order_by('period_start')
+
+
+def top_countries(since, limit=5):
+    """
+    Countries with the highest revenue since a local date.
+
+    Returns:
+        list: dicts with ``code``, ``name``, ``flag`` and ``amount``
+    """
+    rows = SalesRollup.objects.filter(
+        period='day', scope='country', period_start__gte=since
+    ).exclude(scope_id=0).values('scope_id').annotate(total=Sum('amount')).order_by('-total')[:limit]
+    countries = []
+    for row in rows:
+        code = scope_id_country(row['scope_id'])
+        countries.append({
+            'code': code,
+            'name': country_name(code),
+            'flag': country_flag(code),
+            'amount': row['total'],
+        })
+    return countries
@@ -0,0 +1,42 @@
+"""
+Full-text search for prompts.
+
+``Prompt.search_vector`` được trigger PostgreSQL (migration 0003) cập nhật
+trên mọi INSERT/UPDATE, kể cả bulk_create và COPY. Tìm kiếm kết hợp
+full-text (GIN trên search_vector) với trigram trên title (GIN
+gin_trgm_ops) để vẫn ra kết quả khi người dùng gõ sai chính tả; PostgreSQL
+gộp hai index bằng BitmapOr trong một truy vấn duy nhất.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, Q
+
+from .models import Prompt
+
+# Phải trùng với config dùng trong trigger core_prompt_search_vector_update
+SEARCH_CONFIG = 'simple'
+
+
+def search_prompts(query, queryset=None):
+    """
+    Search prompts and order them by relevance.
+
+    Args:
+        query: Raw user query (websearch syntax: quotes, OR, -exclude)
+        queryset: Optional base queryset to filter (defaults to all prompts)
+
+    Returns:
+        QuerySet: Matching prompts annotated with ``rank``, best first
+    """
+    if queryset is None:
+        queryset = Prompt.objects.all()
+
+    query = (query or '').strip()
+    if not query:
+        return queryset.none()
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(
+        Q(search_vector=search_query) | Q(title__trigram_similar=query)
+    ).annotate(
+        rank=SearchRank(F('search_vector'), search_query) + TrigramSimilarity('title', query)
+    ).order_by('-rank', '-created_at')
@@ -0,0 +1,457 @@
+"""
+Signal handlers for core app.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.prompthub.models import (
+    Category as HubCategory, Comment as HubComment, Permission, Prompt as HubPrompt, PromptCategory, PromptContent,
+    Role, RolePermission, SystemConfig, UserPromptInteraction,
+)
+
+from . import category_tree, comments, rbac, references, sysconfig
+from .cache import invalidate_for_model
+from .counters import counters_flushed, increment
+from .duplicates import forget_prompt
+from .ratings import apply_rating_delta, rating_change
+from .trending import record_event
+from .rollups import record_purchase
+from .models import Category, MarketplaceStats, Prompt, Purchase, Review, UserActivity
+from .tags import release_prompt_tags, sync_prompt_tags
+from .tasks import check_prompt_duplicates
+
+
+@receiver(post_save, sender=Prompt)
+@receiver(post_delete, sender=Prompt)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Purchase)
+@receiver(post_delete, sender=Purchase)
+def invalidate_home_cache(sender, **kwargs):
+    """Invalidate home page sections once the change is committed."""
+    transaction.on_commit(lambda: invalidate_for_model(sender))
+
+
+# =============================================
+# MarketplaceStats counters
+# =============================================
+
+def _is_published(status):
+    return 1 if status == 'published' else 0
+
+
+def _amount(value):
+    # price_paid có thể là str/float nếu instance chưa được load lại từ DB
+    return Decimal(str(value))
+
+
+@receiver(post_save, sender=Prompt)
+def count_prompt_save(sender, instance, created, **kwargs):
+    """Apply status transitions and download changes to the counters."""
+    if created:
+        old_status, old_downloads = None, 0
+    else:
+        loaded = getattr(instance, '_loaded_values', {})
+        old_status = loaded.get('status', instance.status)
+        old_downloads = loaded.get('downloads', instance.downloads)
+        if 'downloads' not in (kwargs.get('update_fields') or ()):
+            # Prompt.save bỏ bộ đếm khỏi lần ghi cả hàng: downloads không đổi trong DB
+            old_downloads = instance.downloads
+    
+    MarketplaceStats.increment(
+        total_products=_is_published(instance.status) - _is_published(old_status),
+        total_downloads=instance.downloads - old_downloads,
+    )
+
+
+@receiver(post_delete, sender=Prompt)
+def count_prompt_delete(sender, instance, **kwargs):
+    """Remove a deleted prompt from the counters."""
+    MarketplaceStats.increment(
+        total_products=-_is_published(instance.status),
+        total_downloads=-instance.downloads,
+    )
+
+
+def _price_change(purchase, created):
+    if created:
+        return _amount(purchase.price_paid)
+    old_price = getattr(purchase, '_loaded_values', {}).get('price_paid', purchase.price_paid)
+    return _amount(purchase.price_paid) - _amount(old_price)
+
+
+def _buffer_sales(sales, earnings):
+    # Đệm qua Redis sau commit: không khóa dòng pk=1 trong transaction của đơn hàng
+    if not sales and not earnings:
+        return
+
+    def buffer():
+        if sales:
+            increment(MarketplaceStats, 1, 'total_sales', sales)
+        if earnings:
+            increment(MarketplaceStats, 1, 'total_earnings', earnings)
+    transaction.on_commit(buffer)
+
+
+@receiver(post_save, sender=Purchase)
+def count_purchase_save(sender, instance, created, **kwargs):
+    """Count a new purchase or a change of its price."""
+    _buffer_sales(1 if created else 0, _price_change(instance, created))
+
+
+@receiver(post_delete, sender=Purchase)
+def count_purchase_delete(sender, instance, **kwargs):
+    """Remove a deleted purchase from the counters."""
+    _buffer_sales(-1, -_amount(instance.price_paid))
+
+
+@receiver(post_save, sender=Purchase)
+def rollup_purchase_save(sender, instance, created, **kwargs):
+    """Add a new purchase to the sales rollups."""
+    if created:
+        record_purchase(instance)
+
+
+@receiver(post_delete, sender=Purchase)
+def rollup_purchase_delete(sender, instance, **kwargs):
+    """Remove a deleted purchase from the sales rollups."""
+    record_purchase(instance, sign=-1)
+
+
+@receiver(counters_flushed, sender=Prompt)
+def count_flushed_downloads(sender, totals, **kwargs):
+    """Add downloads flushed from Redis (raw UPDATE, no post_save)."""
+    MarketplaceStats.increment(total_downloads=totals.get('downloads', 0))
+
+
+@receiver(post_save, sender=Category)
+def count_category_save(sender, instance, created, **kwargs):
+    """Count a new category."""
+    if created:
+        MarketplaceStats.increment(total_categories=1)
+
+
+@receiver(post_delete, sender=Category)
+def count_category_delete(sender, instance, **kwargs):
+    """Remove a deleted category from the counters."""
+    MarketplaceStats.increment(total_categories=-1)
+
+
+# =============================================
+# Normalized tags
+# =============================================
+
+@receiver(post_save, sender=Prompt)
+def sync_tags_on_prompt_save(sender, instance, created, **kwargs):
+    """Sync tag links when the tags string changed."""
+    if created:
+        changed = bool(instance.tags)
+    else:
+        changed = instance.tags != getattr(instance, '_loaded_values', {}).get('tags', instance.tags)
+    if changed:
+        sync_prompt_tags(instance)
+
+
+@receiver(pre_delete, sender=Prompt)
+def release_tags_on_prompt_delete(sender, instance, **kwargs):
+    """Decrement tag usage counts before the links are cascaded away."""
+    release_prompt_tags(instance)
+
+
+# =============================================
+# UserActivity counters
+# =============================================
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_user_activity(sender, instance, created, **kwargs):
+    """Give every new user an activity row, so sorted user lists can page over UserActivity."""
+    if created:
+        UserActivity.objects.get_or_create(user_id=instance.pk)
+
+
+@receiver(post_save, sender=Prompt)
+def count_author_prompts_save(sender, instance, created, **kwargs):
+    """Count a new prompt for its author, or move it when the author changed."""
+    if created:
+        UserActivity.increment(instance.author_id, prompts_count=1)
+        return
+    previous_author = getattr(instance, '_loaded_values', {}).get('author_id', instance.author_id)
+    if previous_author != instance.author_id:
+        UserActivity.increment(previous_author, prompts_count=-1)
+        UserActivity.increment(instance.author_id, prompts_count=1)
+
+
+@receiver(post_delete, sender=Prompt)
+def count_author_prompts_delete(sender, instance, **kwargs):
+    """Remove a deleted prompt from its author's count."""
+    UserActivity.increment(instance.author_id, prompts_count=-1)
+
+
+def _seller_id(purchase):
+    return Prompt.objects.filter(pk=purchase.prompt_id).values_list('author_id', flat=True).first()
+
+
+@receiver(post_save, sender=Purchase)
+def count_user_purchase_save(sender, instance, created, **kwargs):
+    """Count a new purchase for the buyer and add its price (or price change) to the seller's revenue."""
+    if created:
+        UserActivity.increment(instance.user_id, purchases_count=1)
+    revenue = _price_change(instance, created)
+    if revenue:
+        UserActivity.increment(_seller_id(instance), revenue=revenue)
+
+
+@receiver(post_delete, sender=Purchase)
+def count_user_purchase_delete(sender, instance, **kwargs):
+    """Remove a deleted purchase from the buyer's count and the seller's revenue."""
+    UserActivity.increment(instance.user_id, purchases_count=-1)
+    UserActivity.increment(_seller_id(instance), revenue=-_amount(instance.price_paid))
+
+
+@receiver(post_save, sender=Review)
+def count_user_review_save(sender, instance, created, **kwargs):
+    """Count a new review for its writer."""
+    if created:
+        UserActivity.increment(instance.user_id, reviews_count=1)
+
+
+@receiver(post_delete, sender=Review)
+def count_user_review_delete(sender, instance, **kwargs):
+    """Remove a deleted review from its writer's count."""
+    UserActivity.increment(instance.user_id, reviews_count=-1)
+
+
+# =============================================
+# Rating aggregates
+# =============================================
+
+def _sync_rating(prompt_model, instance, created):
+    loaded = {} if created else getattr(instance, '_loaded_values', {})
+    old_rating = loaded.get('rating')
+    old_prompt = loaded.get('prompt_id', instance.prompt_id)
+    if old_prompt != instance.prompt_id:
+        apply_rating_delta(prompt_model, old_prompt, *rating_change(old_rating, None))
+        old_rating = None
+    apply_rating_delta(prompt_model, instance.prompt_id, *rating_change(old_rating, instance.rating))
+    instance._loaded_values = {'rating': instance.rating, 'prompt_id': instance.prompt_id}
+
+
+@receiver(post_save, sender=Review)
+def rate_on_review_save(sender, instance, created, **kwargs):
+    """Add a new or edited review to the prompt's rating aggregates."""
+    _sync_rating(Prompt, instance, created)
+
+
+@receiver(post_delete, sender=Review)
+def rate_on_review_delete(sender, instance, **kwargs):
+    """Remove a deleted review from the prompt's rating aggregates."""
+    apply_rating_delta(Prompt, instance.prompt_id, *rating_change(instance.rating, None))
+
+
+@receiver(post_save, sender=UserPromptInteraction)
+def rate_on_interaction_save(sender, instance, created, **kwargs):
+    """Track UserPromptInteraction.rating changes (None = not rated)."""
+    _sync_rating(HubPrompt, instance, created)
+
+
+@receiver(post_delete, sender=UserPromptInteraction)
+def rate_on_interaction_delete(sender, instance, **kwargs):
+    """Remove a deleted interaction's rating from the prompt's aggregates."""
+    apply_rating_delta(HubPrompt, instance.prompt_id, *rating_change(instance.rating, None))
+
+
+# =============================================
+# Trending events
+# =============================================
+
+@receiver(post_save, sender=Purchase)
+@receiver(post_save, sender=Review)
+def record_trending_event(sender, instance, created, **kwargs):
+    """Feed new purchases and reviews into the trending scores."""
+    if created:
+        kind = 'purchase' if sender is Purchase else 'review'
+        transaction.on_commit(lambda: record_event(instance.prompt_id, kind))
+
+
+# =============================================
+# Duplicate detection
+# =============================================
+
+def _queue_duplicate_check(source, object_id, update_fields, text_fields):
+    # save(update_fields=[...]) không chạm nội dung thì bỏ qua
+    if update_fields is not None and not text_fields & set(update_fields):
+        return
+    transaction.on_commit(lambda: check_prompt_duplicates.delay(source, str(object_id)))
+
+
+@receiver(post_save, sender=Prompt)
+def check_duplicates_on_prompt_save(sender, instance, update_fields=None, **kwargs):
+    """Check a saved marketplace prompt for near-duplicates in Celery."""
+    _queue_duplicate_check('core.prompt', instance.pk, update_fields, {'description', 'content'})
+
+
+@receiver(post_save, sender=PromptContent)
+def check_duplicates_on_content_save(sender, instance, update_fields=None, **kwargs):
+    """Check saved PromptHub content for near-duplicates in Celery."""
+    _queue_duplicate_check(
+        'prompthub.prompt', instance.prompt_id, update_fields, {'prompt_text', 'usage_guide', 'example_input'}
+    )
+
+
+@receiver(post_delete, sender=Prompt)
+def forget_deleted_prompt(sender, instance, **kwargs):
+    """Drop the fingerprint and pending duplicate candidates of a deleted marketplace prompt."""
+    forget_prompt('core.prompt', str(instance.pk))
+
+
+@receiver(post_delete, sender=PromptContent)
+def forget_deleted_content(sender, instance, **kwargs):
+    """Drop the fingerprint and pending duplicate candidates of a PromptHub prompt whose content was deleted."""
+    forget_prompt('prompthub.prompt', instance.prompt_id)
+
+
+# =============================================
+# PromptHub category tree
+# =============================================
+
+@receiver(pre_save, sender=HubCategory)
+def place_category(sender, instance, **kwargs):
+    """Compute the materialized path of a new or re-parented category."""
+    loaded = getattr(instance, '_loaded_values', {})
+    if (
+        instance._state.adding or not instance.path
+        or loaded.get('parent_category_id') != instance.parent_category_id
+    ):
+        category_tree.place(instance)
+
+
+@receiver(post_save, sender=HubCategory)
+def move_category(sender, instance, created, **kwargs):
+    """Carry descendants and subtree counts along when a category changed parent."""
+    loaded = {} if created else getattr(instance, '_loaded_values', {})
+    old_path = loaded.get('path')
+    if old_path and old_path != instance.path:
+        category_tree.move_subtree(instance, old_path, loaded['depth'])
+    instance._loaded_values = {
+        'parent_category_id': instance.parent_category_id, 'path': instance.path, 'depth': instance.depth,
+    }
+    transaction.on_commit(category_tree.invalidate)
+
+
+@receiver(post_delete, sender=HubCategory)
+def rebuild_categories_on_delete(sender, instance, **kwargs):
+    """Children were re-rooted by SET_NULL (no signals): recompute paths and counts."""
+    category_tree.rebuild()
+    transaction.on_commit(category_tree.invalidate)
+
+
+@receiver(post_save, sender=PromptCategory)
+def count_category_link_save(sender, instance, created, **kwargs):
+    """Apply link creation, activation and category changes to the subtree counts."""
+    if created:
+        old_category, old_active = None, False
+    else:
+        loaded = getattr(instance, '_loaded_values', {})
+        old_category = loaded.get('category_id', instance.category_id)
+        old_active = loaded.get('active', instance.active)
+    if (old_category, old_active) != (instance.category_id, instance.active):
+        if old_active:
+            category_tree.add_prompt(old_category, instance.prompt_id, -1, instance.pk)
+        if instance.active:
+            category_tree.add_prompt(instance.category_id, instance.prompt_id, 1, instance.pk)
+    instance._loaded_values = {'category_id': instance.category_id, 'active': instance.active}
+
+
+@receiver(post_delete, sender=PromptCategory)
+def count_category_link_delete(sender, instance, origin=None, **kwargs):
+    """Remove a deleted link from the counts, once per ancestor when a prompt's links go together."""
+    if getattr(instance, '_loaded_values', {}).get('active', instance.active):
+        # Mọi signal của một lần delete() dùng chung ``origin`` (prompt hoặc queryset bị xóa)
+        uncounted = vars(origin).setdefault('_uncounted_categories', {}) if origin is not None else {}
+        category_tree.add_prompt(
+            instance.category_id, instance.prompt_id, -1, instance.pk,
+            counted=uncounted.setdefault(instance.prompt_id, set()),
+        )
+
+
+# =============================================
+# PromptHub comment threads
+# =============================================
+
+@receiver(pre_save, sender=HubComment)
+def place_comment(sender, instance, **kwargs):
+    """Set the thread root and depth of a new comment."""
+    if instance._state.adding:
+        comments.place_reply(instance)
+
+
+@receiver(post_save, sender=HubComment)
+def count_reply_save(sender, instance, created, **kwargs):
+    """Keep the parent's reply_count in step with visible replies."""
+    old_visible = False if created else getattr(instance, '_loaded_values', {}).get('status', instance.status) == 1
+    visible = instance.status == 1
+    if instance.parent_comment_id and old_visible != visible:
+        comments.add_replies(instance.parent_comment_id, 1 if visible else -1)
+    instance._loaded_values = {'status': instance.status}
+
+
+@receiver(post_delete, sender=HubComment)
+def count_reply_delete(sender, instance, **kwargs):
+    """Remove a deleted visible reply from its parent's reply_count."""
+    if instance.parent_comment_id and getattr(instance, '_loaded_values', {}).get('status', instance.status) == 1:
+        comments.add_replies(instance.parent_comment_id, -1)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+def invalidate_permissions(sender, **kwargs):
+    """Recompile role permissions after the change is committed."""
+    transaction.on_commit(rbac.invalidate)
+
+
+@receiver(post_save, sender=SystemConfig)
+@receiver(post_delete, sender=SystemConfig)
+def invalidate_system_config(sender, **kwargs):
+    """Reload the typed config in every process after the change is committed."""
+    transaction.on_commit(sysconfig.invalidate)
+
+
+def invalidate_references(sender, **kwargs):
+    """Reload the reference-data registry after the change is committed."""
+    transaction.on_commit(references.invalidate)
+
+
+for _model in references.MODEL_TABLES:
+    post_save.connect(invalidate_references, sender=_model, dispatch_uid=f'references:save:{_model.__name__}')
+    post_delete.connect(invalidate_references, sender=_model, dispatch_uid=f'references:delete:{_model.__name__}')
+
+
+@receiver(post_save, sender=Prompt)
+def remember_loaded_values(sender, instance, **kwargs):
+    """
+    Reset the values used for change detection after a save.
+    Must stay the last post_save receiver for Prompt.
+    """
+    instance._loaded_values = {
+        'status': instance.status,
+        'downloads': instance.downloads,
+        'tags': instance.tags,
+        'author_id': instance.author_id,
+    }
+
+
+@receiver(post_save, sender=Purchase)
+def remember_purchase_price(sender, instance, **kwargs):
+    """
+    Reset the price used for change detection after a save.
+    Must stay the last post_save receiver for Purchase.
+    """
+    instance._loaded_values = {'price_paid': instance.price_paid}
@@ -0,0 +1,142 @@
+"""
+Typed, process-local copy of ``prompthub.SystemConfig``.
+
+Toàn bộ bảng system_config được nạp một lần (một truy vấn), ép kiểu theo
+``config_type`` và giữ trong process dưới dạng bất biến (MappingProxyType,
+tuple thay cho list), nên ``get('max_upload_mb')`` chỉ là một phép tra dict.
+Bản nạp dùng chung qua ``apps.core.versioned``: signals tăng phiên bản sau
+khi SystemConfig thay đổi, mọi process gunicorn/Celery nhận ra sau tối đa
+LOCAL_CACHE_CHECK_INTERVAL giây.
+
+Các khóa ``is_public`` được tuần tự hóa sẵn thành JSON (kèm ETag) cho
+endpoint ``/api/config/``.
+"""
+import hashlib
+import json
+import logging
+from decimal import Decimal, InvalidOperation
+from types import MappingProxyType
+
+from apps.prompthub.models import SystemConfig
+
+from .versioned import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'off', ''}
+
+
+def _bool(value):
+    value = value.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f'not a boolean: {value!r}')
+
+
+def freeze(value):
+    """Immutable copy of decoded JSON."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def _decimal(value):
+    try:
+        return Decimal(value.strip())
+    except InvalidOperation:
+        raise ValueError(f'not a decimal: {value!r}')
+
+
+# config_type -> hàm ép kiểu từ chuỗi
+PARSERS = {
+    'string': str,
+    'text': str,
+    'int': int,
+    'integer': int,
+    'float': float,
+    'decimal': _decimal,
+    'bool': _bool,
+    'boolean': _bool,
+    'json': lambda value: freeze(json.loads(value)),
+}
+
+
+def parse_value(value, config_type):
+    """
+    Convert a stored config_value to its Python type.
+
+    Raises:
+        ValueError: Unknown config_type or a value that does not parse
+    """
+    if value is None:
+        return None
+    parser = PARSERS.get((config_type or 'string').lower())
+    if parser is None:
+        raise ValueError(f'unknown config_type: {config_type!r}')
+    return parser(value)
+
+
+def _json_default(value):
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class ConfigSnapshot:
+    """
+    All config values, the public subset and its JSON encoding.
+
+    Pickle (khi lưu vào Redis) chỉ giữ các dòng gốc; giá trị được ép kiểu lại
+    khi load vì MappingProxyType không pickle được.
+    """
+
+    __slots__ = ('rows', 'values', 'public', 'public_json', 'etag')
+
+    def __init__(self, rows):
+        self.rows = tuple(rows)
+        values, public = {}, {}
+        for key, value, config_type, is_public in self.rows:
+            try:
+                values[key] = parse_value(value, config_type)
+            except ValueError as exc:
+                logger.warning('Ignoring system config %s: %s', key, exc)
+                continue
+            if is_public:
+                public[key] = values[key]
+        self.values = MappingProxyType(values)
+        self.public = MappingProxyType(public)
+        self.public_json = json.dumps(
+            public, default=_json_default, ensure_ascii=False, sort_keys=True, separators=(',', ':')
+        ).encode()
+        self.etag = hashlib.sha1(self.public_json).hexdigest()
+
+    def __reduce__(self):
+        return ConfigSnapshot, (self.rows,)
+
+
+def load():
+    """Build a ConfigSnapshot with one query (rows that do not parse are logged and skipped)."""
+    return ConfigSnapshot(
+        SystemConfig.objects.values_list('config_key', 'config_value', 'config_type', 'is_public')
+    )
+
+
+snapshots = VersionedCache('sysconfig', load)
+invalidate = snapshots.invalidate
+
+
+def get(key, default=None):
+    """Typed value of a SystemConfig key (``default`` if missing or invalid)."""
+    return snapshots.get().values.get(key, default)
+
+
+def public_config():
+    """The snapshot whose ``public``/``public_json``/``etag`` back the public endpoint."""
+    return snapshots.get()
@@ -0,0 +1,89 @@
+"""
+Normalized tag storage for marketplace prompts.
+
+``Prompt.tags`` (chuỗi phân cách dấu phẩy) vẫn là input cho admin/form và
+full-text search; mỗi lần lưu, danh sách tag được đồng bộ sang bảng
+``tags`` của prompthub qua through-table ``core.PromptTag``. ``usage_count``
+được cập nhật tăng/giảm theo từng liên kết thay đổi, nên tag cloud chỉ cần
+đọc index trên usage_count.
+"""
+from django.db.models import F
+from django.utils.text import slugify
+
+from apps.prompthub.models import Tag
+
+from .models import PromptTag
+
+
+def parse_tags(value):
+    """
+    Parse a comma-separated tag string.
+
+    Returns:
+        dict: slug -> display name, in input order, without duplicates
+    """
+    tags = {}
+    for name in (value or '').split(','):
+        name = name.strip()[:30]
+        slug = slugify(name)[:50]
+        if slug and slug not in tags:
+            tags[slug] = name
+    return tags
+
+
+def _get_or_create_tags(tags):
+    """Return tag ids for the given slug -> name mapping, creating missing tags."""
+    tag_ids = dict(Tag.objects.filter(tag_slug__in=tags).values_list('tag_slug', 'id_tag'))
+    missing = [Tag(tag_name=name, tag_slug=slug) for slug, name in tags.items() if slug not in tag_ids]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        tag_ids.update(
+            Tag.objects.filter(tag_slug__in=[tag.tag_slug for tag in missing])
+            .values_list('tag_slug', 'id_tag')
+        )
+    return tag_ids
+
+
+def sync_prompt_tags(prompt):
+    """Make the prompt's tag links match ``prompt.tags``."""
+    wanted = parse_tags(prompt.tags)
+    current = dict(
+        PromptTag.objects.filter(prompt=prompt).values_list('tag__tag_slug', 'tag_id')
+    )
+    
+    removed = [tag_id for slug, tag_id in current.items() if slug not in wanted]
+    if removed:
+        PromptTag.objects.filter(prompt=prompt, tag_id__in=removed).delete()
+        Tag.objects.filter(id_tag__in=removed).update(usage_count=F('usage_count') - 1)
+    
+    added = {slug: name for slug, name in wanted.items() if slug not in current}
+    if added:
+        tag_ids = _get_or_create_tags(added)
+        PromptTag.objects.bulk_create(
+            [PromptTag(prompt=prompt, tag_id=tag_ids[slug]) for slug in added],
+            ignore_conflicts=True,
+        )
+        Tag.objects.filter(id_tag__in=[tag_ids[slug] for slug in added]).update(
+            usage_count=F('usage_count') + 1
+        )
+
+
+def release_prompt_tags(prompt):
+    """Decrement usage counts for a prompt that is about to be deleted."""
+    Tag.objects.filter(marketplace_prompt_links__prompt=prompt).update(
+        usage_count=F('usage_count') - 1
+    )
+
+
+def filter_by_tag(queryset, slug):
+    """Filter a Prompt queryset by tag slug (index on core_prompttag.tag_id)."""
+    return queryset.filter(tag_links__tag__tag_slug=slug)
+
+
+def tag_cloud(limit=30):
+    """Most used active tags, read from the usage_count index."""
+    return list(
+        Tag.objects.filter(active=True, usage_count__gt=0)
+        .order_by('-usage_count')
+        .values('tag_name', 'tag_slug', 'usage_count')[:limit]
+    )
@@ -0,0 +1,173 @@
+"""
+Celery tasks for core app.
+"""
+from celery import shared_task
+
+# Mốc thời gian của lần build/refresh recommendations gần nhất
+RECOMMENDATIONS_REFRESHED_KEY = 'recommendations:refreshed_at'
+
+
+@shared_task
+def reconcile_marketplace_stats():
+    """
+    Recompute MarketplaceStats from the source tables.
+    Fixes drift from bulk updates that bypass signals.
+    
+    Returns:
+        str: Status message
+    """
+    from apps.core.models import MarketplaceStats
+    
+    stats = MarketplaceStats.reconcile()
+    return f'Marketplace stats reconciled: {stats.total_sales} sales, {stats.total_products} products'
+
+
+@shared_task
+def reconcile_user_activity():
+    """
+    Recompute UserActivity counters from the source tables.
+    
+    Returns:
+        str: Status message
+    """
+    from apps.core.models import UserActivity
+    
+    updated = UserActivity.reconcile()
+    return f'User activity reconciled for {updated} users'
+
+
+@shared_task
+def refresh_sales_rollups(days=2):
+    """
+    Rebuild the sales rollups of the last ``days`` days.
+    Fixes drift from bulk changes that bypass signals.
+    
+    Returns:
+        str: Status message
+    """
+    from datetime import timedelta
+    from django.utils import timezone
+    from apps.core.rollups import rebuild_rollups
+    
+    today = timezone.localdate()
+    rows = rebuild_rollups(today - timedelta(days=days - 1), today)
+    return f'Sales rollups refreshed: {rows} rows'
+
+
+@shared_task
+def flush_counters():
+    """
+    Flush buffered view/download counters from Redis to the database.
+    
+    Returns:
+        str: Status message
+    """
+    from apps.core.counters import flush_counters as flush
+    
+    flushed = flush()
+    return f'Counters flushed: {flushed}'
+
+
+@shared_task
+def prune_counter_flushes(days=7):
+    """
+    Delete CounterFlush log entries older than ``days`` days.
+    
+    Returns:
+        str: Status message
+    """
+    from datetime import timedelta
+    from django.utils import timezone
+    from apps.core.models import CounterFlush
+    
+    deleted, _ = CounterFlush.objects.filter(
+        flushed_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return f'Pruned {deleted} counter flush entries'
+
+
+@shared_task
+def refresh_trending():
+    """
+    Rebase trending scores and publish the new top-N snapshot.
+    
+    Returns:
+        str: Status message
+    """
+    from apps.core.cache import invalidate_sections
+    from apps.core.trending import refresh_trending as refresh
+    
+    top_ids, changed = refresh()
+    if changed:
+        invalidate_sections(['trending_prompts'])
+    return f'Trending refreshed: {len(top_ids)} prompts, changed={changed}'
+
+
+@shared_task
+def build_recommendations():
+    """
+    Recompute "users also liked" lists for every prompt.
+    
+    Returns:
+        str: Status message
+    """
+    from django.core.cache import cache
+    from django.utils import timezone
+    from apps.core.recommendations import build_similarities
+    
+    started = timezone.now()
+    count = build_similarities()
+    cache.set(RECOMMENDATIONS_REFRESHED_KEY, started, timeout=None)
+    return f'Recommendations built for {count} prompts'
+
+
+@shared_task
+def refresh_recommendations():
+    """
+    Update "users also liked" lists of prompts with new interactions.
+    
+    Returns:
+        str: Status message
+    """
+    from datetime import timedelta
+    from django.core.cache import cache
+    from django.utils import timezone
+    from apps.core.recommendations import refresh_similarities
+    
+    started = timezone.now()
+    since = cache.get(RECOMMENDATIONS_REFRESHED_KEY) or started - timedelta(days=1)
+    count = refresh_similarities(since)
+    cache.set(RECOMMENDATIONS_REFRESHED_KEY, started, timeout=None)
+    return f'Recommendations refreshed for {count} prompts'
+
+
+@shared_task
+def check_prompt_duplicates(source, object_id):
+    """
+    Fingerprint a saved prompt and queue near-duplicates for moderation.
+    
+    Returns:
+        str: Status message
+    """
+    from apps.core.duplicates import check_prompt
+    
+    flagged = check_prompt(source, object_id)
+    return f'{source}:{object_id}: {len(flagged)} possible duplicates'
+
+
+@shared_task
+def send_outbox():
+    """
+    Send due emails from the outbox (see apps.core.mail).
+    
+    Returns:
+        str: Status message
+    """
+    from apps.core.mail import drain
+    
+    result = drain()
+    rate = result['sent'] / result['seconds'] if result['seconds'] else 0
+    return (
+        f"Outbox drained: {result['sent']} sent, {result['retried']} retried, {result['failed']} failed "
+        f"in {result['seconds']}s ({rate:.1f}/s)"
+    )
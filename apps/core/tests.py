@@ -0,0 +1,1560 @@
+"""
+Test suite for core app.
+"""
+import gzip
+import json
+import os
+import tempfile
+import re
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import urlencode
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from apps.prompthub.models import (
+    AIModel, AIPlatform, Category as HubCategory, Comment as HubComment, Permission, Prompt as HubPrompt, PromptAIModel,
+    PromptCategory as HubPromptCategory, PromptContent, PromptSimilarity, PromptTag as HubPromptTag, Role, RolePermission,
+    PromptLevel, SystemConfig, Tag, UserPromptInteraction,
+)
+
+from apps.api.tasks import generate_report, send_welcome_email
+
+from . import (
+    bulk_import, category_tree, comments, counters, geoip, mail as outbox, rbac, factories, references, sysconfig,
+    trending, urls, urls_dashboard,
+)
+from .cache import HOME_SECTIONS
+from .content_index import build_index, get_index, prompt_documents
+from .duplicates import check_prompt
+from .metrics import registry
+from .models import (
+    Category, CounterFlush, DuplicateCandidate, ImportBatch, MarketplaceStats, OutboxEmail, Prompt, PromptFingerprint,
+    Purchase, Review, SalesRollup, UserActivity,
+)
+from .pagination import KeysetPaginator
+from .ratings import RATING_FIELDS, reconcile_ratings
+from .recommendations import build_similarities, refresh_similarities
+from .geoip import CountryTable, client_ip, ip_to_int
+from .rollups import LOCK_CLASS_ID, rebuild_rollups, sales_series, top_countries
+from .search import search_prompts
+from .tasks import check_prompt_duplicates
+from .tags import filter_by_tag, tag_cloud
+
+User = get_user_model()
+
+
+class HomeCacheTests(TestCase):
+    """Tests for the home page section cache."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='seller',
+            email='seller@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Writing')
+        self.prompt = self.create_prompt('Email Writer')
+
+    def create_prompt(self, title, **kwargs):
+        """Create a published prompt."""
+        return Prompt.objects.create(
+            title=title,
+            description='Description',
+            content='Content',
+            category=self.category,
+            price=10,
+            status='published',
+            thumbnail='prompts/thumbnails/test.png',
+            author=self.author,
+            **kwargs
+        )
+
+    def test_warm_home_page_runs_no_queries(self):
+        """Test a warm home page is served from the cache only."""
+        self.client.get('/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_products'], 1)
+
+    def test_prompt_change_invalidates_sections(self):
+        """Test saving a prompt refreshes the cached sections."""
+        self.client.get('/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_prompt('Blog Writer')
+        response = self.client.get('/')
+        self.assertEqual(response.context['total_products'], 2)
+        self.assertEqual(len(response.context['new_arrivals']), 2)
+
+
+class MarketplaceStatsTests(TestCase):
+    """Tests for the MarketplaceStats counters."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='seller',
+            email='seller@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Writing')
+        self.prompt = Prompt.objects.create(
+            title='Email Writer',
+            description='Description',
+            content='Content',
+            category=self.category,
+            price=10,
+            thumbnail='prompts/thumbnails/test.png',
+            author=self.user,
+        )
+
+    def test_prompt_status_transitions(self):
+        """Test publishing and unpublishing a prompt updates the counter."""
+        self.assertEqual(MarketplaceStats.load().total_products, 0)
+
+        prompt = Prompt.objects.get(pk=self.prompt.pk)
+        prompt.status = 'published'
+        prompt.save()
+        self.assertEqual(MarketplaceStats.load().total_products, 1)
+
+        prompt.status = 'suspended'
+        prompt.save()
+        self.assertEqual(MarketplaceStats.load().total_products, 0)
+
+    def test_purchase_counters(self):
+        """Test purchases reach sales and earnings through the buffered counters, without locking the row."""
+        counters.get_redis_connection('default').delete(counters._key('core.marketplacestats'))
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            purchase = Purchase.objects.create(
+                user=self.user, prompt=self.prompt, price_paid='9.50', transaction_id='TX1'
+            )
+        self.assertFalse([q for q in queries if 'core_marketplacestats' in q['sql']])
+        self.assertEqual(MarketplaceStats.load().total_sales, 0)
+        self.assertEqual(counters.pending(MarketplaceStats, 1, 'total_earnings'), Decimal('9.50'))
+        counters.flush_counters()
+        stats = MarketplaceStats.load()
+        self.assertEqual((stats.total_sales, stats.total_earnings), (1, Decimal('9.50')))
+
+        # Sửa giá chỉ cộng phần chênh lệch
+        purchase = Purchase.objects.get(pk=purchase.pk)
+        purchase.price_paid = Decimal('12.25')
+        with self.captureOnCommitCallbacks(execute=True):
+            purchase.save()
+            purchase.save()
+        counters.flush_counters()
+        stats = MarketplaceStats.load()
+        self.assertEqual((stats.total_sales, stats.total_earnings), (1, Decimal('12.25')))
+        self.assertEqual(UserActivity.objects.get(user=self.user).revenue, Decimal('12.25'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            purchase.delete()
+        counters.flush_counters()
+        stats = MarketplaceStats.load()
+        self.assertEqual((stats.total_sales, stats.total_earnings), (0, 0))
+
+    def test_reconcile_fixes_drift(self):
+        """Test reconcile recomputes the counters from source tables."""
+        MarketplaceStats.objects.filter(pk=1).update(total_categories=42)
+        self.assertEqual(MarketplaceStats.reconcile().total_categories, 1)
+
+    def test_reconcile_does_not_double_count_buffered_sales(self):
+        """Test purchases still buffered in Redis are counted once by reconcile and the next flush."""
+        counters.get_redis_connection('default').delete(counters._key('core.marketplacestats'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Purchase.objects.create(user=self.user, prompt=self.prompt, price_paid='9.50', transaction_id='TX1')
+        MarketplaceStats.reconcile()
+        counters.flush_counters()
+        stats = MarketplaceStats.load()
+        self.assertEqual(stats.total_sales, Purchase.objects.count())
+        self.assertEqual(stats.total_earnings, Decimal('9.50'))
+
+        # Đơn đến sau lần flush của reconcile: được trừ khỏi giá trị tính lại, cộng lại ở lần flush sau
+        with self.captureOnCommitCallbacks(execute=True):
+            Purchase.objects.create(user=self.user, prompt=self.prompt, price_paid='1.25', transaction_id='TX2')
+        with mock.patch.object(counters, '_drain'):
+            MarketplaceStats.reconcile()
+        counters.flush_counters()
+        stats = MarketplaceStats.load()
+        self.assertEqual(stats.total_sales, Purchase.objects.count())
+        self.assertEqual(stats.total_earnings, Decimal('10.75'))
+
+
+class UserActivityTests(TestCase):
+    """Tests for the per-user activity counters."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.seller = User.objects.create_user(
+            username='seller', email='seller@example.com', password='testpass123'
+        )
+        self.buyer = User.objects.create_user(
+            username='buyer', email='buyer@example.com', password='testpass123'
+        )
+        self.prompt = Prompt.objects.create(
+            title='Email Writer', description='Description', content='Content',
+            category=Category.objects.create(name='Writing'), price=10,
+            thumbnail='prompts/thumbnails/test.png', author=self.seller
+        )
+
+    def test_counters_follow_changes(self):
+        """Test prompts, purchases and reviews update both sides."""
+        purchase = Purchase.objects.create(
+            user=self.buyer, prompt=self.prompt, price_paid='9.50', transaction_id='TX1'
+        )
+        Review.objects.create(user=self.buyer, prompt=self.prompt, rating=5, comment='Great')
+
+        seller, buyer = UserActivity.objects.get(user=self.seller), UserActivity.objects.get(user=self.buyer)
+        self.assertEqual((seller.prompts_count, float(seller.revenue)), (1, 9.5))
+        self.assertEqual((buyer.purchases_count, buyer.reviews_count), (1, 1))
+
+        purchase.delete()
+        self.prompt.delete()
+        seller, buyer = UserActivity.objects.get(user=self.seller), UserActivity.objects.get(user=self.buyer)
+        self.assertEqual((seller.prompts_count, float(seller.revenue)), (0, 0))
+        self.assertEqual((buyer.purchases_count, buyer.reviews_count), (0, 0))
+
+    def test_reconcile_fixes_drift(self):
+        """Test reconcile recreates missing rows and recomputes counters."""
+        UserActivity.objects.filter(user=self.buyer).delete()
+        UserActivity.objects.filter(user=self.seller).update(prompts_count=42)
+        UserActivity.reconcile()
+        self.assertEqual(UserActivity.objects.get(user=self.seller).prompts_count, 1)
+        self.assertTrue(UserActivity.objects.filter(user=self.buyer).exists())
+
+    def test_users_list_sorted_by_revenue(self):
+        """Test the users page sorts by an activity counter in constant queries."""
+        Purchase.objects.create(user=self.buyer, prompt=self.prompt, price_paid=10, transaction_id='TX1')
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        self.client.force_login(admin)
+        response = self.client.get('/dashboard/users/?sort=revenue')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['users'])[0], self.seller)
+        self.assertEqual(response.context['users'][0].activity.revenue, 10)
+
+
+class SalesRollupTests(TestCase):
+    """Tests for the daily/monthly sales rollups."""
+
+    def setUp(self):
+        """Set up purchases on two different days."""
+        self.seller = User.objects.create_user(
+            username='seller', email='seller@example.com', password='testpass123'
+        )
+        self.prompt = Prompt.objects.create(
+            title='Email Writer', description='Description', content='Content',
+            category=Category.objects.create(name='Writing'), price=10,
+            thumbnail='prompts/thumbnails/test.png', author=self.seller
+        )
+        self.today = timezone.localdate()
+        for i in range(3):
+            Purchase.objects.create(
+                user=self.seller, prompt=self.prompt, price_paid='5.25', transaction_id=f'TX{i}'
+            )
+
+    def snapshot(self):
+        return sorted(SalesRollup.objects.values_list(
+            'period', 'period_start', 'scope', 'scope_id', 'items_count', 'amount'
+        ))
+
+    def test_incremental_updates(self):
+        """Test each purchase is added to every bucket as it is created."""
+        day = SalesRollup.objects.get(period='day', scope='seller', scope_id=self.seller.pk)
+        self.assertEqual((day.items_count, float(day.amount)), (3, 15.75))
+        self.assertEqual(SalesRollup.objects.count(), 10)
+
+        Purchase.objects.first().delete()
+        self.assertEqual(list(sales_series())[0]['items_count'], 2)
+
+    def test_rebuild_matches_incremental(self):
+        """Test rebuilding from Purchase gives the same rows as the signals."""
+        expected = self.snapshot()
+        SalesRollup.objects.all().delete()
+        rebuild_rollups(self.today - timedelta(days=1), self.today)
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_rebuild_fixes_drift(self):
+        """Test a rebuild picks up changes made with queryset.update()."""
+        Purchase.objects.filter(transaction_id='TX0').update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        rebuild_rollups(self.today - timedelta(days=1), self.today)
+        self.assertEqual([row['items_count'] for row in sales_series()], [1, 2])
+
+    def test_rebuild_and_purchases_share_month_locks(self):
+        """Test purchases hold the month lock shared and a rebuild holds every month exclusively."""
+        sql = "SELECT mode, objid FROM pg_locks WHERE locktype = 'advisory' AND classid = %s AND pid = pg_backend_pid()"
+        month = self.today.year * 12 + self.today.month - 1
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [LOCK_CLASS_ID])
+            self.assertEqual(cursor.fetchall(), [('ShareLock', month)])
+            rebuild_rollups(self.today - timedelta(days=40), self.today)
+            cursor.execute(sql, [LOCK_CLASS_ID])
+            locks = cursor.fetchall()
+        self.assertIn(('ExclusiveLock', month), locks)
+        self.assertIn(('ExclusiveLock', month - 1), locks)
+
+    def test_top_countries(self):
+        """Test revenue is grouped by the purchase country."""
+        Purchase.objects.create(
+            user=self.seller, prompt=self.prompt, price_paid=20, transaction_id='TX-VN', country='VN'
+        )
+        Purchase.objects.create(
+            user=self.seller, prompt=self.prompt, price_paid=5, transaction_id='TX-US', country='US'
+        )
+        countries = top_countries(since=self.today)
+        self.assertEqual([country['code'] for country in countries], ['VN', 'US'])
+        self.assertEqual(countries[0]['name'], 'Vietnam')
+
+    def test_dashboard_reads_rollups(self):
+        """Test the dashboard chart is built from the rollups."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        self.client.force_login(admin)
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['sales_data'], [15.75])
+
+
+class GeoIPTests(TestCase):
+    """Tests for the offline IP -> country table."""
+
+    def setUp(self):
+        """Build a table with a gap, adjacent ranges and an overlap."""
+        self.table = CountryTable([
+            (ip_to_int('5.0.0.0'), ip_to_int('5.0.0.255'), 'de'),
+            (ip_to_int('1.0.0.0'), ip_to_int('1.0.0.255'), 'AU'),
+            (ip_to_int('1.0.1.0'), ip_to_int('1.0.3.255'), 'CN'),
+            (ip_to_int('1.0.2.0'), ip_to_int('1.0.2.255'), 'JP'),
+        ])
+
+    def test_lookup(self):
+        """Test addresses inside, between and outside the ranges."""
+        cases = {
+            '1.0.0.0': 'AU', '1.0.0.255': 'AU', '1.0.1.0': 'CN', '1.0.2.7': 'CN',
+            '1.0.4.0': '', '5.0.0.9': 'DE', '0.0.0.1': '', '255.255.255.255': '',
+        }
+        for ip, country in cases.items():
+            self.assertEqual(self.table.lookup(ip_to_int(ip)), country, ip)
+
+    def test_invalid_address(self):
+        """Test non-IPv4 input is rejected before the lookup."""
+        self.assertIsNone(ip_to_int('::1'))
+        self.assertIsNone(ip_to_int('not-an-ip'))
+
+    def test_client_ip_trusted_proxies(self):
+        """Test only the hop added by the trusted proxy is used, not a spoofed left-most one."""
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.0.0.7', REMOTE_ADDR='10.0.0.1')
+        with self.settings(GEOIP_TRUSTED_PROXIES=0):
+            self.assertEqual(client_ip(request), '10.0.0.1')
+        with self.settings(GEOIP_TRUSTED_PROXIES=1):
+            self.assertEqual(client_ip(request), '1.0.0.7')
+        with self.settings(GEOIP_TRUSTED_PROXIES=3):
+            self.assertEqual(client_ip(request), '10.0.0.1')
+
+    def test_missing_csv_is_logged(self):
+        """Test an unreadable GEOIP_COUNTRY_CSV is an error and leaves the table empty."""
+        self.addCleanup(setattr, geoip, '_table', None)
+        geoip._table = None
+        with self.settings(GEOIP_COUNTRY_CSV='/nonexistent/ip_country.csv'), \
+                self.assertLogs('apps.core.geoip', 'ERROR'):
+            self.assertEqual(geoip.lookup_country('1.0.0.7'), '')
+
+
+class BufferedCounterTests(TestCase):
+    """Tests for Redis-buffered view/download counters."""
+
+    def setUp(self):
+        """Set up a prompt and empty counter hashes."""
+        self.redis = counters.get_redis_connection('default')
+        self.redis.delete(*[counters._key(label) for label in counters.COUNTER_FIELDS])
+        self.redis.delete(*[f'{counters._key(label)}:draining' for label in counters.COUNTER_FIELDS])
+        user = User.objects.create_user(
+            username='seller', email='seller@example.com', password='testpass123'
+        )
+        self.prompt = Prompt.objects.create(
+            title='Email Writer', description='Description', content='Content',
+            category=Category.objects.create(name='Writing'), price=10,
+            thumbnail='prompts/thumbnails/test.png', author=user
+        )
+
+    def test_flush_applies_increments(self):
+        """Test buffered increments reach the row in one flush."""
+        for _ in range(5):
+            counters.increment(Prompt, self.prompt.pk, 'views')
+        counters.increment(Prompt, self.prompt.pk, 'downloads', 3)
+        self.assertEqual(counters.pending(Prompt, self.prompt.pk, 'views'), 5)
+
+        with CaptureQueriesContext(connection) as queries:
+            counters._drain('core.prompt')
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "core_prompt"')]
+        self.assertEqual(len(updates), 1)
+        self.prompt.refresh_from_db()
+        self.assertEqual((self.prompt.views, self.prompt.downloads), (5, 3))
+        self.assertEqual(MarketplaceStats.load().total_downloads, 3)
+        self.assertEqual(counters.pending(Prompt, self.prompt.pk, 'views'), 0)
+
+    def test_applied_batch_is_not_replayed(self):
+        """Test a batch left in Redis after its commit is discarded."""
+        counters.increment(Prompt, self.prompt.pk, 'views', 4)
+        counters.flush_counters()
+        CounterFlush.objects.create(batch_id='crashed', model_label='core.prompt')
+        draining = f"{counters._key('core.prompt')}:draining"
+        self.redis.hset(draining, mapping={f'{self.prompt.pk}:views': 4, counters.BATCH_FIELD: 'crashed'})
+
+        counters.flush_counters()
+        self.prompt.refresh_from_db()
+        self.assertEqual(self.prompt.views, 4)
+        self.assertFalse(self.redis.exists(draining))
+
+    def test_save_keeps_flushed_counters(self):
+        """Test saving a stale instance does not overwrite flushed counters."""
+        prompt = Prompt.objects.get(pk=self.prompt.pk)
+        counters.increment(Prompt, self.prompt.pk, 'views', 2)
+        counters.increment(Prompt, self.prompt.pk, 'downloads', 3)
+        counters.flush_counters()
+
+        prompt.title = 'Email Writer Pro'
+        prompt.save()
+        prompt.refresh_from_db()
+        self.assertEqual((prompt.title, prompt.views, prompt.downloads), ('Email Writer Pro', 2, 3))
+        self.assertEqual(MarketplaceStats.load().total_downloads, 3)
+
+    def test_unknown_counter(self):
+        """Test only registered columns can be buffered."""
+        with self.assertRaises(ValueError):
+            counters.increment(Prompt, self.prompt.pk, 'price')
+
+
+class RatingAggregateTests(TestCase):
+    """Tests for incremental rating aggregates."""
+
+    def setUp(self):
+        """Set up a prompt and two reviewers."""
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            for i in range(2)
+        ]
+        self.prompt = Prompt.objects.create(
+            title='Email Writer', description='Description', content='Content',
+            category=Category.objects.create(name='Writing'), price=10,
+            thumbnail='prompts/thumbnails/test.png', author=self.users[0]
+        )
+
+    def assertRating(self, prompt, average, count, score):
+        prompt.refresh_from_db()
+        self.assertEqual(
+            (float(getattr(prompt, RATING_FIELDS[prompt._meta.label_lower][0])),
+             prompt.rating_count, float(prompt.bayesian_rating)),
+            (average, count, score)
+        )
+
+    def test_review_lifecycle(self):
+        """Test create, edit and delete keep sum/count/score in sync."""
+        Review.objects.create(prompt=self.prompt, user=self.users[0], rating=5, comment='Great')
+        review = Review.objects.create(prompt=self.prompt, user=self.users[1], rating=4, comment='Good')
+        self.assertRating(self.prompt, 4.5, 2, round((3.5 * 5 + 9) / 7, 2))
+
+        review = Review.objects.get(pk=review.pk)
+        review.rating = 2
+        review.save()
+        self.assertRating(self.prompt, 3.5, 2, 3.5)
+
+        review.delete()
+        self.assertRating(self.prompt, 5.0, 1, round((3.5 * 5 + 5) / 6, 2))
+
+    def test_save_keeps_aggregates(self):
+        """Test saving a stale prompt does not overwrite its rating aggregates."""
+        prompt = Prompt.objects.get(pk=self.prompt.pk)
+        Review.objects.create(prompt=self.prompt, user=self.users[0], rating=5, comment='Great')
+        prompt.title = 'Email Writer Pro'
+        prompt.save()
+        self.assertRating(prompt, 5.0, 1, round((3.5 * 5 + 5) / 6, 2))
+
+    def test_interaction_rating(self):
+        """Test UserPromptInteraction.rating going from unset to set and back."""
+        hub_prompt = HubPrompt.objects.create(
+            id_prompt='P0001', title='Hub prompt', slug='hub-prompt', created_by=self.users[0]
+        )
+        interaction = UserPromptInteraction.objects.create(user=self.users[1], prompt=hub_prompt)
+        self.assertRating(hub_prompt, 0, 0, 0)
+
+        interaction.rating = 4
+        interaction.save()
+        self.assertRating(hub_prompt, 4.0, 1, 3.58)
+
+        interaction.rating = None
+        interaction.save()
+        self.assertRating(hub_prompt, 0, 0, 0)
+
+    def test_reconcile(self):
+        """Test reconcile rebuilds aggregates after a bulk change."""
+        Review.objects.create(prompt=self.prompt, user=self.users[0], rating=3, comment='Ok')
+        Review.objects.update(rating=1)
+        reconcile_ratings()
+        self.assertRating(self.prompt, 1.0, 1, round((3.5 * 5 + 1) / 6, 2))
+
+
+class TrendingTests(TestCase):
+    """Tests for the time-decayed trending scores."""
+
+    def setUp(self):
+        """Set up three prompts and empty trending keys."""
+        self.redis = trending._redis()
+        self.redis.delete(trending.SCORES_KEY, trending.EPOCH_KEY, trending.TOP_KEY)
+        cache.clear()
+        user = User.objects.create_user(
+            username='seller', email='seller@example.com', password='testpass123'
+        )
+        category = Category.objects.create(name='Writing')
+        self.prompts = [
+            Prompt.objects.create(
+                title=f'Prompt {i}', description='Description', content='Content', category=category,
+                price=10, status='published', thumbnail='prompts/thumbnails/test.png', author=user
+            )
+            for i in range(3)
+        ]
+        self.hour = 3600
+
+    def test_recent_events_outweigh_old_ones(self):
+        """Test one half-life later the same event counts double."""
+        old, new, _ = self.prompts
+        trending.record_event(old.pk, 'view', now=0)
+        trending.record_event(new.pk, 'view', now=24 * self.hour)
+        scores = dict(self.redis.zrange(trending.SCORES_KEY, 0, -1, withscores=True))
+        self.assertAlmostEqual(scores[str(new.pk).encode()] / scores[str(old.pk).encode()], 2)
+
+    def test_refresh_publishes_snapshot(self):
+        """Test refresh orders the snapshot, syncs is_trending and survives a rebase."""
+        first, second, third = self.prompts
+        trending.record_event(first.pk, 'purchase', now=0)
+        trending.record_event(second.pk, 'review', now=self.hour)
+        trending.record_event(second.pk, 'review', now=self.hour)
+        trending.record_event(third.pk, 'view', now=self.hour)
+
+        top, changed = trending.refresh_trending(now=2 * self.hour)
+        self.assertTrue(changed)
+        self.assertEqual(top, [second.pk, first.pk, third.pk])
+        self.assertEqual(trending.top_prompt_ids(limit=2), [second.pk, first.pk])
+        self.assertEqual(set(Prompt.objects.filter(is_trending=True)), set(self.prompts))
+
+        # Sau rebase, sự kiện mới vẫn được cộng đúng tỉ lệ
+        trending.record_event(third.pk, 'purchase', now=2 * self.hour)
+        top, _ = trending.refresh_trending(now=2 * self.hour)
+        self.assertEqual(top[0], third.pk)
+        self.assertEqual(self.client.get('/').context['trending_prompts'][0], third)
+
+
+class RecommendationTests(TestCase):
+    """Tests for item-item "users also liked" lists."""
+
+    def setUp(self):
+        """Users 0-2 like A and B, user 3 likes B and C, user 4 likes D only."""
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            for i in range(5)
+        ]
+        for pk in 'ABCD':
+            HubPrompt.objects.create(id_prompt=pk, title=pk, slug=pk.lower(), created_by=self.users[0])
+        likes = {0: 'AB', 1: 'AB', 2: 'AB', 3: 'BC', 4: 'D'}
+        for user, prompts in likes.items():
+            for pk in prompts:
+                self.like(self.users[user], pk, timezone.now() - timedelta(days=2))
+
+    def like(self, user, prompt_id, when=None):
+        UserPromptInteraction.objects.update_or_create(
+            user=user, prompt_id=prompt_id,
+            defaults={'is_liked': True, 'liked_at': when or timezone.now()}
+        )
+
+    def snapshot(self):
+        return {
+            row.prompt_id: (row.similar_ids, [round(score, 4) for score in row.scores])
+            for row in PromptSimilarity.objects.all()
+        }
+
+    def test_full_build(self):
+        """Test neighbours are ranked by cosine similarity."""
+        self.assertEqual(build_similarities(), 4)
+        self.assertEqual(PromptSimilarity.users_also_liked('B'), ['A', 'C'])
+        self.assertEqual(PromptSimilarity.users_also_liked('A'), ['B'])
+        self.assertEqual(PromptSimilarity.users_also_liked('D'), [])
+
+    def test_incremental_refresh_matches_full_build(self):
+        """Test refreshing changed prompts gives the same lists as a rebuild."""
+        build_similarities()
+        since = timezone.now()
+        self.like(self.users[4], 'C')
+        self.like(self.users[3], 'D')
+
+        self.assertGreater(refresh_similarities(since), 0)
+        refreshed = self.snapshot()
+        build_similarities()
+        self.assertEqual(refreshed, self.snapshot())
+        self.assertEqual(PromptSimilarity.users_also_liked('D'), ['C', 'B'])
+
+
+class ContentIndexTests(TestCase):
+    """Tests for the memory-mapped "similar prompts" index."""
+
+    def setUp(self):
+        """Set up test data."""
+        user = User.objects.create_user(username='seller', email='seller@example.com', password='testpass123')
+        texts = {
+            'P1': ('Blog post outline', 'Write a blog post outline about python testing'),
+            'P2': ('Blog post writer', 'Write a long blog post about python packaging'),
+            'P3': ('Logo ideas', 'Generate logo ideas for a coffee shop brand'),
+            'P4': ('Coffee shop slogans', 'Generate slogans for a coffee shop brand'),
+            'P5': ('Draft prompt', 'Write a blog post about python'),
+        }
+        for pk, (title, text) in texts.items():
+            prompt = HubPrompt.objects.create(
+                id_prompt=pk, title=title, slug=pk.lower(), created_by=user, status=1 if pk == 'P5' else 3
+            )
+            PromptContent.objects.create(prompt=prompt, prompt_text=text)
+        self.path = os.path.join(tempfile.mkdtemp(), 'content_index.bin')
+
+    def test_similar_prompts(self):
+        """Test neighbours come from shared rare terms and exclude the prompt itself."""
+        stats = build_index(prompt_documents(), self.path)
+        self.assertEqual(stats['prompts'], 4)  # bản nháp không được index
+        index = get_index(self.path)
+        self.assertEqual([pk for pk, _ in index.similar('P1', 3)], ['P2'])
+        self.assertEqual([pk for pk, _ in index.similar('P4', 3)], ['P3'])
+        self.assertEqual(index.similar('P5'), [])
+
+    def test_rebuild_is_picked_up(self):
+        """Test readers reopen the file after a rebuild."""
+        build_index([('A', 'red apple pie'), ('B', 'green apple pie')], self.path)
+        self.assertEqual(get_index(self.path).similar('A'), [('B', 1.0)])
+        build_index([('A', 'red apple pie'), ('C', 'red apple tart'), ('D', 'red cherry')], self.path)
+        self.assertEqual([pk for pk, _ in get_index(self.path).similar('A')], ['C'])
+
+
+class DuplicateDetectionTests(TestCase):
+    """Tests for MinHash/LSH near-duplicate detection."""
+
+    TEXT = (
+        'You are an experienced copywriter. Write a product description for {product} aimed at '
+        'busy parents, highlight three benefits, keep the tone warm and practical, end with a short '
+        'call to action and never use more than one hundred and twenty words in total for the answer'
+    )
+
+    def setUp(self):
+        """Set up test data."""
+        self.author = User.objects.create_user(username='seller', email='seller@example.com', password='testpass123')
+        self.category = Category.objects.create(name='Writing')
+
+    def create_prompt(self, title, content):
+        return Prompt.objects.create(
+            title=title, description='', content=content, category=self.category, price=10,
+            thumbnail='prompts/thumbnails/test.png', author=self.author,
+        )
+
+    def test_near_duplicate_is_queued(self):
+        """Test a lightly edited copy is flagged once and unrelated prompts are not."""
+        original = self.create_prompt('Original', self.TEXT.format(product='a baby stroller'))
+        unrelated = self.create_prompt('Other', 'Summarise this legal contract in plain English for a client')
+        copy = self.create_prompt('Copy', self.TEXT.format(product='a baby stroller') + ' please')
+        for prompt in (original, unrelated):
+            self.assertEqual(check_prompt('core.prompt', prompt.pk), [])
+
+        flagged = check_prompt('core.prompt', copy.pk)
+        self.assertEqual([(c.match_source, c.match_object_id) for c in flagged], [('core.prompt', str(original.pk))])
+        self.assertGreaterEqual(flagged[0].similarity, 0.8)
+        # Nội dung không đổi / kiểm tra lại prompt gốc: không thêm vào hàng đợi lần nữa
+        self.assertEqual(check_prompt('core.prompt', copy.pk), [])
+        original.content += ' thanks'
+        original.save()
+        self.assertEqual(check_prompt('core.prompt', original.pk), [])
+        self.assertEqual(DuplicateCandidate.objects.count(), 1)
+
+    def test_duplicate_across_sources(self):
+        """Test PromptHub content copied into the marketplace is flagged."""
+        user = User.objects.create_user(username='hub', email='hub@example.com', password='testpass123')
+        hub = HubPrompt.objects.create(id_prompt='H1', title='Hub', slug='hub', created_by=user)
+        PromptContent.objects.create(prompt=hub, prompt_text=self.TEXT.format(product='running shoes'))
+        check_prompt('prompthub.prompt', 'H1')
+        copy = self.create_prompt('Copy', self.TEXT.format(product='running shoes'))
+
+        flagged = check_prompt('core.prompt', copy.pk)
+        self.assertEqual([(c.match_source, c.match_object_id, c.similarity) for c in flagged],
+                         [('prompthub.prompt', 'H1', 1.0)])
+
+        copy.delete()
+        self.assertFalse(PromptFingerprint.objects.filter(source='core.prompt').exists())
+        self.assertFalse(DuplicateCandidate.objects.exists())
+
+    def test_content_changes_queue_a_check(self):
+        """Test saves touching the text queue a Celery check after commit."""
+        with mock.patch.object(check_prompt_duplicates, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                prompt = self.create_prompt('Prompt', self.TEXT)
+            delay.assert_called_once_with('core.prompt', str(prompt.pk))
+
+            delay.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                prompt.price = 20
+                prompt.save(update_fields=['price'])
+            delay.assert_not_called()
+
+
+class BulkImportTests(TestCase):
+    """Tests for the COPY-based PromptHub import."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='importer', email='importer@example.com', password='testpass123')
+        HubCategory.objects.create(id_category='CA001', category_name='Writing', category_code='writing')
+        HubCategory.objects.create(id_category='CA002', category_name='Coding', category_code='coding')
+        platform = AIPlatform.objects.create(id_platform='AI001', platform_name='ChatGPT', platform_code='chatgpt')
+        AIModel.objects.create(id_model='GPT4O', platform=platform, model_name='GPT-4o', model_code='gpt-4o')
+        self.directory = tempfile.mkdtemp()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(text)
+        return path
+
+    def write_jsonl(self, records):
+        return self.write('prompts.jsonl', ''.join(json.dumps(record) + '\n' for record in records))
+
+    def links(self, model, field, prompt_id):
+        return set(model.objects.filter(prompt_id=prompt_id).values_list(field, flat=True))
+
+    def test_import_then_upsert(self):
+        """Test rows, content and links are inserted, then updated without touching stats."""
+        path = self.write_jsonl([
+            {'id_prompt': 'P1', 'title': 'Blog writer', 'prompt_text': 'Line one\n\tindented \\ {topic}',
+             'categories': ['CA002', 'CA001'], 'id_primary_category': 'CA001', 'tags': ['SEO', 'Blog post'],
+             'ai_models': [{'id_model': 'GPT4O', 'is_recommended': True}], 'variables': [{'name': 'topic'}]},
+            {'id_prompt': 'P2', 'title': 'Draft', 'prompt_text': 'Draft text', 'status': 1},
+            {'id_prompt': 'P3', 'title': 'Coder', 'prompt_text': 'Write code', 'tags': 'python, seo'},
+        ])
+        stats = bulk_import.import_prompts(path, created_by=self.user.pk, batch_size=2)
+        self.assertEqual((stats['records'], stats['batches']), (3, 2))
+
+        p1 = HubPrompt.objects.get(pk='P1')
+        self.assertEqual((p1.slug, p1.status, p1.primary_category_id), ('blog-writer-p1', 3, 'CA001'))
+        self.assertIsNotNone(p1.published_at)
+        self.assertIsNone(HubPrompt.objects.get(pk='P2').published_at)
+        self.assertEqual(p1.content.prompt_text, 'Line one\n\tindented \\ {topic}')
+        self.assertEqual(p1.content.variables, [{'name': 'topic'}])
+        self.assertEqual(
+            set(HubPromptCategory.objects.filter(prompt=p1).values_list('category_id', 'is_primary')),
+            {('CA001', True), ('CA002', False)},
+        )
+        self.assertEqual(HubCategory.objects.get(pk='CA001').subtree_prompt_count, 1)
+        self.assertEqual(self.links(HubPromptTag, 'tag__tag_slug', 'P1'), {'seo', 'blog-post'})
+        self.assertEqual(self.links(HubPromptTag, 'tag__tag_slug', 'P3'), {'python', 'seo'})
+        self.assertEqual(Tag.objects.filter(tag_slug='seo').count(), 1)
+        self.assertTrue(PromptAIModel.objects.get(prompt=p1, ai_model='GPT4O').is_recommended)
+
+        HubPrompt.objects.filter(pk='P1').update(view_count=50)
+        path = self.write_jsonl([
+            {'id_prompt': 'P1', 'title': 'Blog writer v2', 'slug': 'blog-writer', 'prompt_text': 'New text',
+             'tags': ['seo'], 'ai_models': []},
+        ])
+        bulk_import.import_prompts(path, created_by=self.user.pk)
+        p1.refresh_from_db()
+        self.assertEqual((p1.title, p1.slug, p1.view_count), ('Blog writer v2', 'blog-writer', 50))
+        self.assertEqual(p1.content.prompt_text, 'New text')
+        self.assertEqual(self.links(HubPromptTag, 'tag__tag_slug', 'P1'), {'seo'})
+        self.assertEqual(self.links(PromptAIModel, 'ai_model_id', 'P1'), set())
+        # Không có khóa categories: giữ nguyên liên kết cũ
+        self.assertEqual(self.links(HubPromptCategory, 'category_id', 'P1'), {'CA001', 'CA002'})
+
+    def test_resume_after_failure(self):
+        """Test a rerun skips committed batches and continues from the failed one."""
+        path = self.write_jsonl([
+            {'id_prompt': f'P{i}', 'title': f'Prompt {i}', 'prompt_text': f'Text {i}'} for i in range(5)
+        ])
+        original = bulk_import._import_batch
+        calls = []
+
+        def fail_third(*args):
+            calls.append(1)
+            if len(calls) == 3:
+                raise ValueError('connection lost')
+            return original(*args)
+
+        with mock.patch.object(bulk_import, '_import_batch', side_effect=fail_third):
+            with self.assertRaises(ValueError):
+                bulk_import.import_prompts(path, created_by=self.user.pk, batch_size=2)
+        self.assertEqual(HubPrompt.objects.count(), 4)
+        self.assertEqual(ImportBatch.objects.count(), 2)
+
+        stats = bulk_import.import_prompts(path, created_by=self.user.pk, batch_size=2)
+        self.assertEqual((stats['skipped'], stats['batches'], stats['records']), (2, 1, 1))
+        self.assertEqual(HubPrompt.objects.count(), 5)
+
+    def test_csv_and_validation(self):
+        """Test CSV input and line numbers in errors."""
+        path = self.write('prompts.csv', (
+            'id_prompt,title,prompt_text,categories,tags,is_premium,created_by\n'
+            f'C1,From CSV,"Multi\nline",CA002,"seo, ads",yes,{self.user.pk}\n'
+        ))
+        bulk_import.import_prompts(path)
+        prompt = HubPrompt.objects.get(pk='C1')
+        self.assertTrue(prompt.is_premium)
+        self.assertEqual(prompt.content.prompt_text, 'Multi\nline')
+        self.assertEqual(self.links(HubPromptCategory, 'category_id', 'C1'), {'CA002'})
+
+        path = self.write_jsonl([
+            {'id_prompt': 'X1', 'title': 'Ok', 'prompt_text': 'Ok'},
+            {'id_prompt': 'X2', 'title': 'Bad', 'prompt_text': 'Bad', 'categories': ['CA999']},
+        ])
+        with self.assertRaisesMessage(ValueError, "line 2: unknown category 'CA999'"):
+            bulk_import.import_prompts(path, created_by=self.user.pk)
+        self.assertFalse(HubPrompt.objects.filter(pk='X1').exists())
+
+
+class ExportTests(TestCase):
+    """Tests for streaming CSV/JSONL exports."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.staff = factories.create_user(is_staff=True)
+        self.purchases = [factories.create_purchase(price_paid=5 + i) for i in range(3)]
+        Purchase.objects.filter(pk=self.purchases[0].pk).update(created_at=timezone.now() - timedelta(days=10))
+
+    def download(self, **params):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('dashboard:export'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, gzip.decompress(b''.join(response.streaming_content)).decode()
+
+    def test_csv_download(self):
+        """Test the CSV export has a header and one line per purchase, in id order."""
+        response, text = self.download(dataset='purchases', format='csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="purchases.csv.gz"')
+        lines = text.splitlines()
+        self.assertTrue(lines[0].startswith('id,created_at,transaction_id,user_id,user_username'))
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], [str(p.pk) for p in self.purchases])
+
+    def test_jsonl_date_range(self):
+        """Test since/until keep only purchases inside the range."""
+        today = timezone.localdate()
+        _, text = self.download(dataset='purchases', format='jsonl', since=(today - timedelta(days=1)).isoformat())
+        rows = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [p.pk for p in self.purchases[1:]])
+        self.assertEqual(rows[0]['price_paid'], '6.00')
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('dashboard:export'), {'dataset': 'users'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_generate_report_writes_file(self):
+        """Test the Celery task writes a complete gzip file."""
+        with override_settings(EXPORT_ROOT=tempfile.mkdtemp()):
+            path = generate_report('prompts', 'jsonl')
+        self.assertTrue(path.endswith('prompts.jsonl.gz'))
+        with gzip.open(path, 'rt') as export:
+            self.assertEqual(len(export.readlines()), Prompt.objects.count())
+
+
+class EmailOutboxTests(TestCase):
+    """Tests for the batched email outbox."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='newbie', email='newbie@example.com', password='testpass123', first_name='An'
+        )
+
+    def test_enqueue_is_idempotent(self):
+        """Test a repeated task queues and sends the welcome email once."""
+        with self.captureOnCommitCallbacks(execute=True):
+            send_welcome_email(self.user.pk)
+            send_welcome_email(self.user.pk)
+        self.assertEqual(OutboxEmail.objects.get().status, 'sent')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['newbie@example.com'])
+        self.assertEqual(mail.outbox[0].extra_headers['X-Idempotency-Key'], f'welcome:{self.user.pk}')
+
+    def test_batch_uses_one_connection(self):
+        """Test a batch is sent over a single backend connection."""
+        for i in range(5):
+            outbox.enqueue(f'digest:{i}', 'Digest', 'Body', [f'user{i}@example.com'], html_body='<p>Body</p>')
+        with mock.patch.object(outbox, 'get_connection', wraps=outbox.get_connection) as get_connection:
+            result = outbox.drain(batch_size=3)
+        self.assertEqual(result['sent'], 5)
+        self.assertEqual(get_connection.call_count, 2)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>Body</p>', 'text/html')])
+
+    def test_failures_back_off_then_give_up(self):
+        """Test failed sends are retried with exponential delays, then marked failed."""
+        outbox.enqueue('report:1', 'Report', 'Body', ['admin@example.com'])
+        failing = mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down'))
+        with failing, self.assertLogs('apps.core.mail', 'WARNING'):
+            self.assertEqual(outbox.drain()['retried'], 1)
+            email = OutboxEmail.objects.get()
+            self.assertEqual((email.status, email.attempts, email.last_error), ('pending', 1, 'OSError: down'))
+            delay = (email.next_attempt_at - timezone.now()).total_seconds()
+            self.assertAlmostEqual(delay, 60, delta=5)
+            # Chưa đến hạn: không gửi lại
+            self.assertEqual(outbox.drain()['retried'], 0)
+
+            OutboxEmail.objects.update(next_attempt_at=timezone.now(), attempts=2)
+            outbox.drain()
+            delay = (OutboxEmail.objects.get().next_attempt_at - timezone.now()).total_seconds()
+            self.assertAlmostEqual(delay, 240, delta=5)
+
+            with override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=4):
+                OutboxEmail.objects.update(next_attempt_at=timezone.now())
+                self.assertEqual(outbox.drain()['failed'], 1)
+        self.assertEqual(OutboxEmail.objects.get().status, 'failed')
+        self.assertEqual(mail.outbox, [])
+
+    def test_claimed_batch_is_leased_while_sending(self):
+        """Test another worker cannot claim a batch that is being sent."""
+        outbox.enqueue('report:3', 'Report', 'Body', ['admin@example.com'])
+        claimed_during_send = []
+
+        def send_messages(messages):
+            claimed_during_send.extend(outbox._claim(10))
+            return len(messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=send_messages):
+            self.assertEqual(outbox.drain()['sent'], 1)
+        self.assertEqual(claimed_during_send, [])
+        self.assertEqual(OutboxEmail.objects.get().status, 'sent')
+
+    def test_metrics(self):
+        """Test /metrics reports the pending backlog."""
+        outbox.enqueue('report:2', 'Report', 'Body', ['admin@example.com'])
+        response = self.client.get(reverse('core:metrics'), REMOTE_ADDR='127.0.0.1')
+        self.assertIn('email_outbox_pending 1', response.content.decode())
+
+
+class RBACTests(TestCase):
+    """Tests for compiled role permissions."""
+
+    def setUp(self):
+        """Set up test data."""
+        prompt = Permission.objects.create(permission_name='Prompt', permission_code='prompt', module='prompt')
+        self.view = Permission.objects.create(
+            permission_name='Xem prompt', permission_code='prompt.view', parent_permission=prompt
+        )
+        Permission.objects.create(
+            permission_name='Xem premium', permission_code='prompt.view_premium', parent_permission=self.view
+        )
+        self.guest = Role.objects.create(role_name='Khách', role_code='GUEST')
+        self.member = Role.objects.create(role_name='Thành viên', role_code='MEMBER')
+        self.editor = Role.objects.create(role_name='Biên tập viên', role_code='EDITOR')
+        RolePermission.objects.create(role=self.guest, permission=self.view, can_read=True)
+        RolePermission.objects.create(role=self.member, permission=self.view, can_read=True, can_create=True)
+        RolePermission.objects.create(role=self.editor, permission=prompt, can_read=True, can_update=True)
+        self.user = User.objects.create_user(username='member', email='member@example.com', password='testpass123')
+        self.editor_user = User.objects.create_user(
+            username='editor', email='editor@example.com', password='testpass123', role=self.editor
+        )
+        rbac.invalidate()
+
+    def test_grants_apply_to_descendants(self):
+        """Test a grant on a parent permission covers its whole subtree."""
+        self.assertTrue(rbac.has_perm(self.editor_user, 'prompt.view_premium', 'update'))
+        self.assertFalse(rbac.has_perm(self.editor_user, 'prompt.view_premium', 'delete'))
+        # User chưa gán vai trò dùng MEMBER
+        self.assertTrue(rbac.has_perm(self.user, 'prompt.view_premium', 'create'))
+        self.assertFalse(rbac.has_perm(self.user, 'prompt', 'read'))
+        self.assertFalse(rbac.has_perm(AnonymousUser(), 'prompt.view', 'create'))
+        self.assertTrue(rbac.has_perm(AnonymousUser(), 'prompt.view', 'read'))
+        self.assertFalse(rbac.has_perm(self.user, 'unknown.code', 'read'))
+        with self.assertRaises(ValueError):
+            rbac.has_perm(self.user, 'prompt', 'approve')
+
+    def test_checks_run_no_queries(self):
+        """Test checks are answered from the compiled table."""
+        rbac.has_perm(self.user, 'prompt.view')
+        with self.assertNumQueries(0):
+            for _ in range(100):
+                rbac.has_perm(self.editor_user, 'prompt.view_premium', 'update')
+
+    def test_changes_invalidate_after_commit(self):
+        """Test editing grants or the tree recompiles the table."""
+        self.assertFalse(rbac.has_perm(self.user, 'prompt.view', 'delete'))
+        with self.captureOnCommitCallbacks(execute=True):
+            RolePermission.objects.filter(role=self.member).update(can_delete=True)
+            RolePermission.objects.get(role=self.member).save()
+        self.assertTrue(rbac.has_perm(self.user, 'prompt.view', 'delete'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.view.parent_permission = None
+            self.view.save()
+        self.assertFalse(rbac.has_perm(self.editor_user, 'prompt.view_premium', 'update'))
+
+        table = rbac.get_table()
+        # Process khác: đọc bảng đã biên dịch từ cache theo phiên bản
+        rbac.tables.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(rbac.get_table().bits, table.bits)
+        self.assertEqual(rbac.tables.version, cache.get(rbac.tables.version_key))
+
+
+class CategoryTreeTests(TestCase):
+    """Tests for the materialized category path and subtree counts."""
+
+    def setUp(self):
+        """Set up writing > email > newsletter, coding and three prompts."""
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='testpass123')
+        self.writing = HubCategory.objects.create(id_category='CA001', category_name='Writing', category_code='writing')
+        self.email = HubCategory.objects.create(
+            id_category='CA002', category_name='Email', category_code='email', parent_category=self.writing
+        )
+        self.newsletter = HubCategory.objects.create(
+            id_category='CA003', category_name='Newsletter', category_code='newsletter', parent_category=self.email
+        )
+        self.coding = HubCategory.objects.create(id_category='CA004', category_name='Coding', category_code='coding')
+        self.prompts = [
+            HubPrompt.objects.create(id_prompt=f'P000{i}', title=f'P{i}', slug=f'p{i}', created_by=self.user)
+            for i in range(3)
+        ]
+        category_tree.invalidate()
+
+    def counts(self):
+        return dict(HubCategory.objects.values_list('pk', 'subtree_prompt_count'))
+
+    def test_paths(self):
+        """Test paths follow the parents, moves carry the subtree and cycles are refused."""
+        self.assertEqual(HubCategory.objects.get(pk='CA003').path, 'CA001/CA002/CA003/')
+        HubPromptCategory.objects.create(prompt=self.prompts[0], category=self.newsletter)
+
+        email = HubCategory.objects.get(pk='CA002')
+        email.parent_category = self.coding
+        email.save()
+        newsletter = HubCategory.objects.get(pk='CA003')
+        self.assertEqual((newsletter.path, newsletter.depth), ('CA004/CA002/CA003/', 2))
+        self.assertEqual(self.counts(), {'CA001': 0, 'CA002': 1, 'CA003': 1, 'CA004': 1})
+
+        writing = HubCategory.objects.get(pk='CA001')
+        writing.parent_category = newsletter
+        writing.save()
+        with self.assertRaises(ValueError):
+            email.parent_category = writing
+            email.save()
+
+    def test_counts_follow_links(self):
+        """Test link create/deactivate/move/delete and rebuild agree."""
+        link = HubPromptCategory.objects.create(prompt=self.prompts[0], category=self.newsletter)
+        HubPromptCategory.objects.create(prompt=self.prompts[1], category=self.email)
+        HubPromptCategory.objects.create(prompt=self.prompts[2], category=self.coding)
+        self.assertEqual(self.counts(), {'CA001': 2, 'CA002': 2, 'CA003': 1, 'CA004': 1})
+        self.assertEqual(HubCategory.objects.get(pk='CA002').prompt_count, 1)
+
+        link = HubPromptCategory.objects.get(pk=link.pk)
+        link.category = self.coding
+        link.save()
+        self.assertEqual(self.counts(), {'CA001': 1, 'CA002': 1, 'CA003': 0, 'CA004': 2})
+        link.active = False
+        link.save()
+        self.prompts[1].delete()
+        self.assertEqual(self.counts(), {'CA001': 0, 'CA002': 0, 'CA003': 0, 'CA004': 1})
+
+        # Sửa tên danh mục không ghi đè bộ đếm bằng giá trị cũ trong instance
+        self.coding.category_name = 'Code'
+        self.coding.save()
+        HubCategory.objects.update(prompt_count=0, subtree_prompt_count=0)
+        category_tree.rebuild()
+        self.assertEqual(self.counts(), {'CA001': 0, 'CA002': 0, 'CA003': 0, 'CA004': 1})
+
+    def test_counts_are_distinct_prompts(self):
+        """Test a prompt linked twice inside a subtree counts once there, through changes, moves and deletes."""
+        HubPromptCategory.objects.create(prompt=self.prompts[0], category=self.email)
+        deep = HubPromptCategory.objects.create(prompt=self.prompts[0], category=self.newsletter)
+        HubPromptCategory.objects.create(prompt=self.prompts[0], category=self.coding)
+        self.assertEqual(self.counts(), {'CA001': 1, 'CA002': 1, 'CA003': 1, 'CA004': 1})
+
+        deep = HubPromptCategory.objects.get(pk=deep.pk)
+        deep.active = False
+        deep.save()
+        self.assertEqual(self.counts(), {'CA001': 1, 'CA002': 1, 'CA003': 0, 'CA004': 1})
+        deep.active = True
+        deep.save()
+
+        # Chuyển Newsletter sang Coding: Coding đã có prompt này nên không tăng
+        newsletter = HubCategory.objects.get(pk='CA003')
+        newsletter.parent_category = self.coding
+        newsletter.save()
+        self.assertEqual(self.counts(), {'CA001': 1, 'CA002': 1, 'CA003': 1, 'CA004': 1})
+
+        HubCategory.objects.update(prompt_count=0, subtree_prompt_count=0)
+        category_tree.rebuild()
+        self.assertEqual(self.counts(), {'CA001': 1, 'CA002': 1, 'CA003': 1, 'CA004': 1})
+        self.assertEqual(HubCategory.objects.get(pk='CA004').prompt_count, 1)
+
+        # Xóa prompt xóa cả ba liên kết cùng lúc
+        self.prompts[0].delete()
+        self.assertEqual(self.counts(), {'CA001': 0, 'CA002': 0, 'CA003': 0, 'CA004': 0})
+        self.assertEqual(set(HubCategory.objects.values_list('prompt_count', flat=True)), {0})
+
+    def test_navigation(self):
+        """Test the cached tree and one-query subtree listing."""
+        HubPromptCategory.objects.create(prompt=self.prompts[0], category=self.newsletter)
+        HubPromptCategory.objects.create(prompt=self.prompts[1], category=self.email)
+        HubPromptCategory.objects.create(prompt=self.prompts[2], category=self.coding)
+        tree = category_tree.get_tree()
+        with self.assertNumQueries(0):
+            tree = category_tree.get_tree()
+            self.assertEqual([node.id for node in tree.roots], ['CA004', 'CA001'])
+            self.assertEqual([node.id for node in tree.ancestors('CA003')], ['CA001', 'CA002', 'CA003'])
+            self.assertEqual([node.id for node in tree.descendants('CA001')], ['CA001', 'CA002', 'CA003'])
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                sorted(category_tree.subtree_prompts('CA001').values_list('pk', flat=True)), ['P0000', 'P0001']
+            )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.email.active = False
+            self.email.save()
+        self.assertEqual([node.id for node in category_tree.get_tree().descendants('CA001')], ['CA001'])
+        self.assertFalse(category_tree.subtree_prompts('CA002').exists())
+
+
+class CommentThreadTests(TestCase):
+    """Tests for threaded comment loading and reply/like counters."""
+
+    def setUp(self):
+        """Set up a PromptHub prompt and two users."""
+        counters.get_redis_connection('default').delete(counters._key('prompthub.comment'))
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='testpass123')
+        self.other = User.objects.create_user(username='reader', email='reader@example.com', password='testpass123')
+        self.prompt = HubPrompt.objects.create(id_prompt='P0001', title='Hub', slug='hub', created_by=self.user)
+
+    def comment(self, parent=None, text='Hi'):
+        return HubComment.objects.create(prompt=self.prompt, user=self.user, parent_comment=parent, comment_text=text)
+
+    def test_thread_fields_and_counters(self):
+        """Test thread_root/depth, reply_count transitions and buffered likes."""
+        root = self.comment()
+        reply = self.comment(root)
+        nested = self.comment(reply)
+        self.assertEqual((nested.thread_root_id, nested.depth), (root.pk, 2))
+        self.assertEqual(HubComment.objects.get(pk=reply.pk).reply_count, 1)
+
+        nested = HubComment.objects.get(pk=nested.pk)
+        nested.status = 2
+        nested.save()
+        self.assertEqual(HubComment.objects.get(pk=reply.pk).reply_count, 0)
+        reply.delete()
+        self.assertEqual(HubComment.objects.get(pk=root.pk).reply_count, 0)
+
+        self.assertTrue(comments.like_comment(self.other, root.pk))
+        self.assertFalse(comments.like_comment(self.other, root.pk))
+        comments.like_comment(self.user, root.pk)
+        comments.unlike_comment(self.user, root.pk)
+        counters._drain('prompthub.comment')
+        # Instance cũ không ghi đè bộ đếm khi lưu lại
+        root.comment_text = 'Edited'
+        root.save()
+        self.assertEqual(HubComment.objects.get(pk=root.pk).like_count, 1)
+
+    def test_page_loads_threads_in_one_query(self):
+        """Test one query per page, tree assembly and keyset paging of a hot thread."""
+        old_root = self.comment(text='old')
+        root = self.comment(text='hot')
+        first = self.comment(root, 'r1')
+        replies = [first, self.comment(first, 'r1.1')] + [self.comment(root, f'r{i}') for i in range(2, 5)]
+        self.comment(text='new')
+
+        with self.assertNumQueries(1):
+            page = comments.comment_page(self.prompt.pk, page_size=2, replies=2)
+        self.assertEqual([c.comment_text for c in page], ['new', 'hot'])
+        hot = page.comments[1]
+        self.assertEqual([c.comment_text for c in hot.children], ['r1'])
+        self.assertEqual([c.comment_text for c in hot.children[0].children], ['r1.1'])
+        self.assertEqual(hot.username, 'author')
+        self.assertTrue(hot.has_more_replies)
+        self.assertFalse(page.comments[0].has_more_replies)
+
+        with self.assertNumQueries(1):
+            more = comments.thread_page(root.pk, hot.more_replies_cursor, page_size=2)
+        self.assertEqual([c.pk for c in more], [c.pk for c in replies[2:4]])
+        self.assertEqual([c.pk for c in comments.thread_page(root.pk, more.next_cursor)], [replies[4].pk])
+
+        page = comments.comment_page(self.prompt.pk, page.next_cursor, page_size=2)
+        self.assertEqual([c.pk for c in page], [old_root.pk])
+        self.assertIsNone(page.next_cursor)
+
+
+class SystemConfigTests(TestCase):
+    """Tests for the typed process-local SystemConfig."""
+
+    def setUp(self):
+        """Set up one row per type."""
+        for key, value, config_type, is_public in [
+            ('site_name', 'PromptHub', 'string', True),
+            ('max_upload_mb', '25', 'int', False),
+            ('maintenance', 'false', 'boolean', True),
+            ('fee_rate', '0.15', 'decimal', False),
+            ('featured', '{"ids": [1, 2]}', 'json', True),
+        ]:
+            SystemConfig.objects.create(
+                config_key=key, config_value=value, config_type=config_type, is_public=is_public
+            )
+        sysconfig.invalidate()
+
+    def test_typed_values(self):
+        """Test values are parsed, immutable and read without queries."""
+        sysconfig.get('site_name')
+        with self.assertNumQueries(0):
+            self.assertEqual(sysconfig.get('max_upload_mb'), 25)
+            self.assertIs(sysconfig.get('maintenance'), False)
+            self.assertEqual(sysconfig.get('fee_rate'), Decimal('0.15'))
+            self.assertEqual(sysconfig.get('featured')['ids'], (1, 2))
+            self.assertEqual(sysconfig.get('missing', 'x'), 'x')
+        with self.assertRaises(TypeError):
+            sysconfig.get('featured')['ids'] = ()
+        self.assertEqual(
+            json.loads(sysconfig.public_config().public_json),
+            {'featured': {'ids': [1, 2]}, 'maintenance': False, 'site_name': 'PromptHub'},
+        )
+
+    def test_changes_invalidate_after_commit(self):
+        """Test edits reach the cache after commit and bad rows are skipped."""
+        with self.captureOnCommitCallbacks(execute=True):
+            SystemConfig.objects.filter(pk='max_upload_mb').update(config_value='50')
+            SystemConfig.objects.create(config_key='broken', config_value='abc', config_type='int')
+        with self.assertLogs('apps.core.sysconfig', 'WARNING'):
+            self.assertEqual(sysconfig.get('max_upload_mb'), 50)
+        self.assertIsNone(sysconfig.get('broken'))
+
+        # Process khác đọc bản đã nạp từ cache (ép kiểu lại từ các dòng gốc)
+        sysconfig.snapshots.clear()
+        with self.assertNumQueries(0), self.assertLogs('apps.core.sysconfig', 'WARNING'):
+            self.assertEqual(sysconfig.get('featured')['ids'], (1, 2))
+
+
+class ReferenceRegistryTests(TestCase):
+    """Tests for the in-memory reference-data registry."""
+
+    def setUp(self):
+        """Set up levels, a platform with a model and a prompt."""
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='testpass123')
+        PromptLevel.objects.create(id_level=1, level_name='Cơ bản', level_code='BASIC')
+        self.expert = PromptLevel.objects.create(id_level=4, level_name='Chuyên gia', level_code='EXPERT')
+        platform = AIPlatform.objects.create(id_platform='AI001', platform_name='ChatGPT', platform_code='chatgpt')
+        AIModel.objects.create(
+            id_model='GPT4O', platform=platform, model_name='GPT-4o', model_code='gpt-4o', capabilities=['text']
+        )
+        for i in range(3):
+            HubPrompt.objects.create(
+                id_prompt=f'P{i}', title=f'P{i}', slug=f'p{i}', created_by=self.user, level=self.expert
+            )
+        references.invalidate()
+
+    def test_lookup(self):
+        """Test records by pk and code are immutable and read without queries."""
+        references.get_registry()
+        with self.assertNumQueries(0):
+            registry = references.get_registry()
+            self.assertEqual(registry.levels[4].level_name, 'Chuyên gia')
+            self.assertIs(registry.levels.code('EXPERT'), registry.levels[4])
+            model = registry.ai_models.code('gpt-4o')
+            self.assertEqual(str(registry.platforms[model.platform_id]), 'ChatGPT')
+            self.assertEqual(model.capabilities, ('text',))
+        with self.assertRaises(AttributeError):
+            registry.levels[4].level_name = 'x'
+
+    def test_with_references(self):
+        """Test foreign keys come from the registry without a JOIN."""
+        references.get_registry()
+        with CaptureQueriesContext(connection) as queries:
+            prompts = list(references.with_references(HubPrompt.objects.filter(pk__in=['P0', 'P1', 'P2']), 'level'))
+            self.assertEqual({prompt.level.level_code for prompt in prompts}, {'EXPERT'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('JOIN', queries[0]['sql'])
+        with self.assertRaises(ValueError):
+            references.with_references(HubPrompt.objects.all(), 'created_by')
+
+    def test_changes_invalidate_after_commit(self):
+        """Test edits are picked up after commit, from the shared copy in other processes."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.expert.ticket_cost = 3
+            self.expert.save()
+        self.assertEqual(references.get_registry().levels[4].ticket_cost, 3)
+        references.registries.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(references.get_registry().levels.code('EXPERT').ticket_cost, 3)
+
+
+class RequestMetricsTests(TestCase):
+    """Tests for per-view request metrics and query budgets."""
+
+    def setUp(self):
+        """Start from empty histograms and a cold home page cache."""
+        cache.clear()
+        registry.reset()
+
+    def test_request_is_recorded(self):
+        """Test a request adds to its view's histograms and cache counters."""
+        self.client.get('/')
+        self.client.get('/')
+        histograms = {name: h for (name, view), h in registry.histograms.items() if view == 'core:home'}
+        self.assertEqual(histograms['http_request_duration_seconds'].count, 2)
+        self.assertGreater(histograms['db_queries_per_request'].sum, 0)
+        self.assertGreater(histograms['template_render_duration_seconds'].sum, 0)
+        # Lần đầu miss mọi section, lần sau hit tất cả
+        self.assertEqual(registry.counters['cache_misses_total', 'core:home'], len(HOME_SECTIONS))
+        self.assertEqual(registry.counters['cache_hits_total', 'core:home'], len(HOME_SECTIONS))
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_request_duration_seconds_count{view="core:home"} 2', response.content.decode())
+
+    def test_metrics_endpoint_is_restricted(self):
+        """Test /metrics is only served to allowed addresses or staff."""
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 403)
+
+    @override_settings(QUERY_BUDGETS={'core:search': 0})
+    def test_budget_violation_is_logged(self):
+        """Test exceeding a view's query budget logs the most repeated SQL."""
+        with self.assertLogs('apps.core.metrics', 'WARNING') as logs:
+            self.client.get('/search/', {'q': 'email'})
+        self.assertIn('Query budget exceeded for core:search', logs.output[0])
+        self.assertEqual(registry.counters['query_budget_violations_total', 'core:search'], 1)
+
+
+class QueryCountTests(TestCase):
+    """
+    N+1 guard: every marketplace and dashboard page must run the same number
+    of queries with N and 10N rows.
+    """
+
+    N = 3
+    # URL name -> GET params (list: mỗi bộ params một lần chạy); chuỗi = lý do chưa render được trang
+    ROUTES = {
+        'core:home': {},
+        'core:search': {'q': 'prompt'},
+        'core:about': 'template base.html does not exist',
+        'core:metrics': {},
+        'dashboard:home': {},
+        'dashboard:prompts': {},
+        'dashboard:prompt-create': {},
+        'dashboard:prompt-edit': 'placeholder route: prompts_list does not accept pk',
+        'dashboard:prompt-delete': 'placeholder route: prompts_list does not accept pk',
+        'dashboard:categories': {},
+        'dashboard:category-create': {},
+        'dashboard:category-edit': {},
+        'dashboard:category-delete': {},
+        'dashboard:sales': {},
+        'dashboard:reviews': {},
+        # Mặc định (User theo date_joined) và sắp theo bộ đếm (keyset trên UserActivity)
+        'dashboard:users': [{}, {'sort': 'revenue'}],
+        'dashboard:export': {'dataset': 'purchases'},
+        'dashboard:earnings': 'template dashboard/earnings.html does not exist',
+        'dashboard:settings': 'template dashboard/settings.html does not exist',
+        'dashboard:profile': 'template dashboard/settings.html does not exist',
+        'dashboard:search': 'template dashboard/search_results.html does not exist',
+    }
+
+    def setUp(self):
+        """Log in as staff and seed the first N rows."""
+        cache.clear()
+        self.client.force_login(factories.create_user(is_staff=True, is_superuser=True))
+        self.first = factories.seed_marketplace(self.N)[0]
+
+    def url(self, name):
+        """URL of a route; <pk> routes use the first seeded prompt/category."""
+        try:
+            return reverse(name)
+        except NoReverseMatch:
+            model = name.split(':')[1].split('-')[0]
+            return reverse(name, kwargs={'pk': {'prompt': self.first.pk, 'category': self.first.category_id}[model]})
+
+    def capture(self):
+        """Executed SQL of every renderable route, each with a cold cache."""
+        queries = {}
+        for name, variants in self.ROUTES.items():
+            if isinstance(variants, str):
+                continue
+            for params in variants if isinstance(variants, list) else [variants]:
+                cache.clear()
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(self.url(name), params)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                key = f'{name}?{urlencode(params)}'
+                self.assertIn(response.status_code, (200, 302), key)
+                queries[key] = [query['sql'] for query in context.captured_queries]
+        return queries
+
+    @staticmethod
+    def normalize(sql):
+        sql = re.sub(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b", '?', sql)
+        return re.sub(r'IN \((?:\?, )*\?\)', 'IN (...)', sql)
+
+    def describe(self, small, large):
+        """Statements that ran more often with 10N rows than with N."""
+        before = Counter(map(self.normalize, small))
+        after = Counter(map(self.normalize, large))
+        lines = [
+            f'{before[sql]} -> {count}x {sql}' for sql, count in after.most_common() if count > before[sql]
+        ]
+        return f'{len(small)} queries with N rows, {len(large)} with 10N rows:\n' + '\n'.join(lines)
+
+    def test_route_table_covers_every_url(self):
+        """Test a new URL cannot be added without an entry in ROUTES."""
+        names = {f'{module.app_name}:{pattern.name}' for module in (urls, urls_dashboard) for pattern in module.urlpatterns}
+        self.assertEqual(names, set(self.ROUTES))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Test no page issues per-row queries."""
+        small = self.capture()
+        factories.seed_marketplace(9 * self.N)
+        large = self.capture()
+        for name, reason in self.ROUTES.items():
+            if isinstance(reason, str):
+                with self.subTest(url=name):
+                    self.skipTest(reason)
+        for key in small:
+            with self.subTest(url=key):
+                self.assertEqual(len(large[key]), len(small[key]), self.describe(small[key], large[key]))
+
+
+class SearchTests(TestCase):
+    """Tests for prompt full-text search."""
+
+    def setUp(self):
+        """Set up test data."""
+        user = User.objects.create_user(
+            username='seller',
+            email='seller@example.com',
+            password='testpass123'
+        )
+        category = Category.objects.create(name='Writing')
+        defaults = {
+            'content': 'Content', 'category': category, 'price': 10,
+            'status': 'published', 'thumbnail': 'prompts/thumbnails/test.png', 'author': user,
+        }
+        self.email = Prompt.objects.create(
+            title='Professional Email Writer', description='Write business emails', **defaults
+        )
+        self.blog = Prompt.objects.create(
+            title='Blog Post Generator', description='Long form posts, also drafts an email', **defaults
+        )
+        Prompt.objects.create(title='Logo Designer', description='Brand logos', **defaults)
+
+    def test_title_match_ranks_first(self):
+        """Test a title match outranks a description match."""
+        results = list(search_prompts('email'))
+        self.assertEqual(results, [self.email, self.blog])
+
+    def test_typo_falls_back_to_trigram(self):
+        """Test a misspelled query still finds the prompt by title."""
+        self.assertIn(self.blog, search_prompts('Blog Post Generater'))
+
+    def test_empty_query(self):
+        """Test an empty query returns nothing."""
+        self.assertFalse(search_prompts('  ').exists())
+
+
+class TagTests(TestCase):
+    """Tests for normalized prompt tags."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='seller',
+            email='seller@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Writing')
+
+    def create_prompt(self, title, tags):
+        """Create a published prompt with tags."""
+        return Prompt.objects.create(
+            title=title, description='Description', content='Content', category=self.category,
+            price=10, status='published', thumbnail='prompts/thumbnails/test.png',
+            author=self.user, tags=tags
+        )
+
+    def test_tags_are_normalized(self):
+        """Test the tags string is synced to Tag rows with usage counts."""
+        email = self.create_prompt('Email Writer', 'Email, Business, email')
+        self.create_prompt('Blog Writer', 'blog, business')
+
+        self.assertEqual(Tag.objects.get(tag_slug='business').usage_count, 2)
+        self.assertEqual(Tag.objects.get(tag_slug='email').usage_count, 1)
+        self.assertEqual(list(filter_by_tag(Prompt.objects.all(), 'email')), [email])
+        self.assertEqual(tag_cloud()[0]['tag_slug'], 'business')
+
+    def test_tag_changes_update_usage_counts(self):
+        """Test editing and deleting a prompt keeps usage counts in sync."""
+        prompt = self.create_prompt('Email Writer', 'email, business')
+        prompt = Prompt.objects.get(pk=prompt.pk)
+        prompt.tags = 'email, sales'
+        prompt.save()
+
+        self.assertEqual(Tag.objects.get(tag_slug='business').usage_count, 0)
+        self.assertEqual(Tag.objects.get(tag_slug='sales').usage_count, 1)
+
+        prompt.delete()
+        self.assertEqual(Tag.objects.get(tag_slug='email').usage_count, 0)
+
+    def test_tags_prefetched_in_one_query(self):
+        """Test tags for a page of prompts are loaded with one prefetch query."""
+        for i in range(5):
+            self.create_prompt(f'Prompt {i}', f'tag{i}, shared')
+        with self.assertNumQueries(2):
+            prompts = list(Prompt.objects.prefetch_related('tag_items'))
+            tags = [prompt.get_tags_list() for prompt in prompts]
+        self.assertEqual(sorted(tags[0]), sorted(['shared', 'tag4']))
+
+
+class KeysetPaginationTests(TestCase):
+    """Tests for keyset pagination."""
+
+    def setUp(self):
+        """Set up purchases sharing created_at values to exercise the id tiebreaker."""
+        user = User.objects.create_user(
+            username='buyer',
+            email='buyer@example.com',
+            password='testpass123'
+        )
+        prompt = Prompt.objects.create(
+            title='Email Writer', description='Description', content='Content',
+            category=Category.objects.create(name='Writing'), price=10,
+            thumbnail='prompts/thumbnails/test.png', author=user
+        )
+        for i in range(7):
+            Purchase.objects.create(user=user, prompt=prompt, price_paid=10, transaction_id=f'TX{i}')
+        Purchase.objects.filter(transaction_id__in=['TX2', 'TX3', 'TX4']).update(
+            created_at=Purchase.objects.get(transaction_id='TX2').created_at
+        )
+        self.expected = list(Purchase.objects.order_by('-created_at', '-id'))
+
+    def test_walk_forward_and_back(self):
+        """Test every row is visited exactly once in both directions."""
+        paginator = KeysetPaginator(Purchase.objects.all(), 3)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+
+        self.assertEqual([obj for page in pages for obj in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+        previous = paginator.get_page(pages[-1].previous_cursor)
+        self.assertEqual(list(previous), list(pages[-2]))
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Test a tampered cursor falls back to the first page."""
+        page = KeysetPaginator(Purchase.objects.all(), 3).get_page('not-a-cursor')
+        self.assertEqual(list(page), self.expected[:3])
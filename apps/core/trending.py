@@ -0,0 +1,122 @@
+"""
+Trending prompts with time-decayed scores.
+
+Mỗi sự kiện (view, purchase, review) cộng ``weight * e^(λ(t - epoch))`` vào
+sorted set ``trending:scores`` trên Redis (forward decay): điểm của sự kiện
+cũ tự nhỏ dần tương đối so với sự kiện mới mà không phải cập nhật lại từng
+phần tử, với λ = ln 2 / TRENDING_HALF_LIFE_HOURS. Mỗi sự kiện là một lần
+EVALSHA (một round trip).
+
+Task refresh_trending chạy định kỳ:
+1. "rebase" - nhân mọi điểm với e^(-λ(now - epoch)) và dời epoch về now
+   để số không tràn, đồng thời bỏ các prompt có điểm quá nhỏ;
+2. chụp top-N sang ``trending:top`` - trang chủ đọc bằng một ZREVRANGE;
+3. đồng bộ cờ Prompt.is_trending theo top-N (cờ không còn đặt tay).
+"""
+import logging
+import math
+import time
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .models import Prompt
+
+logger = logging.getLogger(__name__)
+
+SCORES_KEY = 'trending:scores'
+EPOCH_KEY = 'trending:epoch'
+TOP_KEY = 'trending:top'
+
+# Sau rebase, prompt có điểm (đã quy về hiện tại) dưới ngưỡng này bị bỏ
+MIN_SCORE = 0.01
+
+_RECORD_LUA = """
+local epoch = redis.call('GET', KEYS[2])
+if not epoch then
+    epoch = ARGV[3]
+    redis.call('SET', KEYS[2], epoch)
+end
+local amount = tonumber(ARGV[1]) * math.exp(tonumber(ARGV[2]) * (tonumber(ARGV[3]) - tonumber(epoch)))
+return redis.call('ZINCRBY', KEYS[1], amount, ARGV[4])
+"""
+
+_REBASE_LUA = """
+local epoch = redis.call('GET', KEYS[2])
+if not epoch then
+    return 0
+end
+local factor = math.exp(-tonumber(ARGV[1]) * (tonumber(ARGV[2]) - tonumber(epoch)))
+redis.call('ZUNIONSTORE', KEYS[1], 1, KEYS[1], 'WEIGHTS', factor)
+redis.call('SET', KEYS[2], ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[3])
+return redis.call('ZCARD', KEYS[1])
+"""
+
+_scripts = {}
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def _script(source):
+    if source not in _scripts:
+        _scripts[source] = _redis().register_script(source)
+    return _scripts[source]
+
+
+def decay_rate():
+    """λ in 1/seconds for the configured half-life."""
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def record_event(prompt_id, kind, now=None):
+    """
+    Add one ``kind`` event ('view', 'purchase', 'review') for a prompt.
+
+    Best effort: Redis errors are logged and swallowed.
+    """
+    weight = settings.TRENDING_WEIGHTS[kind]
+    now = time.time() if now is None else now
+    try:
+        _script(_RECORD_LUA)(
+            keys=[SCORES_KEY, EPOCH_KEY], args=[weight, decay_rate(), now, prompt_id], client=_redis()
+        )
+    except RedisError:
+        logger.warning('Could not record trending event for prompt %s', prompt_id, exc_info=True)
+
+
+def top_prompt_ids(limit=None):
+    """Ids of the current trending snapshot, best first."""
+    limit = settings.TRENDING_SIZE if limit is None else limit
+    return [int(pk) for pk in _redis().zrevrange(TOP_KEY, 0, limit - 1)]
+
+
+def refresh_trending(now=None):
+    """
+    Rebase the decayed scores, snapshot the top-N and sync is_trending.
+
+    Returns:
+        tuple: (top prompt ids, whether the snapshot changed)
+    """
+    redis = _redis()
+    now = time.time() if now is None else now
+    _script(_REBASE_LUA)(
+        keys=[SCORES_KEY, EPOCH_KEY], args=[decay_rate(), now, MIN_SCORE], client=redis
+    )
+    top = redis.zrevrange(SCORES_KEY, 0, settings.TRENDING_SIZE - 1, withscores=True)
+    top_ids = [int(pk) for pk, _ in top]
+
+    changed = top_ids != top_prompt_ids()
+    if changed:
+        pipe = redis.pipeline(transaction=True)
+        pipe.delete(TOP_KEY)
+        if top:
+            pipe.zadd(TOP_KEY, {pk: score for pk, score in top})
+        pipe.execute()
+
+        Prompt.objects.filter(is_trending=True).exclude(pk__in=top_ids).update(is_trending=False)
+        Prompt.objects.filter(pk__in=top_ids, is_trending=False).update(is_trending=True)
+    return top_ids, changed
@@ -8,5 +8,7 @@ app_name = 'core'
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('search/', views.search, name='search'),
     path('about/', views.about, name='about'),
+    path('metrics', views.metrics, name='metrics'),
 ]
@@ -38,6 +38,9 @@ urlpatterns = [
     path('settings/', views_dashboard.settings_view, name='settings'),
     path('profile/', views_dashboard.settings_view, name='profile'),  # Placeholder
     
+    # Exports
+    path('export/', views_dashboard.export_data, name='export'),
+    
     # Search
     path('search/', views_dashboard.search, name='search'),
 ]
@@ -0,0 +1,73 @@
+"""
+Process-local copies of small, rarely-changing data.
+
+Mỗi ``VersionedCache`` giữ một bản dựng sẵn trong process và một số phiên bản
+``<name>:version`` trong cache (Redis). ``get()`` chỉ so lại phiên bản tối đa
+mỗi LOCAL_CACHE_CHECK_INTERVAL giây; khi phiên bản đổi, bản mới được đọc từ
+cache (``<name>:<version>``) - chỉ process đầu tiên phải dựng lại từ DB.
+``invalidate()`` (gọi sau commit) tăng phiên bản cho mọi process.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from redis.exceptions import RedisError
+
+TIMEOUT = 24 * 3600
+
+
+class VersionedCache:
+    """A value built by ``build()``, shared between processes by version."""
+
+    def __init__(self, name, build):
+        self.name = name
+        self.build = build
+        self.version_key = f'{name}:version'
+        self.version = None
+        self._value = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, time.time_ns(), timeout=None)
+            version = cache.get(self.version_key)
+        return version
+
+    def get(self):
+        """The local copy, revalidated against the shared version at most every few seconds."""
+        value = self._value
+        now = time.monotonic()
+        if value is not None and now < self._expires_at:
+            return value
+        with self._lock:
+            try:
+                version = self._current_version()
+                if value is None or version != self.version:
+                    key = f'{self.name}:{version}'
+                    value = cache.get(key)
+                    if value is None:
+                        value = self.build()
+                        cache.set(key, value, TIMEOUT)
+            except RedisError:
+                # Không có Redis: tự dựng lại sau mỗi khoảng kiểm tra
+                version, value = None, self.build()
+            self.version, self._value = version, value
+            self._expires_at = now + settings.LOCAL_CACHE_CHECK_INTERVAL
+        return value
+
+    def clear(self):
+        """Drop this process's copy (the next ``get`` reads the shared one)."""
+        self._value = None
+
+    def invalidate(self):
+        """Bump the shared version and drop this process's copy (call after commit)."""
+        self._value = None
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.add(self.version_key, time.time_ns(), timeout=None)
+        except RedisError:
+            pass
@@ -1,67 +1,64 @@
 """
 Core app views.
 """
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404
 from django.views.generic import TemplateView
-from django.db.models import Count, Q
-from .models import Prompt, Category
+from .cache import get_home_sections
+from .mail import render_metrics
+from .metrics import registry
+from .models import Prompt
+from .search import search_prompts
 
 
 def home(request):
     """
     Home page view - Digital Marketplace.
     Renders the main marketplace homepage with database data.
+    A warm request is served entirely from the section cache.
     """
-    # Query featured prompts (hiển thị trên banner/popular section)
-    featured_prompts = Prompt.objects.filter(
-        status='published',
-        featured=True
-    ).select_related('category', 'author').order_by('-created_at')[:8]
-    
-    # Query trending prompts
-    trending_prompts = Prompt.objects.filter(
-        status='published',
-        is_trending=True
-    ).select_related('category', 'author').order_by('-views')[:6]
-    
-    # Query categories với số lượng products
-    categories = Category.objects.annotate(
-        product_count=Count('prompts', filter=Q(prompts__status='published'))
-    ).order_by('-product_count')[:8]
-    
-    # Query new arrivals
-    new_arrivals = Prompt.objects.filter(
-        status='published'
-    ).select_related('category', 'author').order_by('-created_at')[:12]
-    
-    # Best sellers (theo downloads)
-    best_sellers = Prompt.objects.filter(
-        status='published'
-    ).select_related('category', 'author').order_by('-downloads')[:6]
-    
-    # Stats
-    from django.db.models import Sum
-    total_products = Prompt.objects.filter(status='published').count()
-    total_downloads = Prompt.objects.aggregate(Sum('downloads'))['downloads__sum'] or 0
-    total_categories = Category.objects.count()
+    # Sections được cache riêng và invalidate qua signals (xem apps.core.cache)
+    sections = get_home_sections()
+    stats = sections['stats']
     
     context = {
         'title': 'Home - PromptHub Digital Marketplace',
         'page': 'home',
         # Data từ database
-        'featured_prompts': featured_prompts,
-        'trending_prompts': trending_prompts,
-        'categories': categories,
-        'new_arrivals': new_arrivals,
-        'best_sellers': best_sellers,
+        'featured_prompts': sections['featured_prompts'],
+        'trending_prompts': sections['trending_prompts'],
+        'categories': sections['categories'],
+        'new_arrivals': sections['new_arrivals'],
+        'best_sellers': sections['best_sellers'],
         # Stats
-        'total_products': total_products,
-        'total_downloads': total_downloads,
-        'total_categories': total_categories,
+        'total_products': stats['total_products'],
+        'total_downloads': stats['total_downloads'],
+        'total_categories': stats['total_categories'],
     }
     return render(request, 'marketplace/home.html', context)
 
 
+def search(request):
+    """Marketplace search page - ranked full-text search over published prompts."""
+    query = request.GET.get('q', '')
+    prompts = search_prompts(
+        query,
+        Prompt.objects.filter(status='published').select_related(
+            'category', 'author'
+        ).prefetch_related('tag_items')
+    )[:48]
+    
+    context = {
+        'title': 'Search - PromptHub',
+        'page': 'search',
+        'query': query,
+        'prompts': prompts,
+    }
+    return render(request, 'marketplace/search.html', context)
+
+
 def about(request):
     """About page view."""
     context = {
@@ -71,6 +68,15 @@ def about(request):
     return render(request, 'core/about.html', context)
 
 
+def metrics(request):
+    """Prometheus metrics of this worker process (xem apps.core.metrics) and of the email outbox."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS and not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(
+        registry.render() + render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 class HomeView(TemplateView):
     """
     Class-based view for home page.
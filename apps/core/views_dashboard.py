@@ -1,19 +1,33 @@
 """
 Dashboard views for admin interface
 """
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Count, Sum, Avg, Q
+from django.db.models import Count, Avg, F, Q
 from django.utils import timezone
-from datetime import timedelta
-from apps.core.models import Prompt, Category, Review, Purchase
+from datetime import date, timedelta
+from apps.core.models import Prompt, Category, Review, Purchase, MarketplaceStats, UserActivity
+from apps.core.search import search_prompts
+from apps.core.tags import filter_by_tag
+from apps.core.exports import DATASETS, FORMATS, export_chunks, export_filename
+from apps.core.pagination import KeysetPaginator, approximate_count
+from apps.core.rollups import sales_series, top_countries
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
+# ?sort= của trang users -> cột của UserActivity
+USER_SORT_FIELDS = {
+    'prompts': 'prompts_count',
+    'purchases': 'purchases_count',
+    'revenue': 'revenue',
+    'reviews': 'reviews_count',
+}
+
+
 def is_staff_or_superuser(user):
     """Check if user is staff or superuser"""
     return user.is_staff or user.is_superuser
@@ -24,55 +38,39 @@ def is_staff_or_superuser(user):
 def dashboard_home(request):
     """Dashboard home page with statistics"""
     
-    # Calculate stats
-    total_products = Prompt.objects.filter(status='published').count()
-    total_sales = Purchase.objects.count()
-    total_downloads = Prompt.objects.aggregate(Sum('downloads'))['downloads__sum'] or 0
-    total_earnings = Purchase.objects.aggregate(Sum('price_paid'))['price_paid__sum'] or 0
+    # Stats đọc từ bộ đếm MarketplaceStats (O(1), không quét bảng)
+    marketplace_stats = MarketplaceStats.load()
     
     stats = {
-        'total_products': total_products,
-        'total_sales': total_sales,
-        'total_downloads': total_downloads,
-        'total_earnings': f'${total_earnings:.2f}',
+        'total_products': marketplace_stats.total_products,
+        'total_sales': marketplace_stats.total_sales,
+        'total_downloads': marketplace_stats.total_downloads,
+        'total_earnings': f'${marketplace_stats.total_earnings:.2f}',
     }
     
-    # User balance (mock data - replace with real calculation)
-    user_balance = 580.00
+    # Doanh thu bán được của user đang đăng nhập
+    activity = UserActivity.objects.filter(user=request.user).first()
+    user_balance = activity.revenue if activity else 0
     
-    # Top countries (mock data - replace with real data from Purchase model)
-    top_countries = [
-        {'name': 'United States', 'flag': 'assets/images/thumbs/flag1.png', 'amount': 58.00},
-        {'name': 'Mexico', 'flag': 'assets/images/thumbs/flag2.png', 'amount': 69.00},
-        {'name': 'Brazil', 'flag': 'assets/images/thumbs/flag3.png', 'amount': 120.00},
-        {'name': 'Canada', 'flag': 'assets/images/thumbs/flag4.png', 'amount': 25.00},
-        {'name': 'Ireland', 'flag': 'assets/images/thumbs/flag5.png', 'amount': 85.00},
-    ]
+    # Doanh số đọc từ SalesRollup (apps.core.rollups), không GROUP BY bảng Purchase
+    today = timezone.localdate()
+    
+    # Top countries (last 30 days)
+    countries = top_countries(since=today - timedelta(days=30))
     
     # Recent sales (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_sales = Purchase.objects.filter(
-        created_at__gte=thirty_days_ago
-    ).values('created_at__date').annotate(
-        items_count=Count('id'),
-        amount=Sum('price_paid')
-    ).order_by('-created_at__date')[:13]
+    recent_sales = sales_series(since=today - timedelta(days=30)).order_by('-period_start')[:13]
     
     # Sales data for chart (last 7 days)
-    seven_days_ago = timezone.now() - timedelta(days=7)
-    sales_by_day = Purchase.objects.filter(
-        created_at__gte=seven_days_ago
-    ).values('created_at__date').annotate(
-        total=Sum('price_paid')
-    ).order_by('created_at__date')
+    sales_by_day = sales_series(since=today - timedelta(days=7))
     
-    sales_labels = [sale['created_at__date'].strftime('%b %d') for sale in sales_by_day]
-    sales_data = [float(sale['total']) for sale in sales_by_day]
+    sales_labels = [sale['date'].strftime('%b %d') for sale in sales_by_day]
+    sales_data = [float(sale['amount']) for sale in sales_by_day]
     
     context = {
         'stats': stats,
         'user_balance': user_balance,
-        'top_countries': top_countries,
+        'top_countries': countries,
         'recent_sales': recent_sales,
         'sales_labels': sales_labels,
         'sales_data': sales_data,
@@ -86,33 +84,31 @@ def dashboard_home(request):
 def prompts_list(request):
     """List all prompts with filters"""
     
-    prompts = Prompt.objects.select_related('category', 'author').all()
+    prompts = Prompt.objects.select_related('category', 'author').prefetch_related('tag_items')
     
     # Filters
     category_id = request.GET.get('category')
     status = request.GET.get('status')
     search = request.GET.get('q')
+    tag = request.GET.get('tag')
     
     if category_id:
         prompts = prompts.filter(category_id=category_id)
     
+    if tag:
+        prompts = filter_by_tag(prompts, tag)
+    
     if status:
         prompts = prompts.filter(status=status)
     
     if search:
-        prompts = prompts.filter(
-            Q(title__icontains=search) |
-            Q(description__icontains=search) |
-            Q(tags__icontains=search)
-        )
-    
-    # Order by latest
-    prompts = prompts.order_by('-created_at')
+        # Full-text search; kết quả vẫn sắp theo ngày tạo để phân trang keyset
+        prompts = search_prompts(search, prompts)
     
-    # Pagination
-    paginator = Paginator(prompts, 20)
-    page = request.GET.get('page', 1)
-    prompts_page = paginator.get_page(page)
+    # Keyset pagination theo (-created_at, -id); chỉ ước lượng tổng khi không lọc
+    filtered = any([category_id, status, search, tag])
+    paginator = KeysetPaginator(prompts, 20, count=None if filtered else approximate_count(Prompt))
+    prompts_page = paginator.get_page(request.GET.get('cursor'), request.GET)
     
     # Get all categories for filter dropdown
     categories = Category.objects.all()
@@ -206,10 +202,9 @@ def sales_list(request):
         'user', 'prompt', 'prompt__category'
     ).order_by('-created_at')
     
-    # Pagination
-    paginator = Paginator(purchases, 20)
-    page = request.GET.get('page', 1)
-    purchases_page = paginator.get_page(page)
+    # Keyset pagination
+    paginator = KeysetPaginator(purchases, 20, count=approximate_count(Purchase))
+    purchases_page = paginator.get_page(request.GET.get('cursor'), request.GET)
     
     context = {
         'purchases': purchases_page,
@@ -227,10 +222,9 @@ def reviews_list(request):
         'user', 'prompt'
     ).order_by('-created_at')
     
-    # Pagination
-    paginator = Paginator(reviews, 20)
-    page = request.GET.get('page', 1)
-    reviews_page = paginator.get_page(page)
+    # Keyset pagination
+    paginator = KeysetPaginator(reviews, 20, count=approximate_count(Review))
+    reviews_page = paginator.get_page(request.GET.get('cursor'), request.GET)
     
     context = {
         'reviews': reviews_page,
@@ -244,18 +238,29 @@ def reviews_list(request):
 def users_list(request):
     """List all users"""
     
-    users = User.objects.annotate(
-        prompts_count=Count('prompts'),
-        purchases_count=Count('purchases')
-    ).order_by('-date_joined')
-    
-    # Pagination
-    paginator = Paginator(users, 20)
-    page = request.GET.get('page', 1)
-    users_page = paginator.get_page(page)
+    # Số liệu đọc từ UserActivity (1 JOIN 1-1) thay vì Count() trên 2 bảng
+    # con cùng lúc - vốn nhân chéo prompts x purchases cho mỗi user
+    sort = request.GET.get('sort', '')
+    sort_field = USER_SORT_FIELDS.get(sort)
+    if sort_field:
+        # Phân trang trực tiếp trên UserActivity để seek khớp index (-field, -user);
+        # create_user_activity đảm bảo mỗi user có một dòng
+        activities = UserActivity.objects.select_related('user')
+        paginator = KeysetPaginator(
+            activities, 20, ordering=(f'-{sort_field}', '-user_id'), count=approximate_count(UserActivity)
+        )
+        users_page = paginator.get_page(request.GET.get('cursor'), request.GET)
+        users_page.object_list = [activity.user for activity in users_page.object_list]
+    else:
+        paginator = KeysetPaginator(
+            User.objects.select_related('activity'), 20, ordering=('-date_joined', '-id'),
+            count=approximate_count(User),
+        )
+        users_page = paginator.get_page(request.GET.get('cursor'), request.GET)
     
     context = {
         'users': users_page,
+        'sort': sort if sort_field else '',
     }
     
     return render(request, 'dashboard/users_list.html', context)
@@ -267,15 +272,12 @@ def earnings_view(request):
     """Earnings overview"""
     
     # Total earnings
-    total = Purchase.objects.aggregate(Sum('price_paid'))['price_paid__sum'] or 0
+    total = MarketplaceStats.load().total_earnings
     
     # Earnings by month
-    from django.db.models.functions import TruncMonth
-    monthly_earnings = Purchase.objects.annotate(
-        month=TruncMonth('created_at')
-    ).values('month').annotate(
-        total=Sum('price_paid')
-    ).order_by('-month')[:12]
+    monthly_earnings = sales_series(period='month').values(
+        month=F('period_start'), total=F('amount')
+    ).order_by('-period_start')[:12]
     
     context = {
         'total_earnings': total,
@@ -303,9 +305,7 @@ def search(request):
     query = request.GET.get('q', '')
     
     results = {
-        'prompts': Prompt.objects.filter(
-            Q(title__icontains=query) | Q(description__icontains=query)
-        )[:10],
+        'prompts': search_prompts(query)[:10],
         'categories': Category.objects.filter(name__icontains=query)[:5],
         'users': User.objects.filter(
             Q(username__icontains=query) | Q(email__icontains=query)
@@ -318,3 +318,26 @@ def search(request):
     }
     
     return render(request, 'dashboard/search_results.html', context)
+
+
+@login_required
+@user_passes_test(is_staff_or_superuser)
+def export_data(request):
+    """Stream a gzip CSV/JSONL export: ?dataset=purchases|prompts|interactions&format=csv|jsonl&since=&until="""
+    dataset = request.GET.get('dataset', 'purchases')
+    file_format = request.GET.get('format', 'csv')
+    if dataset not in DATASETS or file_format not in FORMATS:
+        return HttpResponseBadRequest('Unknown dataset or format')
+    try:
+        since, until = (
+            date.fromisoformat(request.GET[key]) if request.GET.get(key) else None for key in ('since', 'until')
+        )
+    except ValueError:
+        return HttpResponseBadRequest('Dates must be YYYY-MM-DD')
+    
+    response = StreamingHttpResponse(
+        export_chunks(dataset, file_format, since, until), content_type=FORMATS[file_format][1]
+    )
+    filename = export_filename(dataset, file_format, since, until)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -2,6 +2,7 @@
 Django Admin configuration for PromptHub models.
 """
 from django.contrib import admin
+from apps.core.references import with_references
 from .models import (
     Avatar, Role, Permission, RolePermission,
     AIPlatform, AIModel, Category, Tag,
@@ -49,10 +50,13 @@ class AIModelAdmin(admin.ModelAdmin):
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['id_category', 'category_name', 'parent_category', 'active', 'sort_order']
+    list_display = [
+        'id_category', 'category_name', 'path', 'prompt_count', 'subtree_prompt_count', 'active', 'sort_order'
+    ]
     search_fields = ['category_name', 'category_code']
-    list_filter = ['active']
-    ordering = ['sort_order']
+    list_filter = ['active', 'depth']
+    readonly_fields = ['path', 'depth', 'prompt_count', 'subtree_prompt_count']
+    ordering = ['path']
 
 
 @admin.register(Tag)
@@ -122,6 +126,8 @@ class PromptAdmin(admin.ModelAdmin):
         'created_at', 'updated_at'
     ]
     inlines = [PromptContentInline, PromptCategoryInline, PromptTagInline, PromptAIModelInline]
+    # level lấy từ registry bảng tham chiếu, chỉ JOIN users
+    list_select_related = ['created_by']
     
     fieldsets = (
         ('Thông tin cơ bản', {
@@ -144,14 +150,18 @@ class PromptAdmin(admin.ModelAdmin):
             'fields': ('created_by', 'created_at', 'updated_by', 'updated_at', 'active')
         }),
     )
+    
+    def get_queryset(self, request):
+        return with_references(super().get_queryset(request), 'level')
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ['id_comment', 'prompt', 'user', 'status', 'like_count', 'created_at']
+    list_display = ['id_comment', 'prompt', 'user', 'status', 'depth', 'reply_count', 'like_count', 'created_at']
     search_fields = ['comment_text', 'user__username', 'prompt__title']
     list_filter = ['status', 'created_at']
-    readonly_fields = ['created_at', 'updated_at']
+    raw_id_fields = ['parent_comment']
+    readonly_fields = ['thread_root', 'depth', 'reply_count', 'like_count', 'created_at', 'updated_at']
 
 
 @admin.register(SubscriptionPlan)
@@ -66,12 +66,14 @@ class Command(BaseCommand):
     
     def import_seed_data(self):
         """Import seed data."""
+        from apps.core import category_tree
         from apps.prompthub.models import (
             Role, Permission, PromptLevel, AIPlatform, AIModel,
             Category, SubscriptionPlan, SystemConfig
         )
         
         self.stdout.write('Importing seed data...')
+        # Một INSERT cho mỗi bảng; dòng đã có (trùng khóa) được giữ nguyên
         
         # Roles
         roles_data = [
@@ -82,8 +84,7 @@ class Command(BaseCommand):
             {'role_name': 'Moderator', 'role_code': 'MODERATOR', 'description': 'Kiểm duyệt nội dung', 'role_level': 6},
             {'role_name': 'Quản trị viên', 'role_code': 'ADMIN', 'description': 'Quản trị hệ thống', 'role_level': 10},
         ]
-        for data in roles_data:
-            Role.objects.get_or_create(role_code=data['role_code'], defaults=data)
+        Role.objects.bulk_create([Role(**data) for data in roles_data], ignore_conflicts=True)
         self.stdout.write('✓ Roles imported')
         
         # Permissions
@@ -94,8 +95,7 @@ class Command(BaseCommand):
             {'permission_name': 'Xóa prompt', 'permission_code': 'prompt.delete', 'module': 'prompt'},
             {'permission_name': 'Xem premium', 'permission_code': 'prompt.view_premium', 'module': 'prompt'},
         ]
-        for data in permissions_data:
-            Permission.objects.get_or_create(permission_code=data['permission_code'], defaults=data)
+        Permission.objects.bulk_create([Permission(**data) for data in permissions_data], ignore_conflicts=True)
         self.stdout.write('✓ Permissions imported')
         
         # Prompt Levels
@@ -106,8 +106,7 @@ class Command(BaseCommand):
             {'id_level': 4, 'level_name': 'Chuyên gia', 'level_code': 'EXPERT', 'ticket_cost': 2, 'requires_premium': True},
             {'id_level': 5, 'level_name': 'Premium', 'level_code': 'PREMIUM', 'ticket_cost': 5, 'requires_premium': True},
         ]
-        for data in levels_data:
-            PromptLevel.objects.get_or_create(id_level=data['id_level'], defaults=data)
+        PromptLevel.objects.bulk_create([PromptLevel(**data) for data in levels_data], ignore_conflicts=True)
         self.stdout.write('✓ Prompt Levels imported')
         
         # AI Platforms
@@ -117,8 +116,7 @@ class Command(BaseCommand):
             {'id_platform': 'AI003', 'platform_name': 'Gemini', 'platform_code': 'gemini', 'company_name': 'Google'},
             {'id_platform': 'AI004', 'platform_name': 'Copilot', 'platform_code': 'copilot', 'company_name': 'Microsoft'},
         ]
-        for data in platforms_data:
-            AIPlatform.objects.get_or_create(id_platform=data['id_platform'], defaults=data)
+        AIPlatform.objects.bulk_create([AIPlatform(**data) for data in platforms_data], ignore_conflicts=True)
         self.stdout.write('✓ AI Platforms imported')
         
         # Categories
@@ -129,8 +127,9 @@ class Command(BaseCommand):
             {'id_category': 'CA004', 'category_name': 'Giáo dục', 'category_code': 'education'},
             {'id_category': 'CA005', 'category_name': 'Kinh doanh', 'category_code': 'business'},
         ]
-        for data in categories_data:
-            Category.objects.get_or_create(id_category=data['id_category'], defaults=data)
+        Category.objects.bulk_create([Category(**data) for data in categories_data], ignore_conflicts=True)
+        # bulk_create không qua signals: đặt path/bộ đếm cho cây danh mục
+        category_tree.rebuild()
         self.stdout.write('✓ Categories imported')
         
         # Subscription Plans
@@ -151,8 +150,7 @@ class Command(BaseCommand):
                 'price': 149000, 'can_access_premium': True
             },
         ]
-        for data in plans_data:
-            SubscriptionPlan.objects.get_or_create(id_plan=data['id_plan'], defaults=data)
+        SubscriptionPlan.objects.bulk_create([SubscriptionPlan(**data) for data in plans_data], ignore_conflicts=True)
         self.stdout.write('✓ Subscription Plans imported')
         
         self.stdout.write(self.style.SUCCESS('All seed data imported successfully!'))
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prompthub', '0002_tag_usage_count_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prompt',
+            name='bayesian_rating',
+            field=models.DecimalField(db_column='bayesian_rating', decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='prompt',
+            name='rating_sum',
+            field=models.IntegerField(db_column='rating_sum', default=0),
+        ),
+        migrations.AddIndex(
+            model_name='prompt',
+            index=models.Index(fields=['-bayesian_rating'], name='prompts_bayesian_rating_idx'),
+        ),
+    ]
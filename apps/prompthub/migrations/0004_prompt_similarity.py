@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:12
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prompthub', '0003_prompt_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromptSimilarity',
+            fields=[
+                ('prompt', models.OneToOneField(db_column='id_prompt', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity', serialize=False, to='prompthub.prompt')),
+                ('similar_ids', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=12), db_column='similar_ids', default=list, size=None)),
+                ('scores', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), default=list, size=None)),
+                ('norm', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_column='updated_at')),
+            ],
+            options={
+                'verbose_name': 'Prompt Similarity',
+                'verbose_name_plural': 'Prompt Similarities',
+                'db_table': 'prompt_similarities',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['similar_ids'], name='prompt_similarities_ids_gin')],
+            },
+        ),
+    ]
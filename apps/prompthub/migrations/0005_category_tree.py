@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:48
+
+from django.db import migrations, models
+
+# Đặt path/depth và bộ đếm cho dữ liệu đã có (giống apps.core.category_tree.rebuild)
+BACKFILL_SQL = """
+    WITH RECURSIVE tree (id_category, path, depth) AS (
+        SELECT id_category, id_category || '/', 0 FROM categories WHERE parent_category_id IS NULL
+        UNION ALL
+        SELECT c.id_category, t.path || c.id_category || '/', t.depth + 1
+        FROM categories c JOIN tree t ON c.parent_category_id = t.id_category
+    )
+    UPDATE categories c SET path = t.path, depth = t.depth FROM tree t WHERE t.id_category = c.id_category;
+
+    WITH direct AS (
+        SELECT id_category, count(*) AS n FROM prompt_categories WHERE active GROUP BY id_category
+    ), totals AS (
+        SELECT a.id_category, sum(direct.n) AS n
+        FROM categories a
+        JOIN categories d ON a.path <> '' AND left(d.path, length(a.path)) = a.path
+        JOIN direct ON direct.id_category = d.id_category
+        GROUP BY a.id_category
+    )
+    UPDATE categories c
+    SET prompt_count = COALESCE(direct.n, 0), subtree_prompt_count = COALESCE(totals.n, 0)
+    FROM categories x
+    LEFT JOIN direct ON direct.id_category = x.id_category
+    LEFT JOIN totals ON totals.id_category = x.id_category
+    WHERE x.id_category = c.id_category;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prompthub', '0004_prompt_similarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.SmallIntegerField(db_column='depth', default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_column='path', default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='prompt_count',
+            field=models.IntegerField(db_column='prompt_count', default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='subtree_prompt_count',
+            field=models.IntegerField(db_column='subtree_prompt_count', default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='categories_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
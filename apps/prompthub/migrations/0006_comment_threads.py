@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# thread_root/depth và reply_count cho bình luận đã có
+BACKFILL_SQL = """
+    WITH RECURSIVE tree (id_comment, thread_root_id, depth) AS (
+        SELECT id_comment, NULL::integer, 0 FROM comments WHERE parent_comment_id IS NULL
+        UNION ALL
+        SELECT c.id_comment, COALESCE(t.thread_root_id, t.id_comment), t.depth + 1
+        FROM comments c JOIN tree t ON c.parent_comment_id = t.id_comment
+    )
+    UPDATE comments c SET thread_root_id = t.thread_root_id, depth = t.depth
+    FROM tree t WHERE t.id_comment = c.id_comment AND t.depth > 0;
+
+    UPDATE comments c SET reply_count = r.n FROM (
+        SELECT parent_comment_id, count(*) AS n FROM comments
+        WHERE parent_comment_id IS NOT NULL AND status = 1 GROUP BY parent_comment_id
+    ) r WHERE r.parent_comment_id = c.id_comment;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('prompthub', '0005_category_tree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentLike',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_column='created_at')),
+            ],
+            options={
+                'db_table': 'comment_likes',
+            },
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.SmallIntegerField(db_column='depth', default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.IntegerField(db_column='reply_count', default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='thread_root',
+            field=models.ForeignKey(blank=True, db_column='thread_root_id', editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_replies', to='prompthub.comment'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('parent_comment__isnull', True)), fields=['prompt', '-created_at', '-id_comment'], name='comments_roots_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['thread_root', 'created_at', 'id_comment'], name='comments_thread_idx'),
+        ),
+        migrations.AddField(
+            model_name='commentlike',
+            name='comment',
+            field=models.ForeignKey(db_column='id_comment', on_delete=django.db.models.deletion.CASCADE, related_name='likes', to='prompthub.comment'),
+        ),
+        migrations.AddField(
+            model_name='commentlike',
+            name='user',
+            field=models.ForeignKey(db_column='id_user', on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='commentlike',
+            unique_together={('comment', 'user')},
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
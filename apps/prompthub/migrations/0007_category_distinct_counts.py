@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:20
+
+from django.db import migrations
+
+# subtree_prompt_count đếm prompt phân biệt (giống apps.core.category_tree.COUNTS_SQL)
+RECOUNT_SQL = """
+    UPDATE categories c SET subtree_prompt_count = COALESCE(totals.n, 0)
+    FROM categories x
+    LEFT JOIN (
+        SELECT a.id_category, count(DISTINCT pc.id_prompt) AS n
+        FROM categories a
+        JOIN categories d ON a.path <> '' AND left(d.path, length(a.path)) = a.path
+        JOIN prompt_categories pc ON pc.id_category = d.id_category AND pc.active
+        GROUP BY a.id_category
+    ) totals ON totals.id_category = x.id_category
+    WHERE x.id_category = c.id_category;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prompthub', '0006_comment_threads'),
+    ]
+
+    operations = [
+        migrations.RunSQL(RECOUNT_SQL, migrations.RunSQL.noop),
+    ]
@@ -2,6 +2,8 @@
 Django models for PromptHub database.
 Chuyển đổi từ PostgreSQL schema sang Django ORM.
 """
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.contrib.auth import get_user_model
 from apps.users.models import User
@@ -161,15 +163,46 @@ class Category(models.Model):
     color_hex = models.CharField(max_length=7, blank=True, null=True, db_column='color_hex')
     sort_order = models.IntegerField(default=0, db_column='sort_order')
     active = models.BooleanField(default=True)
+    # Materialized path 'CA001/CA004/' (tổ tiên -> chính nó), do apps.core.category_tree duy trì
+    path = models.CharField(max_length=255, default='', editable=False, db_column='path')
+    depth = models.SmallIntegerField(default=0, editable=False, db_column='depth')
+    # Số prompt có liên kết PromptCategory active tới danh mục / tới bất kỳ danh mục nào trong cây con
+    prompt_count = models.IntegerField(default=0, editable=False, db_column='prompt_count')
+    subtree_prompt_count = models.IntegerField(default=0, editable=False, db_column='subtree_prompt_count')
+    
+    COUNT_FIELDS = ('prompt_count', 'subtree_prompt_count')
     
     class Meta:
         db_table = 'categories'
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'
         ordering = ['sort_order', 'category_name']
+        indexes = [
+            # LIKE 'CA001/%' (cây con) dùng được index với varchar_pattern_ops
+            models.Index(fields=['path'], name='categories_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
     
     def __str__(self):
         return self.category_name
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Giá trị cũ để biết danh mục có bị chuyển sang nhánh khác không
+        instance._loaded_values = {
+            field: value for field, value in zip(field_names, values)
+            if field in ('parent_category_id', 'path', 'depth')
+        }
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Bộ đếm chỉ được cập nhật bằng F(); không ghi đè bằng giá trị cũ trong instance
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNT_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
 
 class Tag(models.Model):
@@ -184,6 +217,9 @@ class Tag(models.Model):
         db_table = 'tags'
         verbose_name = 'Tag'
         verbose_name_plural = 'Tags'
+        indexes = [
+            models.Index(fields=['-usage_count'], name='tags_usage_count_idx'),
+        ]
     
     def __str__(self):
         return self.tag_name
@@ -321,6 +357,14 @@ class Prompt(models.Model):
         db_column='average_rating'
     )
     rating_count = models.IntegerField(default=0, db_column='rating_count')
+    # Duy trì tăng dần bởi apps.core.ratings từ UserPromptInteraction.rating
+    rating_sum = models.IntegerField(default=0, db_column='rating_sum')
+    bayesian_rating = models.DecimalField(
+        max_digits=3,
+        decimal_places=2,
+        default=0,
+        db_column='bayesian_rating'
+    )
     
     status = models.SmallIntegerField(choices=STATUS_CHOICES, default=1)
     published_at = models.DateTimeField(blank=True, null=True, db_column='published_at')
@@ -348,6 +392,11 @@ class Prompt(models.Model):
     tags = models.ManyToManyField(Tag, through='PromptTag', related_name='prompts')
     ai_models = models.ManyToManyField(AIModel, through='PromptAIModel', related_name='prompts')
     
+    COUNT_FIELDS = (
+        'view_count', 'like_count', 'share_count',
+        'average_rating', 'rating_count', 'rating_sum', 'bayesian_rating',
+    )
+    
     class Meta:
         db_table = 'prompts'
         verbose_name = 'Prompt'
@@ -357,10 +406,20 @@ class Prompt(models.Model):
             models.Index(fields=['slug']),
             models.Index(fields=['status']),
             models.Index(fields=['created_by']),
+            models.Index(fields=['-bayesian_rating'], name='prompts_bayesian_rating_idx'),
         ]
     
     def __str__(self):
         return self.title
+    
+    def save(self, *args, **kwargs):
+        # Bộ đếm chỉ được cập nhật bằng F()/apps.core.counters; không ghi đè giá trị cũ
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNT_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
 
 class PromptContent(models.Model):
@@ -400,6 +459,16 @@ class PromptCategory(models.Model):
     class Meta:
         db_table = 'prompt_categories'
         unique_together = [['prompt', 'category']]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Giá trị cũ để tính delta cho Category.prompt_count/subtree_prompt_count
+        instance._loaded_values = {
+            field: value for field, value in zip(field_names, values)
+            if field in ('category_id', 'active')
+        }
+        return instance
 
 
 class PromptTag(models.Model):
@@ -451,6 +520,54 @@ class UserPromptInteraction(models.Model):
         unique_together = [['user', 'prompt']]
         verbose_name = 'User Prompt Interaction'
         verbose_name_plural = 'User Prompt Interactions'
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Giá trị cũ để tính delta cho Prompt.rating_sum/rating_count
+        instance._loaded_values = {
+            field: value for field, value in zip(field_names, values)
+            if field in ('rating', 'prompt_id')
+        }
+        return instance
+
+
+class PromptSimilarity(models.Model):
+    """
+    "Người dùng cũng thích": top-K prompt tương tự (cosine item-item trên
+    UserPromptInteraction), do task build_recommendations tính sẵn để trang
+    prompt chỉ cần đọc một dòng theo khóa chính.
+    """
+    prompt = models.OneToOneField(
+        Prompt,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_column='id_prompt',
+        related_name='similarity'
+    )
+    similar_ids = ArrayField(models.CharField(max_length=12), default=list, db_column='similar_ids')
+    scores = ArrayField(models.FloatField(), default=list)
+    # Độ dài vector tương tác của prompt, dùng cho lần refresh tăng dần
+    norm = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_column='updated_at')
+    
+    class Meta:
+        db_table = 'prompt_similarities'
+        verbose_name = 'Prompt Similarity'
+        verbose_name_plural = 'Prompt Similarities'
+        indexes = [
+            # Refresh tăng dần tìm các danh sách đang chứa prompt thay đổi
+            GinIndex(fields=['similar_ids'], name='prompt_similarities_ids_gin'),
+        ]
+    
+    def __str__(self):
+        return f"Similar to {self.prompt_id}"
+    
+    @classmethod
+    def users_also_liked(cls, prompt_id, limit=8):
+        """Ids of prompts similar to ``prompt_id``, best first (one PK lookup)."""
+        similar_ids = cls.objects.filter(pk=prompt_id).values_list('similar_ids', flat=True).first()
+        return (similar_ids or [])[:limit]
 
 
 class Comment(models.Model):
@@ -478,20 +595,74 @@ class Comment(models.Model):
         related_name='replies',
         db_column='parent_comment_id'
     )
+    # Bình luận gốc của thread (NULL với chính bình luận gốc), do apps.core.comments đặt
+    thread_root = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='thread_replies',
+        db_column='thread_root_id'
+    )
+    depth = models.SmallIntegerField(default=0, editable=False, db_column='depth')
     comment_text = models.TextField(db_column='comment_text')
     like_count = models.IntegerField(default=0, db_column='like_count')
+    # Số trả lời trực tiếp đang hiển thị
+    reply_count = models.IntegerField(default=0, db_column='reply_count')
     status = models.SmallIntegerField(choices=STATUS_CHOICES, default=1)
     created_at = models.DateTimeField(auto_now_add=True, db_column='created_at')
     updated_at = models.DateTimeField(auto_now=True, db_column='updated_at')
     
+    COUNT_FIELDS = ('like_count', 'reply_count')
+    
     class Meta:
         db_table = 'comments'
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
         ordering = ['-created_at']
+        indexes = [
+            # Trang bình luận gốc của một prompt (keyset mới nhất trước)
+            models.Index(
+                fields=['prompt', '-created_at', '-id_comment'],
+                condition=models.Q(parent_comment__isnull=True),
+                name='comments_roots_idx',
+            ),
+            # Trả lời của một thread theo thứ tự thời gian
+            models.Index(fields=['thread_root', 'created_at', 'id_comment'], name='comments_thread_idx'),
+        ]
     
     def __str__(self):
         return f"Comment by {self.user.username} on {self.prompt.title}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Trạng thái cũ để tính delta cho reply_count của bình luận cha
+        instance._loaded_values = {
+            field: value for field, value in zip(field_names, values) if field == 'status'
+        }
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Bộ đếm chỉ được cập nhật bằng F()/apps.core.counters; không ghi đè giá trị cũ
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNT_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class CommentLike(models.Model):
+    """Lượt thích bình luận (mỗi user một lần)"""
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name='likes', db_column='id_comment')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_column='id_user')
+    created_at = models.DateTimeField(auto_now_add=True, db_column='created_at')
+    
+    class Meta:
+        db_table = 'comment_likes'
+        unique_together = [['comment', 'user']]
 
 
 # =============================================
@@ -10,13 +10,13 @@ from .models import User
 class UserAdmin(BaseUserAdmin):
     """Custom User admin."""
     list_display = ['username', 'email', 'first_name', 'last_name', 'is_staff', 'created_at']
-    list_filter = ['is_staff', 'is_superuser', 'is_active', 'created_at']
+    list_filter = ['is_staff', 'is_superuser', 'is_active', 'role', 'created_at']
     search_fields = ['username', 'email', 'first_name', 'last_name']
     ordering = ['-created_at']
     
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Thông tin bổ sung', {
-            'fields': ('phone', 'avatar', 'bio', 'date_of_birth')
+            'fields': ('phone', 'avatar', 'bio', 'date_of_birth', 'role')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at')
@@ -15,6 +15,15 @@ class User(AbstractUser):
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, verbose_name='Ảnh đại diện')
     bio = models.TextField(blank=True, verbose_name='Giới thiệu')
     date_of_birth = models.DateField(blank=True, null=True, verbose_name='Ngày sinh')
+    # Trống = vai trò mặc định RBAC_DEFAULT_ROLE (xem apps.core.rbac)
+    role = models.ForeignKey(
+        'prompthub.Role',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='users',
+        verbose_name='Vai trò'
+    )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Ngày tạo')
@@ -24,6 +33,9 @@ class User(AbstractUser):
         verbose_name = 'Người dùng'
         verbose_name_plural = 'Người dùng'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-date_joined', '-id']),
+        ]
     
     def __str__(self):
         return self.username
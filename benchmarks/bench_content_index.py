@@ -0,0 +1,91 @@
+"""
+Benchmark for the content-similarity index (apps.core.content_index).
+
+Usage:
+    python benchmarks/bench_content_index.py --prompts 500000 --output content_index.json
+
+Sinh ``--prompts`` văn bản tổng hợp (từ vựng phân phối Zipf, mỗi prompt
+``--words`` từ), build index ra một file tạm rồi đo thời gian truy vấn
+``similar`` cho ``--queries`` prompt ngẫu nhiên. Không cần database.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+
+import django  # noqa: E402
+
+django.setup()
+
+from apps.core.content_index import ContentIndex, build_index  # noqa: E402
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile (nearest rank) of sorted samples."""
+    index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+def documents(count, words, vocabulary, seed):
+    """Yield (id, text) with Zipf-distributed words."""
+    rng = random.Random(seed)
+    terms = [f'w{rank}' for rank in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    pool = rng.choices(terms, weights=weights, k=1_000_000)
+    for i in range(count):
+        start = rng.randrange(len(pool) - words)
+        yield f'P{i:010d}', ' '.join(pool[start:start + words])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--prompts', type=int, default=500000, help='Number of synthetic prompts')
+    parser.add_argument('--words', type=int, default=80, help='Words per prompt')
+    parser.add_argument('--vocabulary', type=int, default=50000, help='Distinct words')
+    parser.add_argument('--queries', type=int, default=2000, help='Queries to time')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours per query')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'content_index.bin')
+        begin = time.perf_counter()
+        stats = build_index(documents(args.prompts, args.words, args.vocabulary, seed=1), path)
+        build_seconds = time.perf_counter() - begin
+
+        index = ContentIndex(path)
+        rng = random.Random(2)
+        ids = [f'P{rng.randrange(args.prompts):010d}' for _ in range(args.queries)]
+        index.similar(ids[0], args.k)  # làm nóng page cache
+        latencies = []
+        for prompt_id in ids:
+            begin = time.perf_counter()
+            index.similar(prompt_id, args.k)
+            latencies.append((time.perf_counter() - begin) * 1000)
+        latencies.sort()
+
+        result = {
+            'benchmark': 'content_index',
+            'prompts': stats['prompts'],
+            'terms': stats['terms'],
+            'postings': stats['postings'],
+            'index_bytes': os.path.getsize(path),
+            'build_s': round(build_seconds, 1),
+            'query_p50_ms': round(percentile(latencies, 50), 3),
+            'query_p99_ms': round(percentile(latencies, 99), 3),
+            'query_max_ms': round(latencies[-1], 3),
+        }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
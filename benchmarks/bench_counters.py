@@ -0,0 +1,121 @@
+"""
+Throughput benchmark for the Redis-buffered counters (apps.core.counters).
+
+Usage:
+    python benchmarks/bench_counters.py --workers 16 --increments 5000 --output counters.json
+
+Nhiều thread cùng tăng views của một nhóm nhỏ prompt "hot" trong khi một
+thread khác flush định kỳ như task Celery. Cuối cùng flush hết và so sánh
+số views tăng thêm trong database với số lần increment: kết quả ``lost``
+phải bằng 0. ``--mode direct`` chạy cùng tải bằng UPDATE ... F() trực tiếp
+để so sánh với cách cũ (row lock trên từng request).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection, connections  # noqa: E402
+from django.db.models import F, Sum  # noqa: E402
+
+from apps.core.counters import flush_counters, increment  # noqa: E402
+from apps.core.models import Prompt  # noqa: E402
+
+
+def worker(prompt_ids, count, mode):
+    """Increment random hot prompts ``count`` times."""
+    try:
+        for _ in range(count):
+            pk = random.choice(prompt_ids)
+            if mode == 'direct':
+                Prompt.objects.filter(pk=pk).update(views=F('views') + 1)
+            else:
+                increment(Prompt, pk, 'views')
+    finally:
+        connections.close_all()
+
+
+def flusher(stop, interval, flushes):
+    """Flush periodically until ``stop`` is set."""
+    try:
+        while not stop.wait(interval):
+            start = time.perf_counter()
+            flush_counters()
+            flushes.append((time.perf_counter() - start) * 1000)
+    finally:
+        connections.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent writer threads')
+    parser.add_argument('--increments', type=int, default=2000, help='Increments per worker')
+    parser.add_argument('--hot', type=int, default=10, help='Number of hot prompts')
+    parser.add_argument('--interval', type=float, default=0.5, help='Flush interval in seconds')
+    parser.add_argument('--mode', choices=['buffered', 'direct'], default='buffered')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    prompt_ids = list(Prompt.objects.order_by('?').values_list('pk', flat=True)[:args.hot])
+    if not prompt_ids:
+        sys.exit('No prompts found - seed the database first.')
+    flush_counters()  # bắt đầu từ trạng thái sạch
+    before = Prompt.objects.filter(pk__in=prompt_ids).aggregate(total=Sum('views'))['total']
+
+    stop, flushes = threading.Event(), []
+    background = threading.Thread(target=flusher, args=(stop, args.interval, flushes))
+    if args.mode == 'buffered':
+        background.start()
+
+    threads = [
+        threading.Thread(target=worker, args=(prompt_ids, args.increments, args.mode))
+        for _ in range(args.workers)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    if args.mode == 'buffered':
+        background.join()
+    flush_counters()
+
+    after = Prompt.objects.filter(pk__in=prompt_ids).aggregate(total=Sum('views'))['total']
+    expected = args.workers * args.increments
+    flushes.sort()
+    result = {
+        'benchmark': 'counters',
+        'mode': args.mode,
+        'vendor': connection.vendor,
+        'workers': args.workers,
+        'hot_prompts': len(prompt_ids),
+        'increments': expected,
+        'applied': after - before,
+        'lost': expected - (after - before),
+        'increments_per_s': round(expected / elapsed),
+        'flushes': len(flushes),
+        'flush_max_ms': round(flushes[-1], 3) if flushes else None,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+    if result['lost']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+HTTP load benchmark for the marketplace, dashboard and API.
+
+Usage:
+    python benchmarks/bench_http.py --concurrency 32 --seconds 20 --output http.json
+    python benchmarks/bench_http.py --url http://127.0.0.1:8000 --endpoints home,search
+
+Không có ``--url`` thì script tự chạy gunicorn (config.wsgi, ``--workers``
+worker) trên một cổng trống với DJANGO_SETTINGS_MODULE hiện tại - nên dùng
+settings giống production (DEBUG=False, không debug toolbar). Mỗi endpoint
+được bắn lần lượt bởi ``--concurrency`` process, mỗi process một kết nối
+keep-alive gửi request nối tiếp trong ``--seconds`` giây (sau
+``--warmup`` giây làm nóng không tính). Dashboard dùng session của một
+user staff, API dùng token DRF của user đó.
+
+Kết quả: RPS và p50/p95/p99 (ms) cho từng endpoint, kèm commit git để so
+sánh giữa các lần chạy bằng benchmarks/compare.py.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model  # noqa: E402
+from django.contrib.sessions.backends.db import SessionStore  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+SEARCH_TERMS = ['email', 'blog post', 'marketing', 'seo', 'python code', 'logo', 'resume', 'youtube script']
+
+# name -> (path, auth: None | 'session' | 'token')
+ENDPOINTS = {
+    'home': ('/', None),
+    'search': ('/search/?q={term}', None),
+    'dashboard_home': ('/dashboard/', 'session'),
+    'prompts_list': ('/dashboard/prompts/', 'session'),
+    'api_users': ('/api/users/', 'token'),
+}
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile (nearest rank) of sorted samples."""
+    index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+def staff_credentials():
+    """Session cookie and API token of a staff user created for the benchmark."""
+    User = get_user_model()
+    user, created = User.objects.get_or_create(
+        username='bench-admin', defaults={'email': 'bench-admin@example.com', 'is_staff': True, 'is_superuser': True}
+    )
+    if created:
+        user.set_password('benchmark')
+        user.save()
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    token, _ = Token.objects.get_or_create(user=user)
+    return {
+        'session': {'Cookie': f'{settings.SESSION_COOKIE_NAME}={session.session_key}'},
+        'token': {'Authorization': f'Token {token.key}'},
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(workers):
+    """Start gunicorn on a free port and wait until it accepts connections."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'config.wsgi:application', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(workers), '--log-level', 'warning'],
+        cwd=ROOT, env=os.environ.copy(),
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    sys.exit('gunicorn did not start')
+
+
+def client(base_url, path, headers, start_at, warmup_until, stop_at, seed):
+    """One keep-alive connection sending requests back to back; returns (latencies ms, errors)."""
+    parts = urlsplit(base_url)
+    rng = random.Random(seed)
+    headers = {'Host': 'localhost', **headers}
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    latencies, errors = [], 0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    while True:
+        now = time.time()
+        if now >= stop_at:
+            break
+        url = path.format(term=rng.choice(SEARCH_TERMS).replace(' ', '+'))
+        begin = time.perf_counter()
+        try:
+            connection.request('GET', url, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            failed = response.status >= 400
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+            failed = True
+        elapsed = (time.perf_counter() - begin) * 1000
+        if now >= warmup_until:
+            latencies.append(elapsed)
+            errors += failed
+    connection.close()
+    return latencies, errors
+
+
+def run_endpoint(pool, base_url, path, headers, args):
+    start_at = time.time() + 0.5
+    warmup_until = start_at + args.warmup
+    stop_at = warmup_until + args.seconds
+    results = pool.starmap(client, [
+        (base_url, path, headers, start_at, warmup_until, stop_at, seed) for seed in range(args.concurrency)
+    ])
+    latencies = sorted(latency for samples, _ in results for latency in samples)
+    errors = sum(errors for _, errors in results)
+    if not latencies:
+        return {'requests': 0, 'errors': errors}
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / args.seconds, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='Base URL of a running server (default: start gunicorn)')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers when started here')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='Comma separated: ' + ', '.join(ENDPOINTS))
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent connections')
+    parser.add_argument('--seconds', type=float, default=20, help='Measured duration per endpoint')
+    parser.add_argument('--warmup', type=float, default=2, help='Unmeasured warm-up per endpoint')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = set(names) - set(ENDPOINTS)
+    if unknown:
+        sys.exit(f'Unknown endpoints: {", ".join(sorted(unknown))}')
+
+    credentials = staff_credentials()
+    server = None
+    base_url = args.url
+    if not base_url:
+        server, base_url = start_gunicorn(args.workers)
+
+    results = {}
+    try:
+        with multiprocessing.Pool(args.concurrency) as pool:
+            for name in names:
+                path, auth = ENDPOINTS[name]
+                results[name] = run_endpoint(pool, base_url, path, credentials.get(auth, {}), args)
+                print(f'{name}: {results[name]}', file=sys.stderr)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    result = {
+        'benchmark': 'http',
+        'commit': git_commit(),
+        'settings': os.environ['DJANGO_SETTINGS_MODULE'],
+        'concurrency': args.concurrency,
+        'seconds': args.seconds,
+        'workers': None if args.url else args.workers,
+        'endpoints': results,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
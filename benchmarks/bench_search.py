@@ -0,0 +1,101 @@
+"""
+Search latency benchmark for apps.core.search.search_prompts.
+
+Usage:
+    python benchmarks/bench_search.py --queries 500 --output search.json
+
+Chạy trên database đang cấu hình (DJANGO_SETTINGS_MODULE). Để đo ở quy mô
+production (1M prompts), seed catalog lớn trước rồi chạy script này.
+Query được lấy ngẫu nhiên từ title có sẵn, một nửa bị làm sai chính tả để
+đo cả nhánh trigram.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from apps.core.models import Prompt  # noqa: E402
+from apps.core.search import search_prompts  # noqa: E402
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile (nearest rank) of sorted samples."""
+    index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+def misspell(word):
+    """Swap two adjacent letters to simulate a typo."""
+    if len(word) < 4:
+        return word
+    i = random.randrange(1, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def build_queries(count):
+    """Sample query terms from existing prompt titles."""
+    titles = list(
+        Prompt.objects.filter(status='published').order_by('?').values_list('title', flat=True)[:count]
+    )
+    queries = []
+    for i, title in enumerate(titles):
+        words = [w for w in title.split() if len(w) > 2] or [title]
+        term = random.choice(words).lower()
+        queries.append(misspell(term) if i % 2 else term)
+    return queries
+
+
+def run(queries, page_size):
+    """Execute every query and return latencies in milliseconds."""
+    base = Prompt.objects.filter(status='published').select_related('category', 'author')
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        list(search_prompts(query, base)[:page_size])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries to run')
+    parser.add_argument('--page-size', type=int, default=20, help='Results fetched per query')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    queries = build_queries(args.queries)
+    if not queries:
+        sys.exit('No published prompts found - seed the database first.')
+
+    run(queries[:10], args.page_size)  # warm up
+    latencies = run(queries, args.page_size)
+
+    result = {
+        'benchmark': 'search_prompts',
+        'vendor': connection.vendor,
+        'prompts': Prompt.objects.count(),
+        'queries': len(latencies),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(latencies[-1], 3),
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
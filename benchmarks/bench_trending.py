@@ -0,0 +1,115 @@
+"""
+Load benchmark for the trending engine (apps.core.trending).
+
+Usage:
+    python benchmarks/bench_trending.py --rate 10000 --seconds 10 --output trending.json
+
+Nhiều process bắn sự kiện view/review/purchase (phân phối Zipf trên
+``--prompts`` prompt, tỉ lệ 90/7/3) với tổng tốc độ ``--rate`` sự kiện/giây,
+trong khi process chính gọi refresh_trending mỗi ``--refresh`` giây như
+task Celery. Kết quả gồm tốc độ thực đạt được, độ trễ record_event và thời
+gian refresh. Dùng Redis thật trong CACHES['default'] - các key trending
+sẽ bị xóa khi bắt đầu.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+
+import django  # noqa: E402
+
+django.setup()
+
+from apps.core import trending  # noqa: E402
+
+KINDS = ['view'] * 90 + ['review'] * 7 + ['purchase'] * 3
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile (nearest rank) of sorted samples."""
+    index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+def producer(rate, seconds, prompts, queue):
+    """Emit ``rate`` events/second for ``seconds``; report latencies in µs."""
+    weights = [1 / (rank + 1) for rank in range(prompts)]
+    ids = random.choices(range(1, prompts + 1), weights=weights, k=10000)
+    latencies = []
+    start = time.perf_counter()
+    total = int(rate * seconds)
+    for i in range(total):
+        # Giữ nhịp đều: chờ tới thời điểm của sự kiện thứ i
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        begin = time.perf_counter()
+        trending.record_event(ids[i % len(ids)], random.choice(KINDS))
+        latencies.append((time.perf_counter() - begin) * 1e6)
+    queue.put((total, time.perf_counter() - start, latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rate', type=int, default=10000, help='Target events per second')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration of the run')
+    parser.add_argument('--workers', type=int, default=8, help='Producer processes')
+    parser.add_argument('--prompts', type=int, default=50000, help='Distinct prompts receiving events')
+    parser.add_argument('--refresh', type=float, default=2, help='Seconds between refresh_trending calls')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    redis = trending._redis()
+    redis.delete(trending.SCORES_KEY, trending.EPOCH_KEY, trending.TOP_KEY)
+
+    queue = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=producer, args=(args.rate / args.workers, args.seconds, args.prompts, queue)
+        )
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    refreshes = []
+    deadline = time.perf_counter() + args.seconds
+    while time.perf_counter() < deadline:
+        time.sleep(args.refresh)
+        begin = time.perf_counter()
+        trending.refresh_trending()
+        refreshes.append((time.perf_counter() - begin) * 1000)
+
+    results = [queue.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    events = sum(total for total, _, _ in results)
+    elapsed = max(duration for _, duration, _ in results)
+    latencies = sorted(latency for _, _, samples in results for latency in samples)
+    refreshes.sort()
+    result = {
+        'benchmark': 'trending',
+        'target_events_per_s': args.rate,
+        'events': events,
+        'events_per_s': round(events / elapsed),
+        'record_p50_us': round(percentile(latencies, 50), 1),
+        'record_p99_us': round(percentile(latencies, 99), 1),
+        'tracked_prompts': redis.zcard(trending.SCORES_KEY),
+        'refreshes': len(refreshes),
+        'refresh_max_ms': round(refreshes[-1], 3) if refreshes else None,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare two benchmark result files.
+
+Usage:
+    python benchmarks/compare.py before.json after.json [--threshold 10]
+
+So sánh mọi giá trị số giống nhau giữa hai file JSON của các script trong
+benchmarks/ (ví dụ ``endpoints.home.p99_ms``). Chỉ số thời gian (``_ms``,
+``_us``, ``_s``) tăng, hoặc thông lượng (``rps``, ``_per_s``) giảm quá
+``--threshold`` phần trăm được coi là chậm đi; khi đó script thoát với mã 1
+để dùng được trong CI.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+THROUGHPUT_SUFFIXES = ('rps', '_per_s')
+LATENCY_SUFFIXES = ('_ms', '_us', '_s')
+
+
+def flatten(data, prefix=''):
+    """{dotted.key: number} for every numeric leaf."""
+    values = {}
+    for key, value in data.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            values.update(flatten(value, f'{name}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[name] = value
+    return values
+
+
+def direction(key):
+    """+1 if higher is better, -1 if lower is better, 0 if neutral."""
+    leaf = key.rsplit('.', 1)[-1]
+    if leaf.endswith(THROUGHPUT_SUFFIXES):
+        return 1
+    if leaf.endswith(LATENCY_SUFFIXES):
+        return -1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('before', help='Baseline result JSON')
+    parser.add_argument('after', help='New result JSON')
+    parser.add_argument('--threshold', type=float, default=10, help='Allowed slowdown in percent')
+    args = parser.parse_args()
+
+    before = flatten(json.loads(Path(args.before).read_text()))
+    after = flatten(json.loads(Path(args.after).read_text()))
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        change = (new - old) / old * 100 if old else 0.0
+        worse = direction(key) and -direction(key) * change > args.threshold
+        regressions += bool(worse)
+        marker = '  REGRESSION' if worse else ''
+        print(f'{key:45} {old:>12} -> {new:>12} ({change:+.1f}%){marker}')
+    if regressions:
+        print(f'{regressions} metric(s) regressed by more than {args.threshold}%')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
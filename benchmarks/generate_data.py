@@ -0,0 +1,244 @@
+"""
+Scale-data generator for the benchmark suite.
+
+Usage:
+    python benchmarks/generate_data.py --prompts 1000000 --purchases 10000000 --interactions 5000000
+
+Nạp dữ liệu tổng hợp bằng COPY (psycopg2 ``copy_expert``, dữ liệu sinh dần
+theo dòng, không giữ cả bảng trong bộ nhớ): users, categories, prompts và
+purchases của marketplace, prompt và user_prompt_interactions của PromptHub.
+Id được cấp liên tục sau max(id) hiện có rồi đặt lại sequence, nên chạy
+thêm trên database đã có dữ liệu vẫn được.
+
+COPY bỏ qua signals, vì vậy cuối cùng các bảng tổng hợp được tính lại như
+các task reconcile: MarketplaceStats, UserActivity, SalesRollup và
+điểm rating (sau ANALYZE). Kết quả (số dòng, thời gian từng bước) in ra JSON.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.core.management.color import no_style  # noqa: E402
+from django.db import connection, models  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.core.models import Category, MarketplaceStats, Prompt, Purchase, UserActivity  # noqa: E402
+from apps.core.ratings import reconcile_ratings  # noqa: E402
+from apps.prompthub.models import Prompt as HubPrompt, UserPromptInteraction  # noqa: E402
+from apps.users.models import User  # noqa: E402
+
+WORDS = (
+    'write email blog post story marketing seo product description social media caption code python '
+    'review summary essay outline slogan logo brand poem lyrics recipe travel plan lesson quiz resume '
+    'cover letter interview script video youtube tiktok ad copy landing page newsletter tweet thread '
+    'business strategy analysis report translate vietnamese english image midjourney portrait anime'
+).split()
+COUNTRIES = ['VN'] * 40 + ['US'] * 20 + ['JP', 'KR', 'SG', 'TH', 'DE', 'FR', 'GB', 'AU', 'IN', 'ID'] * 4
+
+
+class RowStream:
+    """File-like object feeding COPY from a row generator (tab separated, \\N = NULL)."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def read(self, size=-1):
+        # psycopg2 gửi nguyên phần trả về, không cần đúng ``size``; chuỗi rỗng = hết dữ liệu
+        return ''.join(self.format(row) for _, row in zip(range(1000), self.rows))
+
+    @staticmethod
+    def format(row):
+        return '\t'.join('\\N' if value is None else str(value) for value in row) + '\n'
+
+
+def copy_value(field, value):
+    """Text form of a Python value for COPY."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(field, models.JSONField):
+        return json.dumps(value)
+    return value
+
+
+def copy_model(model, count, make_row):
+    """
+    COPY ``count`` rows of ``model``; ``make_row(pk, i)`` returns {field attname: value}.
+
+    Field không có trong dict lấy default của model (auto_now = lúc chạy).
+
+    Returns:
+        int: First primary key used
+    """
+    fields = model._meta.concrete_fields
+    now = timezone.now()
+    defaults = {
+        field.attname: now if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+        else field.get_default()
+        for field in fields
+    }
+
+    pk_field = model._meta.pk
+    serial = isinstance(pk_field, models.AutoField)
+    with connection.cursor() as cursor:
+        start = 1
+        if serial:
+            cursor.execute(f'SELECT COALESCE(MAX({pk_field.column}), 0) FROM {model._meta.db_table}')
+            start = cursor.fetchone()[0] + 1
+
+        def rows():
+            for i in range(count):
+                values = {**defaults, **make_row(start + i, i)}
+                if serial:
+                    values[pk_field.attname] = start + i
+                yield [copy_value(field, values[field.attname]) for field in fields]
+
+        columns = ', '.join(f'"{field.column}"' for field in fields)
+        cursor.copy_expert(f'COPY {model._meta.db_table} ({columns}) FROM STDIN', RowStream(rows()))
+        for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+            cursor.execute(sql)
+    return start
+
+
+def title(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 6))).capitalize()
+
+
+def skewed(rng, start, count):
+    """Id in [start, start + count) with a long tail: few rows get most traffic."""
+    return start + int(count * rng.random() ** 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=200000, help='Users (buyers and sellers)')
+    parser.add_argument('--categories', type=int, default=50, help='Marketplace categories')
+    parser.add_argument('--prompts', type=int, default=1000000, help='Marketplace prompts')
+    parser.add_argument('--purchases', type=int, default=10000000, help='Marketplace purchases')
+    parser.add_argument('--hub-prompts', type=int, default=100000, help='PromptHub prompts')
+    parser.add_argument('--interactions', type=int, default=5000000, help='PromptHub user interactions')
+    parser.add_argument('--days', type=int, default=365, help='Purchases are spread over this many days')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+    if args.interactions > args.users * args.hub_prompts:
+        sys.exit('--interactions cannot exceed users x hub prompts')
+
+    rng = random.Random(args.seed)
+    now = timezone.now()
+    timings = {}
+
+    def step(name, function):
+        begin = time.perf_counter()
+        result = function()
+        timings[name] = round(time.perf_counter() - begin, 1)
+        print(f'{name}: {timings[name]}s', file=sys.stderr)
+        return result
+
+    password = make_password('benchmark')
+    first_user = step('users', lambda: copy_model(User, args.users, lambda pk, i: {
+        'username': f'bench{pk}', 'email': f'bench{pk}@example.com', 'password': password,
+        'is_active': True, 'date_joined': now - timedelta(days=rng.randrange(args.days * 2)),
+    }))
+    # 10% đầu là người bán
+    sellers = max(1, args.users // 10)
+
+    first_category = step('categories', lambda: copy_model(Category, args.categories, lambda pk, i: {
+        'name': f'{WORDS[i % len(WORDS)].capitalize()} {pk}', 'slug': f'bench-category-{pk}',
+        'description': title(rng),
+    }))
+
+    prices = []
+
+    def prompt_row(pk, i):
+        price = rng.choice([0, 2.99, 4.99, 9.99, 14.99, 19.99, 29.99])
+        prices.append(price)
+        return {
+            'title': title(rng), 'slug': f'bench-prompt-{pk}',
+            'description': title(rng), 'content': ' '.join(rng.choice(WORDS) for _ in range(40)),
+            'category_id': first_category + rng.randrange(args.categories),
+            'author_id': first_user + rng.randrange(sellers),
+            'price': f'{price:.2f}', 'status': 'published' if rng.random() < 0.95 else 'draft',
+            'thumbnail': 'prompts/thumbnails/bench.png', 'tags': '',
+            'views': rng.randrange(10000), 'downloads': rng.randrange(500),
+            'featured': rng.random() < 0.001,
+            'created_at': now - timedelta(days=rng.randrange(args.days * 2), seconds=rng.randrange(86400)),
+        }
+
+    first_prompt = step('prompts', lambda: copy_model(Prompt, args.prompts, prompt_row))
+
+    def purchase_row(pk, i):
+        index = skewed(rng, 0, args.prompts)
+        return {
+            'user_id': first_user + rng.randrange(args.users),
+            'prompt_id': first_prompt + index,
+            'price_paid': f'{prices[index]:.2f}',
+            'transaction_id': f'BENCH{pk:012d}',
+            'country': rng.choice(COUNTRIES),
+            'created_at': now - timedelta(seconds=rng.randrange(args.days * 86400)),
+        }
+
+    step('purchases', lambda: copy_model(Purchase, args.purchases, purchase_row))
+
+    hub_offset = HubPrompt.objects.filter(id_prompt__startswith='BN').count()
+    hub_ids = [f'BN{hub_offset + i:010d}' for i in range(args.hub_prompts)]
+    step('hub_prompts', lambda: copy_model(HubPrompt, args.hub_prompts, lambda pk, i: {
+        'id_prompt': hub_ids[i], 'title': title(rng), 'slug': f'bench-hub-{hub_ids[i].lower()}',
+        'short_description': title(rng), 'status': 3, 'published_at': now,
+        'created_by_id': first_user + rng.randrange(sellers), 'active': True,
+    }))
+
+    def interaction_row(pk, i):
+        # Cặp (user, prompt) không trùng: user chạy vòng, prompt lệch theo user
+        user = i % args.users
+        prompt = (i // args.users + user * 7919) % args.hub_prompts
+        liked = rng.random() < 0.3
+        rated = rng.random() < 0.1
+        seen = now - timedelta(seconds=rng.randrange(args.days * 86400))
+        return {
+            'user_id': first_user + user, 'prompt_id': hub_ids[prompt],
+            'is_liked': liked, 'is_saved': rng.random() < 0.1,
+            'rating': rng.randint(1, 5) if rated else None,
+            'view_count': rng.randint(1, 20), 'last_viewed_at': seen,
+            'liked_at': seen if liked else None, 'rated_at': seen if rated else None,
+        }
+
+    step('interactions', lambda: copy_model(UserPromptInteraction, args.interactions, interaction_row))
+
+    # Thống kê planner phải mới trước các câu reconcile trên bảng vừa nạp
+    step('analyze', lambda: connection.cursor().execute('ANALYZE'))
+    step('reconcile_marketplace_stats', MarketplaceStats.reconcile)
+    step('reconcile_user_activity', UserActivity.reconcile)
+    step('backfill_sales_rollups', lambda: call_command('backfill_sales_rollups', stdout=open(os.devnull, 'w')))
+    step('reconcile_ratings', reconcile_ratings)
+
+    result = {
+        'benchmark': 'generate_data',
+        'rows': {
+            'users': args.users, 'categories': args.categories, 'prompts': args.prompts,
+            'purchases': args.purchases, 'hub_prompts': args.hub_prompts, 'interactions': args.interactions,
+        },
+        'seconds': timings,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,6 @@
 # This makes config a Python package
+
+# Nạp app Celery khi Django khởi động để shared_task.delay() từ web dùng cấu hình CELERY_*
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
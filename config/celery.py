@@ -3,6 +3,7 @@ Celery configuration for Django project.
 """
 import os
 from celery import Celery
+from celery.signals import worker_process_init
 
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
@@ -21,3 +22,10 @@ app.autodiscover_tasks()
 def debug_task(self):
     """Debug task for testing Celery."""
     print(f'Request: {self.request!r}')
+
+
+@worker_process_init.connect
+def preload_reference_data(**kwargs):
+    """Load the reference-data registry in each worker process."""
+    from apps.core.references import preload
+    preload()
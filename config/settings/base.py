@@ -5,6 +5,7 @@ This file contains common settings for all environments.
 import os
 from pathlib import Path
 from decouple import config
+from celery.schedules import crontab
 
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -20,6 +21,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -36,6 +38,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.metrics.RequestMetricsMiddleware',  # Đo đầu tiên để có tổng thời gian request
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For serving static files
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -51,7 +54,7 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'apps.core.metrics.InstrumentedTemplates',  # DjangoTemplates + đo thời gian render
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -126,11 +129,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.api.pagination.KeysetPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'rest_framework.filters.SearchFilter',
-        'rest_framework.filters.OrderingFilter',
     ],
 }
 
@@ -143,11 +145,105 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# Bộ đếm views/downloads đệm qua Redis (apps.core.counters)
+COUNTER_FLUSH_INTERVAL = config('COUNTER_FLUSH_INTERVAL', default=10, cast=int)  # giây
+COUNTER_FLUSH_BATCH_SIZE = config('COUNTER_FLUSH_BATCH_SIZE', default=5000, cast=int)
+COUNTER_FLUSH_LOCK_TIMEOUT = 300
+
+# Trending (apps.core.trending)
+TRENDING_HALF_LIFE_HOURS = config('TRENDING_HALF_LIFE_HOURS', default=24, cast=float)
+TRENDING_SIZE = 50
+TRENDING_WEIGHTS = {'view': 1, 'review': 5, 'purchase': 10}
+TRENDING_REFRESH_INTERVAL = config('TRENDING_REFRESH_INTERVAL', default=300, cast=int)  # giây
+
+# "Người dùng cũng thích" (apps.core.recommendations)
+RECOMMENDATION_TOP_K = 20
+RECOMMENDATION_WEIGHTS = {'view': 1, 'like': 3, 'save': 4, 'rating': 1}
+
+# "Prompt tương tự" theo nội dung (apps.core.content_index)
+SIMILARITY_INDEX_PATH = config('SIMILARITY_INDEX_PATH', default=str(BASE_DIR / 'var' / 'content_index.bin'))
+
+# Đo SQL/template/cache theo view (apps.core.metrics)
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1').split(',')
+# Số câu SQL tối đa mỗi request theo view_name; vượt quá thì log warning
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=30, cast=int)
+QUERY_BUDGETS = {
+    'core:home': 15,  # cache nguội: mỗi section một vài câu
+    'core:search': 8,
+    'dashboard:home': 12,
+    'dashboard:prompts': 10,
+    'dashboard:categories': 8,
+    'dashboard:sales': 10,
+    'dashboard:reviews': 10,
+    'dashboard:users': 10,
+}
+
+# Phát hiện prompt đăng lại (apps.core.duplicates)
+DUPLICATE_JACCARD_THRESHOLD = config('DUPLICATE_JACCARD_THRESHOLD', default=0.8, cast=float)
+
+# File export do task generate_report ghi ra (apps.core.exports)
+EXPORT_ROOT = config('EXPORT_ROOT', default=str(BASE_DIR / 'var' / 'exports'))
+
+# Bản dữ liệu giữ trong process (apps.core.versioned): giây giữa hai lần so phiên bản với Redis
+LOCAL_CACHE_CHECK_INTERVAL = config('LOCAL_CACHE_CHECK_INTERVAL', default=5, cast=int)
+
+# Phân quyền theo vai trò (apps.core.rbac): role_code cho user chưa gán vai trò / khách
+RBAC_DEFAULT_ROLE = config('RBAC_DEFAULT_ROLE', default='MEMBER')
+RBAC_ANONYMOUS_ROLE = config('RBAC_ANONYMOUS_ROLE', default='GUEST')
+
+# Hàng đợi email (apps.core.mail)
+EMAIL_OUTBOX_INTERVAL = config('EMAIL_OUTBOX_INTERVAL', default=60, cast=int)  # giây, để gửi lại email lỗi
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int)
+EMAIL_OUTBOX_RATE = config('EMAIL_OUTBOX_RATE', default=10, cast=int)  # email/giây cho mọi worker, 0 = không giới hạn
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+EMAIL_OUTBOX_RETRY_DELAY = 60  # giây, nhân đôi sau mỗi lần lỗi
+EMAIL_OUTBOX_RETRY_MAX_DELAY = 6 * 3600
+# giây một worker giữ batch đã nhận; phải dài hơn thời gian gửi một batch (BATCH_SIZE / RATE)
+EMAIL_OUTBOX_LEASE = config('EMAIL_OUTBOX_LEASE', default=300, cast=int)
+
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-marketplace-stats': {
+        'task': 'apps.core.tasks.reconcile_marketplace_stats',
+        'schedule': crontab(minute=0, hour=3),
+    },
+    'reconcile-user-activity': {
+        'task': 'apps.core.tasks.reconcile_user_activity',
+        'schedule': crontab(minute=30, hour=3),
+    },
+    'refresh-sales-rollups': {
+        'task': 'apps.core.tasks.refresh_sales_rollups',
+        'schedule': crontab(minute=15),
+    },
+    'flush-counters': {
+        'task': 'apps.core.tasks.flush_counters',
+        'schedule': COUNTER_FLUSH_INTERVAL,
+    },
+    'refresh-trending': {
+        'task': 'apps.core.tasks.refresh_trending',
+        'schedule': TRENDING_REFRESH_INTERVAL,
+    },
+    'refresh-recommendations': {
+        'task': 'apps.core.tasks.refresh_recommendations',
+        'schedule': crontab(minute='*/30'),
+    },
+    'build-recommendations': {
+        'task': 'apps.core.tasks.build_recommendations',
+        'schedule': crontab(minute=0, hour=4, day_of_week=0),
+    },
+    'send-outbox': {
+        'task': 'apps.core.tasks.send_outbox',
+        'schedule': EMAIL_OUTBOX_INTERVAL,
+    },
+    'prune-counter-flushes': {
+        'task': 'apps.core.tasks.prune_counter_flushes',
+        'schedule': crontab(minute=45, hour=3),
+    },
+}
 
 # Cache Configuration
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'apps.core.metrics.InstrumentedRedisCache',  # RedisCache + đếm hit/miss
         'LOCATION': config('REDIS_URL', default='redis://localhost:6379/1'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
@@ -155,6 +251,21 @@ CACHES = {
     }
 }
 
+# Home page section cache (apps.core.cache)
+HOME_CACHE_TIMEOUT = config('HOME_CACHE_TIMEOUT', default=60 * 15, cast=int)
+# Bump khi thay đổi cấu trúc dữ liệu của các section
+HOME_CACHE_VERSION = 1
+
+# Điểm Bayes cho xếp hạng prompt (apps.core.ratings)
+RATING_PRIOR_MEAN = config('RATING_PRIOR_MEAN', default=3.5, cast=float)
+RATING_PRIOR_WEIGHT = config('RATING_PRIOR_WEIGHT', default=5, cast=int)
+
+# Bảng dải IP -> quốc gia (CSV: ip_start,ip_end,country_code), xem apps.core.geoip.
+# File không đi kèm repo (tải bản "IP to country lite"); để trống thì không tra quốc gia
+GEOIP_COUNTRY_CSV = config('GEOIP_COUNTRY_CSV', default='')
+# Số reverse proxy tin cậy đứng trước app (0: dùng REMOTE_ADDR, bỏ qua X-Forwarded-For)
+GEOIP_TRUSTED_PROXIES = config('GEOIP_TRUSTED_PROXIES', default=0, cast=int)
+
 # Email Configuration
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = config('EMAIL_HOST', default='localhost')
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.production')
 
 application = get_wsgi_application()
+
+# Nạp sẵn bảng tham chiếu trong mỗi worker (module này được import sau khi fork)
+from apps.core.references import preload  # noqa: E402
+
+preload()
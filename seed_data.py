@@ -1,5 +1,9 @@
-from apps.core.models import Category, Prompt
+from apps.core.cache import invalidate_for_model
+from apps.core.models import Category, MarketplaceStats, Prompt, UserActivity
+from apps.core.tags import sync_prompt_tags
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.text import slugify
 
 User = get_user_model()
 admin = User.objects.first()
@@ -46,21 +50,25 @@ categories_data = [
 ]
 
 print("\n📁 Creating categories...")
+# bulk_create không gọi save()/signals: tự đặt slug, chỉ đếm các dòng mới
 for data in categories_data:
-    cat, created = Category.objects.get_or_create(
-        name=data['name'],
-        defaults={
-            'icon': data['icon'],
-            'description': data['description']
-        }
-    )
-    status = "✨ Created" if created else "✓ Exists"
-    print(f"{status}: {cat.name}")
+    data['slug'] = slugify(data['name'])
+existing = set(
+    Category.objects.filter(slug__in=[data['slug'] for data in categories_data]).values_list('slug', flat=True)
+)
+with transaction.atomic():
+    Category.objects.bulk_create([Category(**data) for data in categories_data], ignore_conflicts=True)
+    new_categories = [data for data in categories_data if data['slug'] not in existing]
+    MarketplaceStats.increment(total_categories=len(new_categories))
+for data in categories_data:
+    status = "✨ Created" if data['slug'] not in existing else "✓ Exists"
+    print(f"{status}: {data['name']}")
 
 # Tạo prompts
-cat_chatgpt = Category.objects.get(name='ChatGPT Prompts')
-cat_midjourney = Category.objects.get(name='Midjourney')
-cat_marketing = Category.objects.get(name='Marketing')
+categories = Category.objects.in_bulk([data['slug'] for data in categories_data], field_name='slug')
+cat_chatgpt = categories['chatgpt-prompts']
+cat_midjourney = categories['midjourney']
+cat_marketing = categories['marketing']
 
 prompts_data = [
     # ChatGPT Prompts
@@ -211,20 +219,33 @@ prompts_data = [
 ]
 
 print("\n📝 Creating prompts...")
-created_count = 0
 for data in prompts_data:
-    prompt, created = Prompt.objects.get_or_create(
-        title=data['title'],
-        defaults={
-            'author': admin,
-            **{k: v for k, v in data.items() if k != 'title'}
-        }
+    data['slug'] = slugify(data['title'])
+existing = set(
+    Prompt.objects.filter(slug__in=[data['slug'] for data in prompts_data]).values_list('slug', flat=True)
+)
+with transaction.atomic():
+    Prompt.objects.bulk_create(
+        [Prompt(author=admin, **data) for data in prompts_data], ignore_conflicts=True
     )
-    if created:
-        created_count += 1
-        print(f"✨ Created: {prompt.title} (${prompt.price})")
+    # Bù phần việc của các signal post_save cho những prompt vừa tạo
+    new_slugs = [data['slug'] for data in prompts_data if data['slug'] not in existing]
+    new_prompts = list(Prompt.objects.filter(slug__in=new_slugs))
+    for prompt in new_prompts:
+        sync_prompt_tags(prompt)
+    MarketplaceStats.increment(
+        total_products=sum(prompt.status == 'published' for prompt in new_prompts),
+        total_downloads=sum(prompt.downloads for prompt in new_prompts),
+    )
+    UserActivity.increment(admin.pk, prompts_count=len(new_prompts))
+created_count = len(new_prompts)
+for data in prompts_data:
+    if data['slug'] in existing:
+        print(f"✓ Exists: {data['title']}")
     else:
-        print(f"✓ Exists: {prompt.title}")
+        print(f"✨ Created: {data['title']} (${data['price']})")
+invalidate_for_model(Category)
+invalidate_for_model(Prompt)
 
 print(f"\n✅ Database seeded successfully!")
 print(f"📊 Summary:")